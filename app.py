@@ -1,11 +1,11 @@
 # app.py
 import json
 import os
+import uuid
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import streamlit as st
-import pypandoc
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,12 +16,18 @@ os.environ['OPENAI_API_KEY']="sk-p"
 from main import get_response 
 from src.consult.legal_report_builder import LegalAgent 
 from src.newsletter.newsletter_builder import NewsletterAgent
+from src.utils import metering
 
 # -------------------------
-# 🔧 Crawler import
+# 🔧 Crawler import (업데이트 버튼 클릭 시 로드)
 # -------------------------
-from src.moel_iqrs_crawler import main as iqrs_update
-from src.moel_fastcounsel_crawler import main as fastcounsel_update
+def iqrs_update(**kwargs):
+    from src.moel_iqrs_crawler import main
+    return main(**kwargs)
+
+def fastcounsel_update(**kwargs):
+    from src.moel_fastcounsel_crawler import main
+    return main(**kwargs)
 
 # -------------------------
 # 🔧 Handler (로직 처리 함수들)
@@ -29,10 +35,11 @@ from src.moel_fastcounsel_crawler import main as fastcounsel_update
 
 def handle_news_selection_click(selected_title):
     agent = st.session_state["newsletter_agent"]
-    agent.choose_news_source(selected_title) 
-    st.session_state.chat_history.append({"role": "user", "content": f"뉴스 기사: **{selected_title}** 선택 완료"})
-    
-    next_response = agent.run_steps("") 
+    with metering.turn(st.session_state["usage_session_id"]):
+        agent.choose_news_source(selected_title) 
+        st.session_state.chat_history.append({"role": "user", "content": f"뉴스 기사: **{selected_title}** 선택 완료"})
+        
+        next_response = agent.run_steps("") 
     st.session_state.chat_history.append({"role": "assistant", "content": next_response["content"]})
     st.rerun()
 
@@ -41,7 +48,8 @@ def handle_consult_selection_click(selected_title):
     agent.choose_consult_source(selected_title) 
     st.session_state.chat_history.append({"role": "user", "content": f"노무 상담 사례: **{selected_title}** 선택 완료"})
     
-    next_response = agent.run_steps("") 
+    with metering.turn(st.session_state["usage_session_id"]):
+        next_response = agent.run_steps("") 
     prompt_content = next_response.get("message", next_response.get("content"))
     if prompt_content is not None:
          st.session_state.chat_history.append({"role": "assistant", "content": prompt_content})
@@ -53,7 +61,8 @@ def handle_policy_selection_click(policy_options, selected_indices):
     agent.choose_policy(selected_items) 
     st.session_state.chat_history.append({"role": "user", "content": f"정책 자료 {len(selected_items)}개 선택 완료"})
     
-    next_response = agent.run_steps("") 
+    with metering.turn(st.session_state["usage_session_id"]):
+        next_response = agent.run_steps("") 
     st.session_state.chat_history.append({"role": "assistant", "content": next_response["content"]})
     st.rerun()
 
@@ -62,7 +71,8 @@ def handle_final_generation():
     st.session_state.chat_history.append({"role": "user", "content": "뉴스레터 최종 생성 시작"})
     
     with st.spinner("💭 뉴스레터 최종 문서 생성 및 HTML 렌더링 중..."):
-        final_response = agent.run_steps("생성")
+        with metering.turn(st.session_state["usage_session_id"]):
+            final_response = agent.run_steps("생성")
         
     if final_response.get("type") == "newsletter":
         content = final_response.get("content")
@@ -73,6 +83,43 @@ def handle_final_generation():
     st.session_state["newsletter_agent"] = NewsletterAgent()
     st.rerun()
 
+# -------------------------
+# 브라우저 풀 예열 (BROWSER_POOL_WARMUP=1 인 경우, 프로세스당 1회 백그라운드 실행)
+# -------------------------
+@st.cache_resource
+def warm_browser_pool():
+    import threading
+    from src.newsletter.browser_pool import get_browser_pool
+    from src.utils.tracing import propagate
+    pool = get_browser_pool()
+    threading.Thread(target=propagate(pool.warmup), daemon=True).start()
+    return pool
+
+if os.getenv("BROWSER_POOL_WARMUP") == "1":
+    warm_browser_pool()
+
+# -------------------------
+# 벡터 인덱스 예열 (HNSW 세그먼트 + cross-encoder reranker를 미리 로드, VECTOR_WARMUP=0 이면 생략,
+# 프로세스당 1회 백그라운드 실행)
+# -------------------------
+@st.cache_resource
+def warm_vector_index():
+    import threading
+    from src.rag.load_index import warmup_collections
+    from src.rag.rerank import warmup as warmup_reranker
+    from src.utils.tracing import propagate
+
+    def warmup():
+        warmup_collections()
+        warmup_reranker()
+
+    thread = threading.Thread(target=propagate(warmup), daemon=True)
+    thread.start()
+    return thread
+
+if os.getenv("VECTOR_WARMUP", "1") != "0":
+    warm_vector_index()
+
 # -------------------------
 # Streamlit 페이지 설정
 # -------------------------
@@ -89,6 +136,8 @@ if "legal_agent" not in st.session_state:
     st.session_state["legal_agent"] = LegalAgent()
 if "newsletter_agent" not in st.session_state:
     st.session_state["newsletter_agent"] = NewsletterAgent()
+if "usage_session_id" not in st.session_state:
+    st.session_state["usage_session_id"] = uuid.uuid4().hex
 
 # -------------------------
 # Sidebar (데이터 업데이트 등)
@@ -116,10 +165,26 @@ with st.sidebar:
             fastcounsel_update(max_pages=fast_max_page)
             st.success("완료!")
 
+    st.write("---")
+    st.markdown("### 💰 토큰 사용량")
+    session_usage = metering.session_totals(st.session_state["usage_session_id"])
+    today = datetime.now().strftime("%Y-%m-%d")
+    today_usage = next((row for row in metering.usage_by_day(days=1) if row["day"] == today), None)
+    col1, col2 = st.columns(2)
+    col1.metric("세션 토큰", f"{session_usage['prompt_tokens'] + session_usage['completion_tokens']:,}")
+    col2.metric("세션 비용", f"${session_usage['cost_usd']:.4f}")
+    if today_usage:
+        st.caption(f"오늘 누적: {today_usage['prompt_tokens'] + today_usage['completion_tokens']:,} tokens / ${today_usage['cost_usd']:.4f}")
+    with st.expander("단계별 사용량 (세션)"):
+        st.dataframe(metering.usage_by_step(session_id=st.session_state["usage_session_id"]), hide_index=True)
+    with st.expander("턴별 사용량 (세션)"):
+        st.dataframe(metering.usage_by_turn(st.session_state["usage_session_id"]), hide_index=True)
+
 # -------------------------
 # PDF 변환 함수
 # -------------------------
 def md_to_pdf_bytes(md_content: str) -> bytes:
+    import pypandoc
     output_file = f"/tmp/report_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
     pypandoc.convert_text(md_content, to="pdf", format="md", outputfile=output_file, extra_args=["--pdf-engine=wkhtmltopdf"])
     with open(output_file, "rb") as f:
@@ -254,13 +319,14 @@ if query := st.chat_input("질의를 입력하세요", disabled=input_disabled):
 
     with st.chat_message("assistant"):
         with st.spinner("💭 AI 분석 중..."):
-            reply, tool_results, updated_legal_agent, updated_newsletter_agent = get_response(
-                query=query, 
-                legal_agent_instance=current_legal_agent,
-                newsletter_agent_instance=current_newsletter_agent,
-                directive="",
-                continuous=True
-            )
+            with metering.turn(st.session_state["usage_session_id"]):
+                reply, tool_results, updated_legal_agent, updated_newsletter_agent = get_response(
+                    query=query, 
+                    legal_agent_instance=current_legal_agent,
+                    newsletter_agent_instance=current_newsletter_agent,
+                    directive="",
+                    continuous=True
+                )
             st.session_state["legal_agent"] = updated_legal_agent
             st.session_state["newsletter_agent"] = updated_newsletter_agent
             
@@ -1,24 +1,23 @@
 # 필요한 라이브러리 불러오기
 
 # Python 기본함수
-import requests
-import base64
 import json
 import os
-import glob
-import numpy as np
-from PIL import Image
-from io import BytesIO
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from openai import OpenAI
 from pathlib import Path
 import streamlit as st
 
-# RAG 구성
-from chromadb import PersistentClient
+# RAG 구성 (chromadb는 첫 검색 시점에 로드)
 from src.embeddings import get_embedding
-from src.rag.load_index import load_chroma_collection, search_vector_store, search_multiple_collections
+from src.rag.aliases import list_collections
+from src.rag.compact import compact_results
+from src.rag.load_index import (
+    fetch_documents, get_chroma_client, load_chroma_collection, search_vector_store, search_multiple_collections,
+)
+from src.utils.llm import chat_completion
+from src.utils.timing import stage
+from src.utils.tracing import traced
 # from src.consult.legal_report_builder import LegalAgent
 # from src.newsletter.newsletter_builder import NewsletterAgent
 
@@ -78,7 +77,7 @@ tools = [
         "type": "function",
         "function": {
             "name": "search_multiple_collections",
-            "description": "Search across multiple Chroma collections and return merged top-k vector results.",
+            "description": "Search across multiple Chroma collections and return compact records (id, title, question, snippet, link, ref_no, score) for up to top_k relevant, diversified results. Use fetch_documents with the ids for full text.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -95,6 +94,19 @@ tools = [
                         "type": "integer",
                         "description": "검색할 개수",
                         "default": 5
+                    },
+                    "date_from": {
+                        "type": "string",
+                        "description": "검색 기간 시작 (YYYY, YYYY.MM 또는 YYYY.MM.DD). 최근 해석만 필요할 때 지정"
+                    },
+                    "date_to": {
+                        "type": "string",
+                        "description": "검색 기간 끝 (YYYY, YYYY.MM 또는 YYYY.MM.DD)"
+                    },
+                    "expand_duplicates": {
+                        "type": "integer",
+                        "description": "결과마다 함께 볼 근접 중복(비슷한 질문) 글 수. duplicates가 있는 결과의 유사 사례가 더 필요할 때만 지정",
+                        "default": 0
                     }
                 },
                 "required": ["collection_names", "query"]
@@ -102,6 +114,25 @@ tools = [
         }
     },
 
+    {
+        "type": "function",
+        "function": {
+            "name": "fetch_documents",
+            "description": "Fetch the full question/answer text of search_multiple_collections results by id.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "검색 결과의 id 목록. snippet만으로 답하기 어려운 결과만 지정"
+                    }
+                },
+                "required": ["ids"]
+            }
+        }
+    },
+
     {
         "type": "function",
         "function": {
@@ -138,7 +169,67 @@ global session
 session = []
 
 DEFAULT_COLLECTIONS = ["moel_iqrs", "moel_fastcounsel"]
-
+MAX_TOOL_ROUNDS = 3  # 검색 -> 전문 조회 -> 답변까지 한 턴에서 허용하는 tool 호출 라운드 수
+# 이 tool만 호출한 라운드 뒤에 다시 tool 호출을 허용 (보고서 / 뉴스레터 에이전트는 한 번 실행 후 바로 최종 응답)
+RETRIEVAL_TOOLS = {"search_multiple_collections", "fetch_documents"}
+
+
+def run_tool(func_name, args, collection_names, legal_agent_instance, newsletter_agent_instance):
+    """tool call 하나를 실행하고 tool 메시지에 넣을 결과 반환"""
+    if func_name == "search_multiple_collections":
+        chroma_client = get_chroma_client()
+
+        # 존재하는 컬렉션만 사용
+        existing_collections = list_collections(chroma_client)
+        safe_collections = [name for name in args.get("collection_names", collection_names)
+                            if name in existing_collections]
+        print("참조 정보: ", collection_names)
+
+        if not existing_collections:
+            return {"error": "검색 가능한 컬렉션이 없습니다."}
+        results = search_multiple_collections(
+            client=chroma_client,
+            collection_names=existing_collections,
+            query=args["query"],
+            get_embedding_fn=get_embedding,
+            top_k=args.get("top_k", 5),
+            date_from=args.get("date_from"),
+            date_to=args.get("date_to"),
+            expand_duplicates=args.get("expand_duplicates", 0),
+        )
+        # 전문 대신 요약 레코드만 보낸다 (전문은 fetch_documents)
+        return compact_results(results, args["query"])
+
+    if func_name == "fetch_documents":
+        documents = fetch_documents(args.get("ids", []), client=get_chroma_client())
+        return [{"id": doc_id, "document": document or "문서를 찾을 수 없습니다."}
+                for doc_id, document in documents.items()]
+
+    # elif func_name in tool_implementations:
+    #     result = tool_implementations[func_name](**args)
+
+    if func_name == "create_legalreport":
+        try:
+            # Execute the LegalAgent run method
+            return legal_agent_instance.run(**args)
+        except Exception as e:
+            # Catch any exception raised by the agent and report it back to the LLM/UI
+            error_message = f"LegalAgent execution failed: {type(e).__name__} - {str(e)}"
+            print(f"ERROR: {error_message}") # Print to server log for debugging
+            return {"error": error_message}
+
+    if func_name == "create_newsletter":
+        user_input = args.get("user_input", "")
+        result = newsletter_agent_instance.run_steps(user_input)
+        if hasattr(newsletter_agent_instance, '_phase') and newsletter_agent_instance._phase == "ready_to_generate":
+            html = newsletter_agent_instance.run()
+            result = {"newsletter": html}
+        return result
+
+    return {"error": f"Unknown tool: {func_name}"}
+
+
+@traced("get_response")
 def get_response(query, legal_agent_instance, newsletter_agent_instance, collection_names=None, directive="", continuous=False):
     global session
 
@@ -173,6 +264,7 @@ def get_response(query, legal_agent_instance, newsletter_agent_instance, collect
           - 검색되지 않은 사항에 대해서는 답변하지 않습니다.
           - 답변에는 검색된 문서의 출처와 링크를 포함합니다.
           - 답변 근거를 찾은 collecion 이름과 문서 ID를 명시합니다.
+          - 검색 결과는 요약(snippet)이므로, 답변에 전문이 필요한 문서만 id로 fetch_documents 함수를 호출해 확인합니다.
           - 문장을 단락으로 구분하고 이해하기 쉽게 작성합니다. 
 
         2. 사용자가 노무 보고서, 의견서 등을 요청하면 create_legalreport 함수를 호출합니다.
@@ -189,95 +281,54 @@ def get_response(query, legal_agent_instance, newsletter_agent_instance, collect
     # user 메시지 삽입
     session.append({"role": "user", "content": query})
 
-    # GPT 호출
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=session,
-        tools=tools,
-        tool_choice="auto"
-    )
-
-    choice = response.choices[0]
+    # GPT 호출 (검색 요약을 본 뒤 fetch_documents로 전문을 요청할 수 있도록 tool 호출을 MAX_TOOL_ROUNDS회까지 반복)
     tool_messages = []
-
-    result = {"error": "Tool call failed or was not handled."}
-
-    # Tool Calls 처리
-    if choice.finish_reason == "tool_calls":
+    final_response = None
+    for round_index in range(MAX_TOOL_ROUNDS):
+        with stage("router.completion", round=round_index):
+            response = chat_completion(
+                client, "router",
+                model="gpt-4o",
+                messages=session,
+                tools=tools,
+                tool_choice="auto"
+            )
+
+        choice = response.choices[0]
+        if choice.finish_reason != "tool_calls":
+            final_response = response
+            break
+
+        # Tool Calls 처리
+        session.append({"role": "assistant", "tool_calls": choice.message.tool_calls})
         for tool_call in choice.message.tool_calls:
             func_name = tool_call.function.name
             args = json.loads(tool_call.function.arguments)
             tool_call_id = tool_call.id
 
-            if func_name == "search_multiple_collections":
-                global chroma_client
-                try:
-                    chroma_client
-                except NameError:
-                    load_dir = Path("db/chroma_index")
-                    chroma_client = PersistentClient(path=str(load_dir))
-
-                # 존재하는 컬렉션만 사용
-                existing_collections = [col.name for col in chroma_client.list_collections()]
-                safe_collections = [name for name in args.get("collection_names", collection_names)
-                                    if name in existing_collections]
-                print("참조 정보: ", collection_names)
-
-                if not existing_collections:
-                    result = {"error": "검색 가능한 컬렉션이 없습니다."}
-                else:
-                    result = search_multiple_collections(
-                        client=chroma_client,
-                        collection_names=existing_collections,
-                        query=args["query"],
-                        get_embedding_fn=get_embedding,
-                        top_k=args.get("top_k", 5),
-                    )
-                
-            # elif func_name in tool_implementations:
-            #     result = tool_implementations[func_name](**args)
-
-            elif func_name == "create_legalreport":
-                try:
-                    # Execute the LegalAgent run method
-                    result = legal_agent_instance.run(**args)
-                except Exception as e:
-                    # Catch any exception raised by the agent and report it back to the LLM/UI
-                    error_message = f"LegalAgent execution failed: {type(e).__name__} - {str(e)}"
-                    print(f"ERROR: {error_message}") # Print to server log for debugging
-                    result = {"error": error_message}
-
-            elif func_name == "create_newsletter":
-                user_input = args.get("user_input", "")
-                result = newsletter_agent_instance.run_steps(user_input)
-                if hasattr(newsletter_agent_instance, '_phase') and newsletter_agent_instance._phase == "ready_to_generate":
-                    html = newsletter_agent_instance.run()
-                    result = {"newsletter": html}
-
-            else:
-                result = {"error": f"Unknown tool: {func_name}"}
-
-            tool_messages.append({
+            with stage(f"tool.{func_name}", tool_call_id=tool_call_id):
+                result = run_tool(func_name, args, collection_names, legal_agent_instance, newsletter_agent_instance)
+
+            tool_message = {
                 "role": "tool",
                 "tool_call_id": tool_call_id,
                 "name": func_name,
                 "content": json.dumps(result, ensure_ascii=False)
-            })
-            # print(result)
-            # print("tool_messages:", tool_messages)
-
-    # Tool 실행 결과 session에 추가
-    if choice.message.tool_calls is not None:
-        session.append({"role": "assistant", "tool_calls": choice.message.tool_calls})
-
-    for tool_msg in tool_messages:
-        session.append(tool_msg)
-
-    # 최종 응답 생성
-    final_response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=session
-    )
+            }
+            tool_messages.append(tool_message)
+            session.append(tool_message)
+
+        if any(tool_call.function.name not in RETRIEVAL_TOOLS for tool_call in choice.message.tool_calls):
+            break
+
+    # 최종 응답 생성 (tool 호출 없이 답한 경우 그 응답을 그대로 사용)
+    if final_response is None:
+        with stage("router.final_completion"):
+            final_response = chat_completion(
+                client, "router.final",
+                model="gpt-4o",
+                messages=session
+            )
 
     output_text = final_response.choices[0].message.content
     session.append({"role": "system", "content": output_text})
@@ -0,0 +1,51 @@
+"""
+질의회시 / 빠른상담 전체 이력 백필
+
+목록 전체를 훑어 DB에 없는 글(중간 누락 구간 포함)을 병렬로 수집한다.
+중단되면 같은 명령으로 다시 실행하여 마지막 커밋 페이지부터 재개할 수 있다.
+
+사용 예:
+    python scripts/backfill_crawlers.py --sources iqrs fastcounsel --workers 8 --rate 4
+    python scripts/backfill_crawlers.py --sources iqrs --start-page 200 --end-page 400
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def load_crawler(source):
+    if source == "iqrs":
+        from src import moel_iqrs_crawler as crawler
+    else:
+        from src import moel_fastcounsel_crawler as crawler
+    return crawler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill the full MOEL Q&A archives")
+    parser.add_argument("--sources", nargs="+", choices=["iqrs", "fastcounsel"], default=["iqrs", "fastcounsel"])
+    parser.add_argument("--workers", type=int, default=None, help="동시 요청 수 (기본 CRAWL_BACKFILL_WORKERS 또는 8)")
+    parser.add_argument("--rate", type=float, default=None, help="초당 요청 수 상한 (기본 CRAWL_RATE_LIMIT 또는 4)")
+    parser.add_argument("--start-page", type=int, default=None)
+    parser.add_argument("--end-page", type=int, default=None)
+    parser.add_argument("--no-resume", action="store_true", help="체크포인트를 무시하고 1페이지(또는 --start-page)부터 시작")
+    args = parser.parse_args(argv)
+
+    for source in args.sources:
+        crawler = load_crawler(source)
+        summary = crawler.backfill(
+            workers=args.workers or crawler.BACKFILL_WORKERS,
+            rate=args.rate or crawler.BACKFILL_RATE,
+            start_page=args.start_page,
+            end_page=args.end_page,
+            resume=not args.no_resume,
+        )
+        print(f"[BACKFILL] {source}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
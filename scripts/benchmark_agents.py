@@ -0,0 +1,328 @@
+"""
+에이전트 End-to-End 지연시간 벤치마크
+
+OpenAI / 뉴스 검색 / 보도자료 검색을 로컬 대체 구현(stand-in)으로 바꿔 끼운 뒤
+main.get_response, LegalAgent.run, NewsletterAgent.run_steps 멀티턴 흐름을 실행하고
+단계별 wall time을 JSON으로 저장한다. 벡터 검색은 로컬 Chroma(db/chroma_index)를 그대로 사용한다.
+
+사용 예:
+    python scripts/benchmark_agents.py --repeat 3 --output agent_latency.json
+    python scripts/benchmark_agents.py --baseline agent_latency_prev.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from src.utils import timing
+
+
+EMBEDDING_DIM = 1536
+
+
+# -------------------------
+# 0) Stand-in 구현
+# -------------------------
+def fake_embedding(text):
+    """텍스트 해시 기반의 결정적(deterministic) 임베딩"""
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    values = []
+    while len(values) < EMBEDDING_DIM:
+        seed = hashlib.sha256(seed).digest()
+        values.extend((b - 127.5) / 127.5 for b in seed)
+    return values[:EMBEDDING_DIM]
+
+
+def _response(content=None, tool_calls=None, prompt_tokens=0, completion_tokens=0):
+    message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+    choice = SimpleNamespace(
+        index=0,
+        message=message,
+        finish_reason="tool_calls" if tool_calls else "stop",
+    )
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+    return SimpleNamespace(choices=[choice], usage=usage, model="gpt-4o")
+
+
+def _tool_call(name, arguments):
+    return SimpleNamespace(
+        id=f"call_{name}",
+        type="function",
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments, ensure_ascii=False)),
+    )
+
+
+class FakeCompletions:
+    """
+    chat.completions.create 대체 구현.
+    tools가 주어지면 라우팅 응답(tool call)을, json_object 포맷이면 섹션별 JSON을 반환한다.
+    latency 인자로 LLM 응답 지연을 흉내낸다.
+    """
+
+    def __init__(self, latency=0.0, route=None):
+        self.latency = latency
+        self.route = route
+
+    def create(self, model=None, messages=None, tools=None, tool_choice=None, response_format=None, **kwargs):
+        time.sleep(self.latency)
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages if isinstance(m, dict))
+        prompt_tokens = prompt_chars // 2
+
+        # 라우팅은 tool 결과를 받기 전 첫 호출에서만 (이후 라운드는 최종 답변)
+        if tools and self.route is not None and not any(
+                isinstance(m, dict) and m.get("role") == "tool" for m in messages):
+            name, arguments = self.route
+            return _response(tool_calls=[_tool_call(name, arguments)], prompt_tokens=prompt_tokens, completion_tokens=20)
+
+        if response_format and response_format.get("type") == "json_object":
+            content = json.dumps({
+                "query_summary": "연차휴가 발생 요건 문의",
+                "related_laws": "근로기준법 제60조에 따라 연차휴가가 발생합니다.",
+                "related_cases": "대법원 2017다12345 판결을 참고하시기 바랍니다.",
+                "summary": "기사 요약입니다.",
+                "implication": "※ 시사점입니다.",
+                "question": "Q. 연차휴가는 언제 발생하나요?",
+                "answer": "근로기준법 제60조에 따라 발생합니다.",
+            }, ensure_ascii=False)
+            return _response(content=content, prompt_tokens=prompt_tokens, completion_tokens=len(content) // 2)
+
+        content = "검색된 문서를 바탕으로 답변드립니다. " * 20
+        return _response(content=content, prompt_tokens=prompt_tokens, completion_tokens=len(content) // 2)
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0, route=None):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency=latency, route=route))
+
+
+def fake_search_all_newslist(query, n_news_each=5, **kwargs):
+    return [
+        {
+            "key": f"L{str(k + 1).zfill(4)}",
+            "title": f"{query} 관련 기사 {k + 1}",
+            "link": f"https://www.labortoday.co.kr/news/articleView.html?idxno={k + 1}",
+            "content": f"{query} 관련 기사 본문 요약",
+            "date": datetime.today().strftime("%Y.%m.%d"),
+            "source": "매일노동법률",
+        }
+        for k in range(n_news_each * 2)
+    ]
+
+
+def fake_search_all_text(list_dict):
+    return f"{list_dict['title']} 기사 전문입니다. " * 200
+
+
+def fake_search_press_release(max_pages=None, **kwargs):
+    return [
+        {"title": f"고용노동부 보도자료 {k + 1}", "link": f"https://www.moel.go.kr/news/enews/report/{k + 1}"}
+        for k in range(10 * (max_pages or 1))
+    ]
+
+
+def install_stand_ins(latency, route=None):
+    """모듈 전역에 바인딩된 client / 검색 함수를 stand-in으로 교체"""
+    import main
+    from src.consult import legal_report_builder
+    from src.newsletter import newsletter_builder
+
+    main.client = FakeOpenAI(latency=latency, route=route)
+    legal_report_builder.client = FakeOpenAI(latency=latency)
+    newsletter_builder.client = FakeOpenAI(latency=latency)
+
+    for module in (main, legal_report_builder, newsletter_builder):
+        module.get_embedding = fake_embedding
+
+    newsletter_builder.search_all_newslist = fake_search_all_newslist
+    newsletter_builder.search_all_text = fake_search_all_text
+    newsletter_builder.prefetch_full_texts = lambda articles: None
+    newsletter_builder.search_press_release = fake_search_press_release
+
+
+def prepare_workdir():
+    """
+    에이전트가 cwd 기준으로 templates / db 를 읽고 결과 파일을 쓰므로,
+    저장소의 산출물(newsletter.html 등)을 덮어쓰지 않도록 임시 작업 디렉토리에서 실행
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="agent_bench_"))
+    for name in ("templates", "db"):
+        (workdir / name).symlink_to(BASE_DIR / name, target_is_directory=True)
+
+    # stand-in 호출의 토큰 사용량이 실제 사용량 집계에 섞이지 않도록 분리
+    from src.utils import metering
+    metering.DB_PATH = workdir / "usage.db"
+    return workdir
+
+
+# -------------------------
+# 1) 시나리오
+# -------------------------
+def scenario_get_response(latency):
+    import main
+    from src.consult.legal_report_builder import LegalAgent
+    from src.newsletter.newsletter_builder import NewsletterAgent
+
+    install_stand_ins(latency, route=(
+        "search_multiple_collections",
+        {"collection_names": main.DEFAULT_COLLECTIONS, "query": "연차휴가 발생 요건", "top_k": 5},
+    ))
+    main.get_response(
+        query="연차휴가 발생 요건이 궁금합니다.",
+        legal_agent_instance=LegalAgent(),
+        newsletter_agent_instance=NewsletterAgent(),
+        continuous=False,
+    )
+
+
+def scenario_legal_report(latency):
+    from src.consult.legal_report_builder import LegalAgent
+
+    install_stand_ins(latency)
+    LegalAgent().run("임금항목별 통상임금 해당여부 문의 - 복지포인트, 인센티브")
+
+
+def scenario_newsletter(latency):
+    from src.newsletter.newsletter_builder import NewsletterAgent
+
+    install_stand_ins(latency)
+    agent = NewsletterAgent()
+
+    with timing.stage("newsletter.turn.ask_news_topic"):
+        agent.run_steps("뉴스레터를 작성해줘")
+    with timing.stage("newsletter.turn.set_news_topic"):
+        news = agent.run_steps("산재")
+    with timing.stage("newsletter.turn.news_pick"):
+        agent.choose_news_source(news["content"][0]["title"])
+        agent.run_steps("")
+    with timing.stage("newsletter.turn.set_consult_topic"):
+        consult = agent.run_steps("연차휴가")
+    with timing.stage("newsletter.turn.consult_pick"):
+        first = consult["content"][0]
+        agent.choose_consult_source(first.split("\n")[0][len("Title: "):])
+        policy = agent.run_steps("")
+    with timing.stage("newsletter.turn.policy_pick"):
+        agent.choose_policy(policy["content"][:3])
+    with timing.stage("newsletter.turn.generate"):
+        agent.run_steps("생성")
+
+
+SCENARIOS = {
+    "get_response": scenario_get_response,
+    "legal_report": scenario_legal_report,
+    "newsletter": scenario_newsletter,
+}
+
+
+# -------------------------
+# 2) 실행 / 비교
+# -------------------------
+def run_scenario(name, fn, repeat, latency):
+    runs = []
+    for i in range(repeat):
+        timing.start_recording()
+        start = time.perf_counter()
+        error = None
+        try:
+            fn(latency)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        total = time.perf_counter() - start
+        records = timing.stop_recording()
+        runs.append({
+            "run": i + 1,
+            "total_seconds": round(total, 6),
+            "error": error,
+            "stages": records,
+        })
+        print(f"[BENCH] {name} run {i + 1}/{repeat}: {total:.3f}s" + (f" (error: {error})" if error else ""))
+
+    all_records = [rec for run in runs for rec in run["stages"]]
+    return {
+        "runs": runs,
+        "summary": timing.summarize(all_records),
+        "mean_total_seconds": round(sum(r["total_seconds"] for r in runs) / len(runs), 6),
+    }
+
+
+def compare_with_baseline(results, baseline_path, threshold):
+    """기준 결과 대비 stage 평균 시간이 threshold 비율 이상 느려진 항목 반환"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        base_summary = baseline.get("scenarios", {}).get(name, {}).get("summary", {})
+        for stage_name, cur in scenario["summary"].items():
+            base = base_summary.get(stage_name)
+            if not base or not base["count"] or not base["total"]:
+                continue
+            cur_mean = cur["total"] / cur["count"]
+            base_mean = base["total"] / base["count"]
+            if cur_mean > base_mean * (1 + threshold):
+                regressions.append({
+                    "scenario": name,
+                    "stage": stage_name,
+                    "baseline_mean": round(base_mean, 6),
+                    "current_mean": round(cur_mean, 6),
+                    "ratio": round(cur_mean / base_mean, 3),
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agent end-to-end latency benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stand-in LLM 응답 지연(초)")
+    parser.add_argument("--output", default="agent_latency.json")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀 판단 비율 (0.2 = 20%% 느려짐)")
+    args = parser.parse_args(argv)
+
+    output_path = Path(args.output).resolve()
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+
+    os.chdir(prepare_workdir())
+
+    results = {
+        "created_at": datetime.now().isoformat(),
+        "repeat": args.repeat,
+        "llm_latency": args.llm_latency,
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        results["scenarios"][name] = run_scenario(name, SCENARIOS[name], args.repeat, args.llm_latency)
+
+    if baseline_path:
+        results["regressions"] = compare_with_baseline(results, baseline_path, args.threshold)
+        for reg in results["regressions"]:
+            print(f"[REGRESSION] {reg['scenario']} / {reg['stage']}: "
+                  f"{reg['baseline_mean']:.4f}s -> {reg['current_mean']:.4f}s (x{reg['ratio']})")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"[BENCH] Results saved to {output_path}")
+
+    return 1 if results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+크롤러 HTML 파서 백엔드 벤치마크
+
+저장된 HTML fixture(data/html_fixtures/<kind>_<n>.html)를 설치된 모든 파서 백엔드로 파싱하여
+페이지당 CPU 시간을 비교하고, 기준 백엔드(html5lib)와 추출 결과가 다른 fixture를 보고한다.
+
+사용 예:
+    python scripts/benchmark_parsers.py --save-fixtures 3      # 실제 페이지를 내려받아 fixture로 저장
+    python scripts/benchmark_parsers.py --repeat 20 --output parser_bench.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from src import moel_fastcounsel_crawler as fastcounsel
+from src import moel_iqrs_crawler as iqrs
+from src.newsletter import policy_search
+from src.utils import html_parser
+
+
+FIXTURE_DIR = BASE_DIR / "data" / "html_fixtures"
+REFERENCE_BACKEND = "html5lib"
+
+PARSERS = {
+    "iqrs_list": iqrs.parse_list_page,
+    "iqrs_detail": iqrs.parse_detail,
+    "fastcounsel_list": fastcounsel.parse_list_page,
+    "fastcounsel_detail": fastcounsel.parse_detail,
+    "press_list": policy_search.parse_press_list,
+}
+
+
+# -------------------------
+# 0) Fixture 저장
+# -------------------------
+def _save(kind, index, html):
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    path = FIXTURE_DIR / f"{kind}_{index}.html"
+    path.write_text(html, encoding="utf-8")
+    print(f"[FIXTURE] saved {path.name} ({len(html):,} chars)")
+
+
+def save_fixtures(pages, details_per_page=2):
+    """목록 페이지 pages개와 각 목록의 상세 페이지 일부를 fixture로 저장"""
+    crawlers = [
+        ("iqrs", iqrs, {"verify": False}),
+        ("fastcounsel", fastcounsel, {}),
+    ]
+    for tag, module, request_kwargs in crawlers:
+        detail_index = 0
+        for page in range(1, pages + 1):
+            html = module.fetch_list_page(page)
+            _save(f"{tag}_list", page, html)
+            for item in module.parse_list_page(html)[:details_per_page]:
+                if not item["link"]:
+                    continue
+                resp = requests.get(item["link"], headers=module.HEADERS, timeout=20, **request_kwargs)
+                resp.raise_for_status()
+                detail_index += 1
+                _save(f"{tag}_detail", detail_index, resp.text)
+
+    for page in range(1, pages + 1):
+        resp = requests.get(
+            policy_search.BASE_LIST_URL, headers=policy_search.HEADERS,
+            params={"pageIndex": page}, timeout=30, verify=False,
+        )
+        resp.raise_for_status()
+        _save("press_list", page, resp.text)
+
+
+def load_fixtures():
+    fixtures = []
+    for path in sorted(FIXTURE_DIR.glob("*.html")):
+        kind = path.stem.rsplit("_", 1)[0]
+        if kind in PARSERS:
+            fixtures.append((kind, path.name, path.read_text(encoding="utf-8")))
+    return fixtures
+
+
+# -------------------------
+# 1) 벤치마크
+# -------------------------
+def time_parse(fn, html, backend, repeat):
+    timings = []
+    with html_parser.use_backend(backend):
+        result = fn(html)
+        for _ in range(repeat):
+            start = time.process_time()
+            fn(html)
+            timings.append(time.process_time() - start)
+    return result, statistics.median(timings)
+
+
+def benchmark(fixtures, backends, repeat):
+    reference = REFERENCE_BACKEND if REFERENCE_BACKEND in backends else backends[-1]
+    per_backend = {b: [] for b in backends}
+    mismatches = []
+
+    for kind, name, html in fixtures:
+        outputs = {}
+        for backend in backends:
+            result, seconds = time_parse(PARSERS[kind], html, backend, repeat)
+            outputs[backend] = result
+            per_backend[backend].append(seconds)
+        for backend in backends:
+            if outputs[backend] != outputs[reference]:
+                mismatches.append({"fixture": name, "backend": backend, "reference": reference})
+
+    summary = {}
+    for backend, timings in per_backend.items():
+        summary[backend] = {
+            "pages": len(timings),
+            "mean_ms_per_page": round(statistics.mean(timings) * 1000, 3) if timings else 0.0,
+            "total_ms": round(sum(timings) * 1000, 3),
+        }
+    base = summary[reference]["mean_ms_per_page"]
+    for stats in summary.values():
+        stats["speedup_vs_reference"] = round(base / stats["mean_ms_per_page"], 2) if stats["mean_ms_per_page"] else None
+
+    return {"reference": reference, "backends": summary, "mismatches": mismatches}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved crawler pages")
+    parser.add_argument("--save-fixtures", type=int, default=0, metavar="PAGES",
+                        help="목록 페이지 PAGES개(및 상세 일부)를 내려받아 fixture로 저장")
+    parser.add_argument("--backends", nargs="+", default=None, choices=html_parser.BACKENDS)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    if args.save_fixtures:
+        save_fixtures(args.save_fixtures)
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        print(f"[BENCH] No fixtures in {FIXTURE_DIR}. Run with --save-fixtures first.")
+        return 1
+
+    backends = args.backends or html_parser.available_backends()
+    missing = [b for b in backends if not html_parser.is_available(b)]
+    if missing:
+        print(f"[BENCH] Backends not installed: {', '.join(missing)}")
+        return 1
+
+    report = benchmark(fixtures, backends, args.repeat)
+
+    print(f"[BENCH] {len(fixtures)} fixtures, median of {args.repeat} runs, reference: {report['reference']}")
+    for backend, stats in report["backends"].items():
+        print(f"    {backend:12s} {stats['mean_ms_per_page']:9.3f} ms/page  x{stats['speedup_vs_reference']}")
+    for m in report["mismatches"]:
+        print(f"[WARN] {m['backend']} output differs from {m['reference']} on {m['fixture']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] Report saved to {args.output}")
+
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
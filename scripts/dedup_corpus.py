@@ -0,0 +1,73 @@
+"""
+질의회시 / 빠른상담 기존 글 근접 중복 묶기
+
+수집 시점에는 새 글만 묶이므로(utils/near_dup.py), 이미 저장된 글은 이 스크립트로 한 번 묶은 뒤
+컬렉션을 재구축하면 대표 글만 남은 인덱스가 된다.
+
+사용 예:
+    python scripts/dedup_corpus.py --collections moel_fastcounsel
+    python scripts/dedup_corpus.py --threshold 0.7 --reset     # 기준을 바꿔 처음부터 다시 묶기
+    python scripts/rebuild_collections.py build                # 대표 글만으로 컬렉션 재구축
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-dedup")  # 크롤러 모듈 import용 (API 호출 없음)
+
+from src.rag.rebuild import SOURCES
+from src.utils import db
+from src.utils.near_dup import THRESHOLD, NearDupIndex
+
+
+def dedup_collection(name, threshold=THRESHOLD, reset=False, batch_size=500, show=5):
+    crawler = importlib.import_module(SOURCES[name])
+    crawler.init_db()
+    if reset:
+        with db.transaction(crawler.DB_PATH) as cur:
+            cur.execute(f"DELETE FROM {name}_dups")
+            cur.execute(f"DELETE FROM {name}_lsh")
+
+    index = NearDupIndex(crawler.DB_PATH, name, threshold=threshold, enabled=True)
+    start = time.perf_counter()
+    rows = 0
+    for batch in crawler.iter_vector_records(-1, batch_size=batch_size):
+        index.assign(batch, crawler.dedup_text)
+        rows += len(batch)
+    elapsed = time.perf_counter() - start
+
+    clusters = db.query(
+        crawler.DB_PATH,
+        f"SELECT canonical, COUNT(*) AS members FROM {name}_dups "
+        f"WHERE qnum != canonical GROUP BY canonical ORDER BY members DESC",
+    )
+    folded = sum(c["members"] for c in clusters)
+    print(f"[DEDUP] {name}: checked {rows} rows in {elapsed:.1f}s, "
+          f"{folded} near-duplicates folded into {len(clusters)} clusters (threshold {threshold})")
+    for cluster in clusters[:show]:
+        row = db.query_one(crawler.DB_PATH, f"SELECT title FROM {name} WHERE qnum = ?", (cluster["canonical"],))
+        print(f"  +{cluster['members']:>3}  {cluster['canonical']}  {(row or {}).get('title', '')[:60]}")
+    return {"rows": rows, "clusters": len(clusters), "folded": folded}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate Q&A rows with MinHash/LSH")
+    parser.add_argument("--collections", nargs="+", choices=sorted(SOURCES), default=sorted(SOURCES))
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--reset", action="store_true", help="기존 묶음을 지우고 다시 묶기")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    for name in args.collections:
+        dedup_collection(name, threshold=args.threshold, reset=args.reset, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
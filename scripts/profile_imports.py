@@ -0,0 +1,138 @@
+"""
+app.py cold start import 시간 프로파일링
+
+app.py의 최상위 import 구문을 AST로 추출한 뒤, 새 인터프리터에서 `python -X importtime`으로
+import하여 전체 소요 시간과 가장 무거운 패키지를 보고한다.
+지연 로딩 대상(selenium, chromadb, pypandoc, reportlab, 크롤러 모듈)이 cold start에 포함되면 경고한다.
+
+사용 예:
+    python scripts/profile_imports.py --repeat 5 --top 15
+    python scripts/profile_imports.py --modules main src.newsletter.newsletter_builder --output import_profile.json
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+LAZY_PACKAGES = [
+    "selenium",
+    "chromadb",
+    "pypandoc",
+    "reportlab",
+    "src.moel_iqrs_crawler",
+    "src.moel_fastcounsel_crawler",
+]
+
+
+def app_top_level_imports(path=BASE_DIR / "app.py"):
+    """app.py 최상위(함수 밖)에서 import되는 모듈 목록"""
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def run_importtime(modules):
+    """새 프로세스에서 modules를 import하고 -X importtime 출력을 파싱"""
+    env = {**os.environ, "PYTHONPATH": str(BASE_DIR), "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-profile")}
+    code = "; ".join(f"import {m}" for m in modules) or "pass"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            entries.append({
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "name": name.rstrip(),
+            })
+        except ValueError:
+            continue  # 헤더 행
+
+    # 들여쓰기 없는 행 = 최상위 import
+    top_level = [
+        {"package": e["name"].strip(), "cumulative_ms": e["cumulative_ms"]}
+        for e in entries if not e["name"].startswith("  ", 1)
+    ]
+    loaded = {e["name"].strip() for e in entries}
+    return {
+        "returncode": proc.returncode,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "total_ms": round(sum(e["cumulative_ms"] for e in top_level), 3),
+        "top_level": top_level,
+        "loaded": loaded,
+    }
+
+
+def profile(modules, repeat):
+    # 인터프리터 기동 시 항상 로드되는 모듈(site 등)은 제외
+    startup = {e["package"] for e in run_importtime([])["top_level"]}
+    runs = []
+    for _ in range(repeat):
+        run = run_importtime(modules)
+        run["top_level"] = [e for e in run["top_level"] if e["package"] not in startup]
+        run["total_ms"] = round(sum(e["cumulative_ms"] for e in run["top_level"]), 3)
+        runs.append(run)
+    last = runs[-1]
+    heaviest = sorted(last["top_level"], key=lambda e: e["cumulative_ms"], reverse=True)
+    lazy_violations = sorted(
+        pkg for pkg in LAZY_PACKAGES
+        if any(name == pkg or name.startswith(pkg + ".") for name in last["loaded"])
+    )
+    return {
+        "modules": modules,
+        "runs_ms": [r["total_ms"] for r in runs],
+        "median_ms": round(statistics.median(r["total_ms"] for r in runs), 3),
+        "error": last["error"],
+        "heaviest": heaviest,
+        "eagerly_loaded_heavy_packages": lazy_violations,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile cold-start import time")
+    parser.add_argument("--modules", nargs="+", default=None, help="기본값: app.py 최상위 import")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or app_top_level_imports()
+    report = profile(modules, args.repeat)
+
+    print(f"[IMPORT] modules: {', '.join(modules)}")
+    if report["error"]:
+        print(f"[IMPORT] import failed: {report['error']}")
+    print(f"[IMPORT] cold start import time (median of {args.repeat}): {report['median_ms']:.1f} ms")
+    print(f"[IMPORT] top {args.top} packages by cumulative time:")
+    for e in report["heaviest"][:args.top]:
+        print(f"    {e['cumulative_ms']:10.1f} ms  {e['package']}")
+    if report["eagerly_loaded_heavy_packages"]:
+        print(f"[WARN] loaded at import time: {', '.join(report['eagerly_loaded_heavy_packages'])}")
+
+    if args.output:
+        report["heaviest"] = report["heaviest"][:args.top]
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[IMPORT] Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+양자화 벡터 저장소 만들기 / 벤치마크
+
+build: Chroma 컬렉션(별칭이면 현재 버전, 기간 분할이면 분할마다)을 db/quantized/<컬렉션>에 int8 / float16 저장소로 변환.
+       VECTOR_STORE=quantized 로 실행하면 검색이 이 저장소를 사용한다 (새로 크롤링한 글은 다시 build해야 반영,
+       그 전까지 문서 수가 달라진 컬렉션은 Chroma로 검색).
+bench: 차원(전체 / 축소) x 저장 형식(float32 / float16 / int8) x 재채점 여부별로
+       메모리 / 디스크 크기, 검색 지연, 전체 차원 float32 정확 검색 대비 recall@k 를 비교한다.
+       쿼리는 코퍼스 벡터 일부를 사용하며 자기 자신은 정답과 결과에서 제외한다.
+
+사용 예:
+    python scripts/quantize_collections.py build --dtype int8
+    python scripts/quantize_collections.py bench --collections moel_iqrs --dimensions 1536 512 256 --queries 200
+    python scripts/quantize_collections.py bench --snapshot data/snapshots/moel_iqrs.arrow --output quant_bench.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.rag import quantized_store
+from src.rag.aliases import resolve_collection
+from src.rag.index_config import current_hnsw
+from src.rag.partitions import list_partitions
+
+
+DEFAULT_COLLECTIONS = ["moel_iqrs", "moel_fastcounsel"]
+
+
+def load_collections(name, save_dir):
+    """논리 이름 -> 실제 Chroma 컬렉션 목록 (기간 분할이면 분할마다 하나)"""
+    from chromadb import PersistentClient
+
+    client = PersistentClient(path=str(save_dir))
+    existing = [c.name for c in client.list_collections()]
+    return [client.get_collection(physical) for physical in list_partitions(existing, resolve_collection(name)).values()]
+
+
+def load_batches(args, name):
+    if args.snapshot:
+        from src.rag.snapshot import iter_snapshot
+
+        return list(iter_snapshot(args.snapshot))
+    return [batch for collection in load_collections(name, args.save_dir)
+            for batch in quantized_store.iter_collection_batches(collection)]
+
+
+# -------------------------
+# 1) build
+# -------------------------
+def build(args):
+    from src.embeddings import EMBEDDING_MODEL
+
+    for name in args.collections:
+        for collection in load_collections(name, args.save_dir):
+            quantized_store.build_store(
+                collection.name,
+                quantized_store.iter_collection_batches(collection),
+                dtype=args.dtype,
+                keep_float32=not args.no_rescore,
+                space=current_hnsw(collection).get("space", quantized_store.DEFAULT_SPACE),
+                info={"source": name, "embedding_model": EMBEDDING_MODEL, "source_count": collection.count()},
+            )
+
+
+# -------------------------
+# 2) bench
+# -------------------------
+def exact_top_k(vectors, query_rows, k):
+    truth = []
+    for row in query_rows:
+        scores = vectors @ vectors[row]
+        scores[row] = -np.inf
+        top = np.argpartition(-scores, k)[:k]
+        truth.append(set(top.tolist()))
+    return truth
+
+
+def bench_config(batches, vectors, query_rows, truth, k, dtype, dimensions, rescore):
+    with tempfile.TemporaryDirectory() as root:
+        quantized_store.build_store("bench", iter(batches), dtype=dtype, root=root,
+                                    keep_float32=rescore, dimensions=dimensions)
+        store = quantized_store.QuantizedStore(Path(root) / "bench")
+        latencies, recalls = [], []
+        for row, expected in zip(query_rows, truth):
+            start = time.perf_counter()
+            rows, _ = store.search_ids(vectors[row], top_k=k + 1, rescore=rescore)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found = [r for r in rows.tolist() if r != row][:k]
+            recalls.append(len(expected.intersection(found)) / k)
+        latencies.sort()
+        return {
+            "dtype": dtype,
+            "dimensions": store.codes.shape[1],
+            "rescore": rescore and store.full is not None,
+            "memory_mb": round(store.memory_bytes / 1e6, 2),
+            "disk_mb": round(store.disk_bytes / 1e6, 2),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            f"recall@{k}": round(statistics.mean(recalls), 4),
+        }
+
+
+def bench(args):
+    report = {}
+    names = [Path(args.snapshot).stem] if args.snapshot else args.collections
+    for name in names:
+        batches = load_batches(args, name)
+        vectors = quantized_store.normalize(np.concatenate([b[3] for b in batches]))
+        rng = np.random.default_rng(0)
+        query_rows = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+        truth = exact_top_k(vectors, query_rows, args.top_k)
+        print(f"[BENCH] {name}: {len(vectors)} vectors x {vectors.shape[1]} dims, {len(query_rows)} queries")
+
+        rows = []
+        for dimensions in args.dimensions:
+            dims = dimensions if dimensions < vectors.shape[1] else None
+            for dtype in args.dtypes:
+                for rescore in ([False] if dtype == "float32" else [False, True]):
+                    result = bench_config(batches, vectors, query_rows, truth, args.top_k, dtype, dims, rescore)
+                    rows.append(result)
+                    print("[BENCH] " + "  ".join(f"{k}={v}" for k, v in result.items()))
+        report[name] = rows
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[BENCH] saved {args.output}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or benchmark quantized vector stores")
+    parser.add_argument("command", choices=["build", "bench"])
+    parser.add_argument("--collections", nargs="+", default=DEFAULT_COLLECTIONS)
+    parser.add_argument("--save-dir", default="db/chroma_index")
+    parser.add_argument("--dtype", choices=quantized_store.DTYPES, default="int8")
+    parser.add_argument("--no-rescore", action="store_true", help="재채점용 float32 벡터를 저장하지 않음")
+    parser.add_argument("--snapshot", default=None, help="Chroma 대신 스냅샷 파일로 벤치마크")
+    parser.add_argument("--dimensions", nargs="+", type=int, default=[1536, 512, 256])
+    parser.add_argument("--dtypes", nargs="+", choices=quantized_store.DTYPES, default=list(quantized_store.DTYPES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args)
+    else:
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+질의회시 / 빠른상담 벡터 컬렉션 blue/green 재구축
+
+새 버전 컬렉션을 만든 뒤 별칭을 전환하므로 검색을 멈추지 않고 청크 포맷 / 임베딩 모델을 바꿀 수 있다.
+
+사용 예:
+    python scripts/rebuild_collections.py build --collections moel_iqrs moel_fastcounsel
+    python scripts/rebuild_collections.py build --no-reuse          # 임베딩 모델 변경: 전부 다시 임베딩
+    python scripts/rebuild_collections.py build --no-activate --version 2       # 만들기만 하고
+    python scripts/rebuild_collections.py activate --version 2                   # 나중에 전환
+    python scripts/rebuild_collections.py rollback --collections moel_iqrs
+    python scripts/rebuild_collections.py build --space cosine --m 32 --ef-construction 200   # HNSW 설정 변경
+    python scripts/rebuild_collections.py tune --ef-search 200                              # ef_search만 즉시 변경
+    python scripts/rebuild_collections.py build --partition-by quarter                      # 분기별 기간 분할
+    python scripts/rebuild_collections.py status
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.rag import rebuild
+from src.rag.aliases import load_aliases, resolve_collection, set_alias
+from src.rag.index_config import SPACES, current_hnsw, set_ef_search
+from src.rag.load_index import get_chroma_client
+from src.rag.partitions import PARTITION_BY, SCHEMES, list_partitions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Blue/green rebuild of the vector collections")
+    parser.add_argument("command", choices=["build", "activate", "rollback", "tune", "status"])
+    parser.add_argument("--collections", nargs="+", choices=sorted(rebuild.SOURCES), default=sorted(rebuild.SOURCES))
+    parser.add_argument("--version", default=None, help="버전 접미사 (기본: 현재 시각)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--embed-batch-size", type=int, default=None)
+    parser.add_argument("--no-reuse", action="store_true", help="현재 컬렉션의 임베딩을 재사용하지 않음")
+    parser.add_argument("--no-activate", action="store_true", help="별칭을 전환하지 않음")
+    parser.add_argument("--keep", type=int, default=rebuild.KEEP_VERSIONS)
+    parser.add_argument("--space", choices=SPACES, default=None, help="HNSW 거리 (기본: index_config)")
+    parser.add_argument("--m", type=int, default=None, help="HNSW max_neighbors")
+    parser.add_argument("--ef-construction", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--partition-by", choices=SCHEMES, default=PARTITION_BY, help="새 버전의 기간 분할 단위")
+    args = parser.parse_args(argv)
+    hnsw = {"space": args.space, "max_neighbors": args.m,
+            "ef_construction": args.ef_construction, "ef_search": args.ef_search}
+
+    if args.command == "status":
+        aliases = load_aliases()
+        client = get_chroma_client()
+        existing = [c.name for c in client.list_collections()]
+        for name in args.collections:
+            entry = aliases.get(name, {})
+            current = resolve_collection(name)
+            partitions = list_partitions(existing, current)
+            config = current_hnsw(client.get_collection(next(iter(partitions.values())))) if partitions else None
+            print(f"{name}: current={current} previous={entry.get('previous')} "
+                  f"updated_at={entry.get('updated_at')} hnsw={config} "
+                  f"partitions={[key for key in partitions if key is not None] or None}")
+        return
+
+    for name in args.collections:
+        if args.command == "rollback":
+            rebuild.rollback_collection(name)
+            continue
+        if args.command == "tune":
+            if args.ef_search is None:
+                parser.error("tune requires --ef-search (space / M / ef_construction need a rebuild)")
+            client = get_chroma_client()
+            existing = [c.name for c in client.list_collections()]
+            for physical in list_partitions(existing, resolve_collection(name)).values():
+                collection = client.get_collection(physical)
+                print(f"[REBUILD] {physical} hnsw={set_ef_search(collection, args.ef_search)}")
+            continue
+        if args.command == "activate":
+            if not args.version:
+                parser.error("activate requires --version")
+            target = rebuild.version_name(name, args.version)
+            print(f"[REBUILD] Alias {name}: {set_alias(name, target)} -> {target}")
+            continue
+        stats = rebuild.rebuild_collection(
+            name,
+            version=args.version,
+            batch_size=args.batch_size,
+            embed_batch_size=args.embed_batch_size,
+            reuse_embeddings=not args.no_reuse,
+            activate=not args.no_activate,
+            keep=args.keep,
+            hnsw=hnsw,
+            partition_by=args.partition_by,
+        )
+        print(f"[REBUILD] {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+기록된 trace(logs/traces.jsonl) 중 느린 요청을 span 트리 형태로 출력
+
+사용 예:
+    python scripts/show_traces.py --min-duration 10 --last 5
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.utils.tracing import load_traces
+
+
+def print_tree(spans):
+    children = {}
+    for sp in spans:
+        children.setdefault(sp["parent_id"], []).append(sp)
+
+    def walk(parent_id, depth):
+        for sp in children.get(parent_id, []):
+            attrs = " ".join(f"{k}={v}" for k, v in sp["attributes"].items())
+            status = "" if sp["status"] == "OK" else f" [{sp['error']}]"
+            print(f"{'  ' * depth}{sp['duration']:8.3f}s  {sp['name']}  {attrs}{status}")
+            walk(sp["span_id"], depth + 1)
+
+    walk(None, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show slow traces")
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--min-duration", type=float, default=0.0)
+    parser.add_argument("--last", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.file, min_duration=args.min_duration)
+    for trace_id, spans in list(traces.items())[-args.last:]:
+        print(f"=== trace {trace_id} ===")
+        print_tree(spans)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+질의회시 / 빠른상담 벡터 컬렉션 스냅샷 내보내기 / 적재
+
+임베딩까지 포함한 스냅샷으로 새 환경의 Chroma 컬렉션이나 FAISS 인덱스를 임베딩 API 호출 없이 만든다.
+
+사용 예:
+    python scripts/snapshot_corpus.py export --collections moel_iqrs moel_fastcounsel
+    python scripts/snapshot_corpus.py export --format arrow            # memory-map용 무압축 Arrow IPC
+    python scripts/snapshot_corpus.py load data/snapshots/moel_iqrs.parquet
+    python scripts/snapshot_corpus.py load data/snapshots/moel_iqrs.parquet --target faiss --index-path rag_store/moel_iqrs.index
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-snapshot")  # 임베딩 모델 이름만 사용 (API 호출 없음)
+
+from src.rag import snapshot
+
+
+DEFAULT_COLLECTIONS = ["moel_iqrs", "moel_fastcounsel"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or bulk-load vector collection snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export")
+    export.add_argument("--collections", nargs="+", default=DEFAULT_COLLECTIONS)
+    export.add_argument("--format", choices=sorted(snapshot.FORMATS), default="parquet")
+    export.add_argument("--out-dir", default=str(snapshot.SNAPSHOT_DIR))
+    export.add_argument("--save-dir", default="db/chroma_index")
+    export.add_argument("--batch-size", type=int, default=1000)
+
+    load = sub.add_parser("load")
+    load.add_argument("paths", nargs="+")
+    load.add_argument("--target", choices=["chroma", "faiss"], default="chroma")
+    load.add_argument("--collection", default=None, help="적재할 컬렉션 이름 (기본: 스냅샷에 기록된 이름)")
+    load.add_argument("--save-dir", default="db/chroma_index")
+    load.add_argument("--index-path", default="rag_store/faiss.index")
+    load.add_argument("--metadata-path", default="rag_store/metadata.jsonl")
+    load.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        from src.embeddings import EMBEDDING_MODEL
+
+        for name in args.collections:
+            snapshot.export_snapshot(name, out_dir=args.out_dir, save_dir=args.save_dir, fmt=args.format,
+                                     batch_size=args.batch_size, embedding_model=EMBEDDING_MODEL)
+        return
+
+    for path in args.paths:
+        if args.target == "chroma":
+            snapshot.load_into_chroma(path, collection_name=args.collection, save_dir=args.save_dir,
+                                      batch_size=args.batch_size)
+        else:
+            snapshot.load_into_faiss(path, args.index_path, args.metadata_path, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
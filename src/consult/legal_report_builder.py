@@ -6,18 +6,16 @@ from pathlib import Path
 from jinja2 import Template
 import streamlit as st
 
-# RAG 구성
-from chromadb import PersistentClient
+# RAG 구성 (chromadb, pypandoc은 사용 시점에 로드)
 from src.embeddings import get_embedding
-from src.rag.load_index import load_chroma_collection, search_vector_store, search_multiple_collections
-from src.newsletter.news_searcher import search_all_newslist, search_all_text
-from src.newsletter.policy_search import search_press_release
-from src.newsletter.newsletter_renderer import NewsletterRenderer
-from src.utils.selectors import prompt_user_choice, prompt_user_choice_multiple
-from src.utils.storage import save_html
+from src.rag.aliases import list_collections
+from src.rag.compact import format_documents
+from src.rag.load_index import get_chroma_client, search_multiple_collections
+from src.utils.llm import chat_completion
+from src.utils.metering import metered_agent
+from src.utils.timing import stage
+from src.utils.tracing import traced
 from openai import OpenAI
-import pypandoc
-# pypandoc.download_pandoc()
 
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -54,6 +52,8 @@ class LegalAgent:
             "date": datetime.today().strftime('%Y.%m.%d'),
         }
 
+    @traced("LegalAgent.run")
+    @metered_agent("LegalAgent")
     def run(self, query):
         print("### 의견서 생성 에이전트 시작 ###\n")
         if not query:
@@ -65,8 +65,10 @@ class LegalAgent:
         self.process_sections()
 
         # 2. 렌더링 후 md / pdf 생성
-        self.render_final_md()
-        self.convert_md_to_pdf()
+        with stage("legal.render_md"):
+            self.render_final_md()
+        with stage("legal.pdf_convert"):
+            self.convert_md_to_pdf()
 
         # 3. download 설정
         st.session_state.legal_report_md = "legal_opinion.md"
@@ -146,7 +148,8 @@ class LegalAgent:
             {"role": "user", "content": f"질의사항 전문:\n{self.query}"}
             ]
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "legal.create_ground",
             model="gpt-4o",
             messages=session,
             response_format={"type": "json_object"},
@@ -171,13 +174,9 @@ class LegalAgent:
 
 
     def select_consult_sources_and_crawl(self):
-        try:
-            chroma_client
-        except NameError:
-            load_dir = Path("db/chroma_index")
-            chroma_client = PersistentClient(path=str(load_dir))
-        
-        existing_collections = [col.name for col in chroma_client.list_collections()]
+        chroma_client = get_chroma_client()
+
+        existing_collections = list_collections(chroma_client)
         if not existing_collections:
             result = {"error": "검색 가능한 컬렉션이 없습니다."}
         else:
@@ -193,6 +192,12 @@ class LegalAgent:
 
         print(f"관련 질의를 로드했습니다.\n")
 
+    def related_consult_text(self):
+        """검색 결과를 프롬프트용 평문으로 (최대 3건 작성이므로 상위 3건만 전문, 나머지는 요약)"""
+        if isinstance(self.raw_consult, dict):
+            return self.raw_consult.get("error", "")
+        return format_documents(self.raw_consult, full_text=3, query=self.query)
+
     def create_related_query(self):
         print("\n[관련 질의 생성]")
 
@@ -217,10 +222,11 @@ class LegalAgent:
             {"role": "system", "content": common_directive},
             {"role": "system", "content": directive},
             {"role": "user", "content": f"질의사항 전문:\n{self.query}"},
-            {"role": "user", "content": f"관련질의 검색 결과:\n{self.raw_consult}"}
+            {"role": "user", "content": f"관련질의 검색 결과:\n{self.related_consult_text()}"}
             ]
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "legal.create_related_query",
             model="gpt-4o",
             messages=session,
             )
@@ -259,7 +265,8 @@ class LegalAgent:
             {"role": "user", "content": f"관련질의:\n{self.state["related_query"]}"}
             ]
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "legal.create_answer",
             model="gpt-4o",
             messages=session,
             )
@@ -271,15 +278,19 @@ class LegalAgent:
         print("섹션별 콘텐츠 구성 단계 실행\n")
 
         # 질의 요약 및 관련 법령 구성
-        self.create_ground()
+        with stage("legal.llm.create_ground"):
+            self.create_ground()
 
-        self.select_consult_sources_and_crawl()
+        with stage("legal.consult_search"):
+            self.select_consult_sources_and_crawl()
 
         # 관련 질의 구성
-        self.create_related_query()
+        with stage("legal.llm.create_related_query"):
+            self.create_related_query()
 
         # 정책 영역 구성
-        self.create_answer()
+        with stage("legal.llm.create_answer"):
+            self.create_answer()
 
     # --------------------------------------------------------------------
     def render_final_md(self):
@@ -297,6 +308,7 @@ class LegalAgent:
         print(md_path)
         os.path.exists(md_path)
         """Convert markdown to PDF using pypandoc."""
+        import pypandoc
         pypandoc.convert_file(
             md_path,
             to="pdf",
@@ -1,8 +1,10 @@
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
-import numpy as np
 from openai import OpenAI
+from src.utils.metering import record_usage
+from src.utils.tracing import span
 
 # Explicitly load .env from project root (parent of src)
 env_path = Path(__file__).parent.parent / ".env"
@@ -10,9 +12,49 @@ load_dotenv(dotenv_path=env_path)
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 100
+# Output dimensions (text-embedding-3 `dimensions` parameter); unset = model default (1536).
+# Changing it requires rebuilding the collections (scripts/rebuild_collections.py build --no-reuse).
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+
+def _embedding_options():
+    return {"dimensions": EMBEDDING_DIMENSIONS} if EMBEDDING_DIMENSIONS else {}
+
 def get_embedding(text: str):
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
-    return response.data[0].embedding
\ No newline at end of file
+    with span("embedding.create", model=EMBEDDING_MODEL, input_chars=len(text)) as sp:
+        start = time.perf_counter()
+        response = client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=text,
+            **_embedding_options()
+        )
+        latency = time.perf_counter() - start
+        usage = getattr(response, "usage", None)
+        prompt_tokens = usage.prompt_tokens if usage is not None else 0
+        sp.set_attribute("prompt_tokens", prompt_tokens)
+
+    record_usage("embedding", EMBEDDING_MODEL, "embedding", prompt_tokens=prompt_tokens, latency=latency)
+    return response.data[0].embedding
+
+def get_embeddings(texts, batch_size=EMBEDDING_BATCH_SIZE):
+    """Embed many texts with one request per batch_size inputs (results keep input order)."""
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        batch = list(texts[start:start + batch_size])
+        with span("embedding.create", model=EMBEDDING_MODEL, inputs=len(batch),
+                  input_chars=sum(len(t) for t in batch)) as sp:
+            begin = time.perf_counter()
+            response = client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=batch,
+                **_embedding_options()
+            )
+            latency = time.perf_counter() - begin
+            usage = getattr(response, "usage", None)
+            prompt_tokens = usage.prompt_tokens if usage is not None else 0
+            sp.set_attribute("prompt_tokens", prompt_tokens)
+
+        record_usage("embedding", EMBEDDING_MODEL, "embedding_batch", prompt_tokens=prompt_tokens, latency=latency)
+        embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+    return embeddings
@@ -2,16 +2,27 @@
 고용노동부 빠른인터넷 상담 크롤링 모듈
 """
 
-from bs4 import BeautifulSoup
 import hashlib
-import json
-import requests
-import sqlite3
+from datetime import datetime, timedelta
+import os
 import time
 from pathlib import Path
 
-from src.embeddings import get_embedding
-from src.rag.build_index import add_documents
+from src.embeddings import get_embeddings
+from src.rag.aliases import resolve_collection
+from src.rag.build_index import add_documents, update_metadatas, delete_documents
+from src.rag.partitions import ingest_groups
+from src.utils import db, http
+from src.utils.archive import ArchiveWriter
+from src.utils.backfill import run_backfill
+from src.utils.checkpoint import (
+    committed_jsonl_size, init_checkpoint_table, load_checkpoint, max_qnum_below, qnum_key, write_checkpoint,
+)
+from src.utils.html_parser import parse_html, table_rows
+from src.utils.membership import QnumIndex
+from src.utils.near_dup import NearDupIndex, canonical_sql, duplicate_count_sql, init_tables as init_near_dup_tables
+from src.utils.metering import metered_agent
+from src.utils.tracing import current_span, span, traced
 
 
 # -------------------------
@@ -24,11 +35,25 @@ except NameError:
 
 OUTPUT_JSON = "moel_fastcounsel.jsonl"
 OUTPUT_DB = "moel_fastcounsel.db"
-JSON_PATH = BASE_DIR / "data" / OUTPUT_JSON
+JSON_PATH = BASE_DIR / "data" / OUTPUT_JSON  # 세그먼트 아카이브 도입 이전의 단일 JSONL (첫 실행 시 이관)
+ARCHIVE_DIR = BASE_DIR / "data" / "archive" / "moel_fastcounsel"
 DB_PATH = BASE_DIR / "db"/ OUTPUT_DB
+CHECKPOINT_NAME = "moel_fastcounsel"
+GAP_CHECKPOINT_NAME = "moel_fastcounsel:gap"  # max_pages에서 멈춰 남은 미수집 구간 (page부터, last_qnum = 구간 하한)
+BACKFILL_CHECKPOINT_NAME = "moel_fastcounsel:backfill"
+REFRESH_CHECKPOINT_NAME = "moel_fastcounsel:refresh"
+BACKFILL_WORKERS = int(os.getenv("CRAWL_BACKFILL_WORKERS", "8"))
+BACKFILL_RATE = float(os.getenv("CRAWL_RATE_LIMIT", "4"))  # 초당 요청 수 (호스트 전역)
+COMPLETE_STATE = "답변완료"
+STALE_DAYS = int(os.getenv("FASTCOUNSEL_STALE_DAYS", "30"))  # 답변완료 글 재확인 주기
+PENDING_RECHECK_HOURS = int(os.getenv("FASTCOUNSEL_PENDING_RECHECK_HOURS", "6"))  # 답변대기 글 재확인 주기
+MAX_REFRESH_FAILURES = int(os.getenv("FASTCOUNSEL_MAX_REFRESH_FAILURES", "3"))  # 연속 실패(삭제된 글 등) 시 재확인 중단
+REFRESH_LIMIT = int(os.getenv("FASTCOUNSEL_REFRESH_LIMIT", "50"))  # 1회 재확인 최대 건수
 
 BASE_LIST_URL = "https://www.moel.go.kr/minwon/fastcounsel/fastcounselList.do"
 BASE_URL = "https://www.moel.go.kr"
+# 상세 페이지(질의/답변 본문)는 게시 후 거의 바뀌지 않으므로 디스크 캐시를 길게 재사용
+DETAIL_CACHE_TTL = 7 * 24 * 60 * 60
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 }
@@ -38,32 +63,51 @@ HEADERS = {
 # 0-1) DB 초기화
 # -------------------------
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS moel_fastcounsel (
-            qnum TEXT PRIMARY KEY,
-            title TEXT,
-            question TEXT,
-            answer TEXT,
-            link TEXT,
-            state TEXT,
-            date TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with db.transaction(DB_PATH) as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS moel_fastcounsel (
+                qnum TEXT PRIMARY KEY,
+                title TEXT,
+                question TEXT,
+                answer TEXT,
+                link TEXT,
+                state TEXT,
+                date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                content_hash TEXT,
+                checked_at TEXT,
+                refresh_failures INTEGER DEFAULT 0
+            )
+        """)
+        # 이전 스키마 마이그레이션: 변경 감지용 컬럼 추가
+        columns = db.table_columns(cur, "moel_fastcounsel")
+        for column in ("content_hash", "checked_at"):
+            if column not in columns:
+                cur.execute(f"ALTER TABLE moel_fastcounsel ADD COLUMN {column} TEXT")
+        if "refresh_failures" not in columns:
+            cur.execute("ALTER TABLE moel_fastcounsel ADD COLUMN refresh_failures INTEGER DEFAULT 0")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_moel_fastcounsel_state ON moel_fastcounsel (state, checked_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_moel_fastcounsel_date ON moel_fastcounsel (date)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_moel_fastcounsel_created_at ON moel_fastcounsel (created_at)")
+        init_checkpoint_table(cur)
+        init_near_dup_tables(cur, "moel_fastcounsel")
 
 # -------------------------
 # 0-2) DB 저장
 # -------------------------
-def save_to_db(items):
-    if not items:
+def content_hash(item):
+    text = f"{item['title']}\n{item['question']}\n{item['answer']}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def save_to_db(items, checkpoint=None):
+    """
+    답변대기 글도 state와 함께 저장하고, 이미 있는 qnum은 최신 내용으로 갱신(upsert).
+    checkpoint(dict)가 주어지면 레코드와 같은 트랜잭션으로 크롤링 체크포인트를 기록
+    """
+    if not items and checkpoint is None:
         return
     
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    checked_at = datetime.now().isoformat(timespec="seconds")
     
     data_to_insert = [
         (
@@ -74,80 +118,195 @@ def save_to_db(items):
             item["link"],
             item["state"],
             item["date"],
+            content_hash(item),
+            checked_at,
         )
-        for item in items if item["state"] == "답변완료"
+        for item in items
         ]
         
-    cur.executemany("""
-        INSERT OR IGNORE INTO moel_fastcounsel (qnum, title, question, answer, link, state, date)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, data_to_insert)
+    with db.transaction(DB_PATH) as cur:
+        cur.executemany("""
+            INSERT INTO moel_fastcounsel (qnum, title, question, answer, link, state, date, content_hash, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(qnum) DO UPDATE SET
+                title = excluded.title,
+                question = excluded.question,
+                answer = excluded.answer,
+                link = excluded.link,
+                state = excluded.state,
+                date = excluded.date,
+                content_hash = excluded.content_hash,
+                checked_at = excluded.checked_at,
+                refresh_failures = 0
+        """, data_to_insert)
+        if checkpoint is not None:
+            write_checkpoint(cur, **checkpoint)
     
-    conn.commit()
-    conn.close()
-    print(f"[DB] Saved {len(data_to_insert)} items to {DB_PATH}")
+    if data_to_insert:
+        print(f"[DB] Saved {len(data_to_insert)} items to {DB_PATH}")
+
+def mark_checked(items):
+    """재확인했지만 바뀌지 않은 글: 확인 시각과 (이전 스키마에서 비어 있던) content_hash만 갱신"""
+    if not items:
+        return
+    checked_at = datetime.now().isoformat(timespec="seconds")
+    with db.transaction(DB_PATH) as cur:
+        cur.executemany(
+            "UPDATE moel_fastcounsel SET checked_at = ?, content_hash = ?, refresh_failures = 0 WHERE qnum = ?",
+            [(checked_at, content_hash(item), item["qnum"]) for item in items],
+        )
+
+def mark_failed(items):
+    """재확인에 실패한 글: 확인 시각을 갱신해 대기열 뒤로 보내고 실패 횟수 증가 (MAX_REFRESH_FAILURES번이면 제외)"""
+    if not items:
+        return
+    checked_at = datetime.now().isoformat(timespec="seconds")
+    with db.transaction(DB_PATH) as cur:
+        cur.executemany(
+            "UPDATE moel_fastcounsel SET checked_at = ?, refresh_failures = refresh_failures + 1 WHERE qnum = ?",
+            [(checked_at, item["qnum"]) for item in items],
+        )
 
 # -------------------------
 # 0-3) 임베딩 처리
 # -------------------------
-def process_embeddings(items):
+def vector_id(qnum):
+    # 기존 컬렉션의 순번 id("0", "1", ...)와 겹치지 않도록 접두어 사용
+    return f"fastcounsel-{qnum}"
+
+def vector_metadata(item):
+    return {
+        "qnum": str(item["qnum"]),
+        "date": item["date"] or "",
+        "title": item["title"] or "",
+        "link": item["link"] or "",
+        "duplicates": int(item.get("duplicates") or 0),  # 이 글에 묶인 근접 중복 글 수 (utils/near_dup.py)
+    }
+
+def document_text(item):
+    """벡터 컬렉션에 저장하는 문서 포맷 (증분 임베딩과 컬렉션 재구축이 같은 포맷을 사용)"""
+    return f"Title: {item['title']}\nQ: {item['question']}\nA: {item['answer']}\nLink: {item['link']}"
+
+def dedup_text(item):
+    """근접 중복 판정에 쓰는 텍스트: 제목 + 질문 (답변의 정형 문구로 다른 질문이 묶이지 않도록 답변 제외)"""
+    return f"{item['title']}\n{item['question']}"
+
+def get_near_dups():
+    return NearDupIndex(DB_PATH, "moel_fastcounsel")
+
+def update_duplicate_counts(qnums):
+    """새 근접 중복이 묶인 기존 대표 글 벡터의 duplicates 메타데이터 갱신 (재임베딩 없음)"""
+    if not qnums:
+        return
+    rows = [
+        row
+        for batch in iter_saved_records(columns=f"*, {duplicate_count_sql('moel_fastcounsel')}",
+                                        where=f"qnum IN ({','.join('?' * len(qnums))})", params=tuple(qnums))
+        for row in batch
+    ]
+    groups = ingest_groups(resolve_collection("moel_fastcounsel"), rows)
+    for collection_name, group in groups.items():
+        update_metadatas([vector_id(row["qnum"]) for row in group], [vector_metadata(row) for row in group],
+                         collection_name=collection_name)
+
+@metered_agent("crawler.fastcounsel")
+def process_embeddings(items, replace=False):
+    """
+    답변완료 글만 임베딩. replace=True면(내용 변경) 같은 Link를 가진 이전 벡터
+    (qnum id 도입 전 순번 id로 저장된 것 포함)를 지운 뒤 qnum id로 upsert.
+    근접 중복 글은 대표 글에 묶고(duplicates 증가) 대표 글만 임베딩한다 (묶음은 처음 답변완료로 본 시점에 정해짐)
+    """
+    items = [item for item in items if item["state"] == COMPLETE_STATE]
+    items, attached = get_near_dups().split(items, dedup_text)
+    update_duplicate_counts(attached)
     if not items:
         return
 
-    # 텍스트 청크 생성
-    chunks = []
-    for item in items:
-        q = item["question"]
-        a = item["answer"]
-        title = item["title"]
-        link = item["link"]
-        
-        # 문서 포맷팅
-        text = f"Title: {title}\nQ: {q}\nA: {a}\nLink: {link}"
-        chunks.append(text)
-    
-    if chunks:
-        print(f"[Embedding] Processing {len(chunks)} chunks...")
-        add_documents(chunks, get_embedding, collection_name="moel_fastcounsel")
-        print("[Embedding] Done.")
+    # date 기준 기간 분할 컬렉션별로 저장 (글의 date는 바뀌지 않으므로 이전 벡터도 같은 컬렉션에 있음)
+    print(f"[Embedding] Processing {len(items)} chunks...")
+    groups = ingest_groups(resolve_collection("moel_fastcounsel"), items)
+    for collection_name, group in groups.items():
+        if replace:
+            for item in group:
+                link_line = f"Link: {item['link']}"
+                delete_documents(
+                    link_line,
+                    predicate=lambda document, link_line=link_line: document.endswith(link_line),
+                    keep_ids=(vector_id(item["qnum"]),),
+                    collection_name=collection_name,
+                )
+
+        # 페이지의 글을 한 번의 배치 요청으로 임베딩 (글마다 API를 호출하지 않음)
+        documents = [document_text(item) for item in group]
+        add_documents(
+            documents, None, collection_name=collection_name,
+            ids=[vector_id(item["qnum"]) for item in group],
+            metadatas=[vector_metadata(item) for item in group],
+            embeddings=get_embeddings(documents),
+        )
+    print("[Embedding] Done.")
 
 
 # -------------------------
 # 1) 기존 보유 qnum 불러오기
 # -------------------------
-def get_existing_qnums():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT qnum FROM moel_fastcounsel")
-    rows = cur.fetchall()
-    conn.close()
-    return set(row[0] for row in rows)
+def get_known_qnums():
+    """
+    저장된 모든 qnum(답변대기 포함)의 membership 인덱스 (워터마크 -> bloom filter -> PK 조회).
+    qnum 전체를 set으로 메모리에 올리지 않는다.
+    """
+    return QnumIndex(DB_PATH, "moel_fastcounsel")
+
+def get_existing_qnums(known=None):
+    """답변완료로 저장된 qnum (답변대기 글은 답변이 달리면 다시 수집해야 하므로 제외)"""
+    return (known or get_known_qnums()).restrict("state = ?", (COMPLETE_STATE,))
+
+def get_saved_state(qnum):
+    row = db.query_one(DB_PATH, "SELECT state FROM moel_fastcounsel WHERE qnum = ?", (qnum,))
+    return row["state"] if row else None
+
+def iter_saved_records(columns="*", where="", params=(), batch_size=1000):
+    """저장된 레코드를 batch_size 행씩 스트리밍 (전체를 한 번에 메모리에 올리지 않음)"""
+    return db.iter_batches(DB_PATH, "moel_fastcounsel", columns=columns, where=where, params=params,
+                           batch_size=batch_size)
+
+def iter_vector_records(after_rowid=-1, batch_size=1000):
+    """
+    벡터 컬렉션에 들어가는 레코드 = 답변완료 글 중 근접 중복 대표 글
+    (컬렉션 재구축용, rid = rowid, duplicates = 묶인 글 수)
+    """
+    return iter_saved_records(columns=f"rowid AS rid, *, {duplicate_count_sql('moel_fastcounsel')}",
+                              where=f"rowid > ? AND state = ? AND {canonical_sql('moel_fastcounsel')}",
+                              params=(after_rowid, COMPLETE_STATE), batch_size=batch_size)
 
 # -------------------------
 # 2) 리스트 페이지 XHR 요청 (HTML 예시)
 # -------------------------
 def fetch_list_page(page_index):
     params = {"pageIndex": page_index}
-    resp = requests.get(BASE_LIST_URL, headers=HEADERS, params=params, timeout=30)
-    resp.raise_for_status()
+    with span("crawler.fastcounsel.list_page", page=page_index) as sp:
+        resp = http.get(BASE_LIST_URL, headers=HEADERS, params=params, timeout=30)
+        resp.raise_for_status()
+        sp.set_attribute("bytes", len(resp.content))
     return resp.text
 
 # -------------------------
 # 3) 리스트 파싱 (HTML)
 # -------------------------
 def parse_list_page(html):
-    soup = BeautifulSoup(html, "html5lib")
-    rows = soup.select("table tbody tr")
+    rows = table_rows(parse_html(html))
     items = []
 
     for tr in rows:
         tds = tr.select("td")
-        qnum = tds[0].get_text(strip=True)
-        title = tds[1].get_text(strip=True)
-        link_tag = tds[1].find("a")
-        link = BASE_URL + link_tag["href"] if link_tag else ""
-        date = tds[2].get_text(strip=True)
-        state = tds[3].get_text(strip=True) if len(tds) > 3 else "미완료"
+        if len(tds) < 3:  # thead 등 td 없는 행
+            continue
+        qnum = tds[0].text()
+        title = tds[1].text()
+        link_tag = tds[1].select_one("a")
+        link = BASE_URL + link_tag.attr("href") if link_tag else ""
+        date = tds[2].text()
+        state = tds[3].text() if len(tds) > 3 else "미완료"
 
         items.append({
             "qnum": qnum,
@@ -161,62 +320,121 @@ def parse_list_page(html):
 # -------------------------
 # 5) 상세 페이지 크롤링
 # -------------------------
-def fetch_detail(link):
+def parse_detail(html):
+    """상세 페이지의 첫 번째 dl(질문) / 두 번째 dl(답변)의 첫 dd 본문 추출"""
+    dls = parse_html(html).select("dl")
+    if not dls:
+        return {"question": "", "answer": ""}
+
+    dd_q = dls[0].select("dd")
+    dd_a = dls[1].select("dd") if len(dls) > 1 else []
+
+    question = dd_q[0].text() if dd_q else ""
+    answer = dd_a[0].text() if dd_a else ""
+    return {"question": question, "answer": answer}
+
+@traced("crawler.fastcounsel.detail")
+def fetch_detail(link, ttl=DETAIL_CACHE_TTL, cache=True):
     try:
-        resp = requests.get(link, headers=HEADERS, timeout=20)
+        resp = http.get(link, headers=HEADERS, timeout=20, ttl=ttl, cache=cache)
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html5lib")
-        dls = soup.select("dl")
-
-        dls = soup.select("dl")
-        if not dls:
-            return {"question": "", "answer": ""}
-
-        # 모든 dl에서 dd만 추출
-        dd_q = dls[0].select("dd") if len(dls) > 0 else []
-        dd_a = dls[1].select("dd") if len(dls) > 1 else []
-        # print("dls: ", len(dls))
-        # print("dls0: ", dls[0], "\n", "dls1: ", dls[1])
-        # print("dls0: ",(dls[0].select("dd")[0]))
-        # print("dls1: ",(dls[1].select("dd")[0]))
-        # print("dd_elements: ", len(dd_elements))
-        # for dd in dls[0].select("dd"):
-        #     print(dd)
-        # for dd in dls[1].select("dd"):
-        #     print(dd)
-        
-        question = dd_q[0].get_text(strip=True) if len(dd_q) > 0 else ""
-        answer = dd_a[0].get_text(strip=True) if len(dd_a) > 0 else ""
-        # print('q:', question)
-        # print('a:', answer)
-
-        return {"question": question, "answer": answer}
+        current_span().set_attributes(url=link, bytes=len(resp.content))
+        return parse_detail(resp.text)
     except Exception as e:
         return {"question": "[ERROR]", "answer": str(e)}
 
+def detail_ttl(saved_state):
+    """
+    상세 페이지 캐시 ttl. 답변대기로 저장된 글은 캐시에 답변 전 페이지가 남아 있을 수 있으므로
+    답변완료로 바뀐 시점에는 반드시 다시 받는다
+    """
+    return 0 if saved_state is not None and saved_state != COMPLETE_STATE else DETAIL_CACHE_TTL
+
+def make_record(item, detail):
+    return {
+        "qnum": item["qnum"],
+        "title": item["title"],
+        "question": detail.get("question", ""),
+        "answer": detail.get("answer", ""),
+        "link": item["link"],
+        "state": item["state"],
+        "date": item["date"]
+    }
+
 # -------------------------
-# 6) 증분 merge
+# 6) 원문 아카이브 (세그먼트 JSONL)
 # -------------------------
-def append_jsonl(record):
-    with open(JSON_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+_archive = None
+
+def get_archive():
+    """크롤링 동안 재사용하는 버퍼 아카이브 writer (기존 단일 JSONL은 첫 세그먼트로 이관)"""
+    global _archive
+    if _archive is None:
+        _archive = ArchiveWriter(ARCHIVE_DIR, "moel_fastcounsel")
+        with _archive.locked():
+            if _archive.import_legacy(JSON_PATH):
+                print(f"[ARCHIVE] Imported {JSON_PATH.name} as the first archive segment")
+    return _archive
+
+def open_archive():
+    """크롤링 시작 시 호출: 마지막 커밋 이후에 덧붙은 기록 제거"""
+    archive = get_archive()
+    # 잠금 안에서는 다른 writer의 커밋되지 않은 기록이 없으므로, 커밋 오프셋 이후는 중단된 실행의 잔여분
+    with archive.locked():
+        if archive.truncate_to(committed_jsonl_size(DB_PATH)):
+            print(f"[RESUME] Truncated uncommitted records in {archive.active['file']}")
+    return archive
+
+def close_archive():
+    global _archive
+    if _archive is not None:
+        _archive.close()
+        _archive = None
 
 # -------------------------
-# 7) 메인
+# 7) 배치 커밋 / 체크포인트
 # -------------------------
-def main(max_pages=None, min_consecutive_complete=50):
-    init_db() # DB 초기화
-    
-    existing_qnums = get_existing_qnums()
-    print(f"[INFO] Existing records in DB: {len(existing_qnums)}")
-    all_new = []
+def commit_batch(records, page_index, last_qnum, status="running", name=CHECKPOINT_NAME, replace=False):
+    """
+    한 페이지 분량의 신규 레코드를 벡터 인덱스 -> JSONL -> DB(+체크포인트) 순으로 반영.
+    DB 트랜잭션이 커밋되어야 배치가 완료된 것으로 보며, 그 전에 중단되면
+    벡터는 같은 qnum id로 다시 upsert되고 아카이브는 재개 시 jsonl_size(논리 오프셋)로 잘려 세 저장소가 맞춰진다.
+    세그먼트 봉인(압축)은 DB 커밋 이후에만 일어난다.
+    """
+    archive = get_archive()
+    if records:
+        process_embeddings(records, replace=replace)
+    # 다른 writer(앱 / CLI 백필)와 아카이브를 공유하므로 JSONL 쓰기 ~ 체크포인트 오프셋 기록 ~ commit을 한 잠금 안에서
+    with archive.locked():
+        archive.write_many([record for record in records if record["state"] == COMPLETE_STATE])
+        save_to_db(records, checkpoint={
+            "name": name,
+            "status": status,
+            "page": page_index,
+            "last_qnum": last_qnum,
+            "jsonl_size": archive.position(),
+        })
+        archive.commit()
 
-    page_index = 1
+# -------------------------
+# 8) 메인
+# -------------------------
+def crawl_pages(page_index, known_qnums, existing_qnums, crawled_qnums, max_pages=None, min_consecutive_complete=50,
+                skip_from=None, last_qnum=None, gap_floor=None):
+    """
+    page_index부터 목록을 내려가며 신규 / 답변완료로 바뀐 글을 페이지 단위로 커밋
+    -> (stop_flag, 다음 page_index, 크롤링한 페이지 수, 신규 답변완료 수, 마지막 qnum)
+    skip_from: 이 번호 이상의 기존 글은 건너뛰고(이미 수집한 구간) 그보다 오래된 기존 글에서 종료 조건을 적용
+    gap_floor: 미수집 구간(gap)을 이어받는 중이면 구간 하한 qnum. 체크포인트를 GAP_CHECKPOINT_NAME에 status=gap으로 기록
+    stop_flag: 기존 데이터(또는 목록 끝)에 도달했으면 True, max_pages에서 멈췄으면 False
+    """
+    pages_crawled = 0
+    total_new = 0
     stop_flag = False
     consecutive_complete_state = 0
 
     while True:
-        if max_pages is not None and page_index > max_pages:
+        if max_pages is not None and pages_crawled >= max_pages:
             break
 
         html = fetch_list_page(page_index)
@@ -224,53 +442,241 @@ def main(max_pages=None, min_consecutive_complete=50):
 
         # Stop if no more items on the page
         if not page_items:
+            stop_flag = True
             break
 
+        page_new = []
         for item in page_items:
             qnum = item["qnum"]
             state = item["state"]
 
-            if state == "답변완료":
+            if qnum in crawled_qnums:
+                continue  # 크롤링 도중 신규 글로 목록이 밀려 다시 보이는 글
+
+            if state == COMPLETE_STATE:
                 consecutive_complete_state += 1
             else:
                 consecutive_complete_state = 0
-            # print(consecutive_complete_state, qnum in existing_qnums)
-            # 기존 데이터에 item이 존재하고, 크롤링 대상이 연속으로 설정한 숫자 이상 답변완료인 경우 크롤링 중단
-            if (qnum in existing_qnums) & (consecutive_complete_state >= min_consecutive_complete):
-                # ★ 증분 크롤링 종료 지점
-                print(f"[STOP] Reached existing qnum {qnum}.\n       Reached {consecutive_complete_state} consecutive [답변완료] state.\n       Stopping incremental crawl.")
-                stop_flag = True
-                break
-
-            detail = fetch_detail(item["link"])
-
-            record = {
-                "qnum": item["qnum"],
-                "title": item["title"],
-                "question": detail.get("question", ""),
-                "answer": detail.get("answer", ""),
-                "link": item["link"],
-                "state": item["state"],
-                "date": item["date"]
-            }
-
-            if (record["state"] == "답변완료") and (qnum not in existing_qnums):
-                append_jsonl(record)
-                all_new.append(record)
-        
+
+            if qnum in existing_qnums:
+                # 재개 중에는 이미 커밋된(마지막 qnum 이후) 글은 건너뜀
+                key = qnum_key(qnum)
+                if skip_from is not None and key is not None and key >= skip_from:
+                    continue
+                # 기존 데이터에 item이 존재하고, 크롤링 대상이 연속으로 설정한 숫자 이상 답변완료인 경우 크롤링 중단
+                if consecutive_complete_state >= min_consecutive_complete:
+                    # ★ 증분 크롤링 종료 지점
+                    print(f"[STOP] Reached existing qnum {qnum}.\n       Reached {consecutive_complete_state} consecutive [답변완료] state.\n       Stopping incremental crawl.")
+                    stop_flag = True
+                    break
+                continue
+
+            if state != COMPLETE_STATE:
+                # 답변대기 글은 목록 정보만 저장해 두고, 답변완료로 바뀌면 다시 수집
+                if qnum not in known_qnums:
+                    page_new.append(make_record(item, {}))
+                    crawled_qnums.add(qnum)
+                continue
+
+            saved_state = get_saved_state(qnum) if qnum in known_qnums else None
+            if saved_state is not None:
+                print(f"[UPDATE] qnum {qnum}: {saved_state} -> {state}")
+
+            record = make_record(item, fetch_detail(item["link"], ttl=detail_ttl(saved_state)))
+
+            page_new.append(record)
+            crawled_qnums.add(qnum)
+            last_qnum = qnum
+
+        if gap_floor is None:
+            commit_batch(page_new, page_index, last_qnum)
+        else:
+            commit_batch(page_new, page_index, gap_floor, status="gap", name=GAP_CHECKPOINT_NAME)
+        total_new += sum(1 for record in page_new if record["state"] == COMPLETE_STATE)
+        pages_crawled += 1
+
         if stop_flag:
             break
 
-        print(f"[INFO] Page {page_index} crawled, new & complete: {len(all_new)} items")
+        print(f"[INFO] Page {page_index} crawled, new & complete: {total_new} items")
         page_index += 1
         time.sleep(0.2)
+
+    return stop_flag, page_index, pages_crawled, total_new, last_qnum
+
+def main(max_pages=None, min_consecutive_complete=50, resume=True, refresh_limit=REFRESH_LIMIT):
+    """
+    max_pages: 이번 실행에서 크롤링할 최대 페이지 수
+      여기서 멈추면 읽지 못한 구간을 gap 체크포인트로 남기고, 다음 실행은 1페이지부터 신규 글을 받은 뒤 그 구간을 이어서 수집
+    resume: 이전 실행이 중단되었으면(체크포인트 status=running) 마지막 커밋 페이지부터 재개
+    refresh_limit: 크롤링 후 재확인할 답변대기 / 오래된 글 수 (0이면 생략)
+    """
+    init_db() # DB 초기화
     
-    # DB 및 임베딩 저장 (신규 데이터만)
-    if all_new:
-        save_to_db(all_new)
-        process_embeddings(all_new)
+    known_qnums = get_known_qnums()
+    existing_qnums = get_existing_qnums(known_qnums)
+    print(f"[INFO] Existing records in DB: {len(existing_qnums)} (pending: {len(known_qnums) - len(existing_qnums)})")
+
+    open_archive()
+
+    checkpoint = load_checkpoint(DB_PATH, CHECKPOINT_NAME)
+    gap = load_checkpoint(DB_PATH, GAP_CHECKPOINT_NAME)
+    if gap is not None and gap["status"] != "gap":
+        gap = None
+
+    resume_qnum = None
+    last_qnum = None
+    if resume and checkpoint and checkpoint["status"] == "running":
+        # 중단 이후 신규 글이 올라오면 목록이 밀리므로 마지막 커밋 페이지부터 다시 확인
+        page_index = max(1, checkpoint["page"] or 1)
+        last_qnum = checkpoint["last_qnum"]
+        resume_qnum = qnum_key(last_qnum)
+        print(f"[RESUME] Resuming from page {page_index} (last qnum {last_qnum})")
+    else:
+        page_index = 1
+
+    crawled_qnums = set()
+    stop_flag, page_index, pages_crawled, total_new, last_qnum = crawl_pages(
+        page_index, known_qnums, existing_qnums, crawled_qnums, max_pages, min_consecutive_complete,
+        skip_from=resume_qnum, last_qnum=last_qnum,
+    )
+    # 이번 증분 크롤링은 끝남 (running은 중단된 실행만 남아 그 페이지부터 재개)
+    commit_batch([], page_index, last_qnum, status="done")
+
+    if not stop_flag:
+        # max_pages에서 멈춤: 읽지 못한 구간(page_index ~ 구간 하한)을 gap으로 남긴다.
+        # 이전 gap이 남아 있으면 그 하한을 그대로 써서 두 구간을 하나로 합친다 (사이의 수집된 글은 건너뜀)
+        floor = gap["last_qnum"] if gap else max_qnum_below(
+            DB_PATH, "moel_fastcounsel", last_qnum, where="state = ?", params=(COMPLETE_STATE,)
+        )
+        commit_batch([], page_index, floor, status="gap", name=GAP_CHECKPOINT_NAME)
+        print(f"[GAP] Stopped at max_pages. Next run continues from page {page_index} down to qnum {floor}.")
+    elif gap and (max_pages is None or pages_crawled < max_pages):
+        # 신규 글을 다 받았으면 남은 페이지 수만큼 이전 실행의 미수집 구간을 이어서 수집
+        floor = gap["last_qnum"]
+        print(f"[GAP] Continuing unfinished range from page {gap['page']} down to qnum {floor}")
+        gap_done, gap_page, _, gap_new, _ = crawl_pages(
+            max(1, gap["page"] or 1), known_qnums, existing_qnums, crawled_qnums,
+            None if max_pages is None else max_pages - pages_crawled, min_consecutive_complete,
+            skip_from=(qnum_key(floor) or -1) + 1, gap_floor=floor,
+        )
+        total_new += gap_new
+        if gap_done:
+            commit_batch([], gap_page, floor, status="done", name=GAP_CHECKPOINT_NAME)
+            print("[GAP] Unfinished range completed.")
+
+    print(f"[DONE] 신규 {total_new}개 저장 완료.")
+
+    if refresh_limit:
+        refresh_changed(limit=refresh_limit)
+    close_archive()
+
+
+# -------------------------
+# 9) 변경 감지 (답변대기 / 오래된 글 재확인)
+# -------------------------
+def get_refresh_candidates(limit=REFRESH_LIMIT, stale_days=STALE_DAYS, pending_hours=PENDING_RECHECK_HOURS):
+    """
+    재확인 주기가 지난 글(답변대기: pending_hours, 답변완료: stale_days)을 마지막 확인이 오래된 순으로.
+    확인한 글은 대기열 뒤로 가므로 답변대기 글이 많아도 오래된 답변완료 글이 밀려나지 않는다.
+    """
+    now = datetime.now()
+    stale_cutoff = (now - timedelta(days=stale_days)).isoformat(timespec="seconds")
+    pending_cutoff = (now - timedelta(hours=pending_hours)).isoformat(timespec="seconds")
+    return db.query(DB_PATH, """
+        SELECT qnum, title, question, answer, link, state, date, content_hash
+        FROM moel_fastcounsel
+        WHERE COALESCE(refresh_failures, 0) < ?
+          AND (checked_at IS NULL OR checked_at < ? OR (state != ? AND checked_at < ?))
+        ORDER BY COALESCE(checked_at, '')
+        LIMIT ?
+    """, (MAX_REFRESH_FAILURES, stale_cutoff, COMPLETE_STATE, pending_cutoff, limit))
+
+def refresh_changed(limit=REFRESH_LIMIT, stale_days=STALE_DAYS):
+    """
+    답변대기 / 오래된 글의 상세 페이지를 다시 받아(조건부 요청) content_hash가 바뀐 글만
+    SQLite 행과 Chroma 벡터(같은 qnum id)를 갱신한다.
+    """
+    init_db()
+    open_archive()
+
+    candidates = get_refresh_candidates(limit, stale_days)
+    changed, unchanged, failed = [], [], []
+    for row in candidates:
+        # 답변대기 글의 상세 페이지는 캐시에 남기지 않는다 (답변완료 후 수집 시 답변 전 페이지가 재사용되지 않도록)
+        detail = fetch_detail(row["link"], ttl=0, cache=row["state"] == COMPLETE_STATE)
+        if detail.get("question") == "[ERROR]":
+            failed.append(row)  # 다음 주기에 다시 시도, 계속 실패하면(삭제된 글 등) 대기열에서 제외
+            continue
+
+        record = make_record(row, detail)
+        if record["state"] != COMPLETE_STATE and record["answer"]:
+            record["state"] = COMPLETE_STATE  # 목록을 거치지 않고 답변이 달린 것을 확인
+
+        # 이전 스키마의 행은 content_hash가 없으므로 저장된 내용으로 계산
+        stored_hash = row["content_hash"] or content_hash(row)
+        if content_hash(record) != stored_hash or record["state"] != row["state"]:
+            print(f"[UPDATE] qnum {row['qnum']}: content changed ({row['state']} -> {record['state']})")
+            changed.append(record)
+        else:
+            unchanged.append(row)
+
+    commit_batch(changed, None, None, status="done", name=REFRESH_CHECKPOINT_NAME, replace=True)
+    mark_checked(unchanged)
+    mark_failed(failed)
+    print(f"[REFRESH] Checked {len(candidates)} items, updated {len(changed)}, failed {len(failed)}")
+    return changed
+
+# -------------------------
+# 10) 백필 (전체 이력)
+# -------------------------
+def build_record(item):
+    detail = fetch_detail(item["link"], ttl=detail_ttl(get_saved_state(item["qnum"])))
+    if detail.get("question") == "[ERROR]":
+        # 실패한 글은 저장하지 않고 다음 백필에서 다시 시도
+        print(f"[WARN] Detail fetch failed for qnum {item['qnum']}: {detail.get('answer')}")
+        return None
+    return make_record(item, detail)
+
+def backfill(workers=BACKFILL_WORKERS, rate=BACKFILL_RATE, start_page=None, end_page=None, resume=True, on_progress=None):
+    """
+    목록 전체를 훑어 DB에 없는 글을 모두 수집 (중간 누락 구간 포함).
+    resume: 이전 백필이 중단되었으면 마지막 커밋 페이지부터 재개
+    """
+    init_db()
+    open_archive()
+
+    checkpoint = load_checkpoint(DB_PATH, BACKFILL_CHECKPOINT_NAME)
+    if start_page is None:
+        start_page = 1
+        if resume and checkpoint and checkpoint["status"] == "running":
+            start_page = max(1, checkpoint["page"] or 1)
+            print(f"[RESUME] Resuming backfill from page {start_page}")
+
+    existing_qnums = get_existing_qnums()
+    print(f"[INFO] Existing records in DB: {len(existing_qnums)}")
+
+    try:
+        return run_backfill(
+            "fastcounsel",
+            BASE_LIST_URL,
+            fetch_list_page,
+            parse_list_page,
+            build_record,
+            lambda records, page_index, last_qnum, status: commit_batch(
+                records, page_index, last_qnum, status=status, name=BACKFILL_CHECKPOINT_NAME
+            ),
+            existing_qnums,
+            accept=lambda item: item["state"] == COMPLETE_STATE,
+            start_page=start_page,
+            end_page=end_page,
+            workers=workers,
+            rate=rate,
+            on_progress=on_progress,
+        )
+    finally:
+        close_archive()
 
-    print(f"[DONE] 신규 {len(all_new)}개 저장 완료.")
 
 if __name__ == "__main__":
     main(max_pages=3)
@@ -2,18 +2,28 @@
 고용노동부 질의회시 크롤링 모듈
 """
 
-from bs4 import BeautifulSoup
-import json
+import os
 import re
-import requests
 import time
-import sqlite3
 import datetime
 from pathlib import Path
 import sys
 import urllib3
-from src.embeddings import get_embedding
-from src.rag.build_index import add_documents
+from src.embeddings import get_embeddings
+from src.rag.aliases import resolve_collection
+from src.rag.build_index import add_documents, update_metadatas
+from src.rag.partitions import ingest_groups
+from src.utils import db, http
+from src.utils.archive import ArchiveWriter
+from src.utils.backfill import run_backfill
+from src.utils.checkpoint import (
+    committed_jsonl_size, init_checkpoint_table, load_checkpoint, max_qnum_below, qnum_key, write_checkpoint,
+)
+from src.utils.html_parser import joined_text, parse_html, table_rows
+from src.utils.membership import QnumIndex
+from src.utils.near_dup import NearDupIndex, canonical_sql, duplicate_count_sql, init_tables as init_near_dup_tables
+from src.utils.metering import metered_agent
+from src.utils.tracing import current_span, span, traced
 
 
 # -------------------------
@@ -28,11 +38,19 @@ except NameError:
 
 OUTPUT_JSON = "moel_iqrs.jsonl"
 OUTPUT_DB = "moel_iqrs.db"
-JSON_PATH = BASE_DIR / "data" / OUTPUT_JSON
+JSON_PATH = BASE_DIR / "data" / OUTPUT_JSON  # 세그먼트 아카이브 도입 이전의 단일 JSONL (첫 실행 시 이관)
+ARCHIVE_DIR = BASE_DIR / "data" / "archive" / "moel_iqrs"
 DB_PATH = BASE_DIR / "db"/ OUTPUT_DB
+CHECKPOINT_NAME = "moel_iqrs"
+GAP_CHECKPOINT_NAME = "moel_iqrs:gap"  # max_pages에서 멈춰 남은 미수집 구간 (page부터, last_qnum = 구간 하한)
+BACKFILL_CHECKPOINT_NAME = "moel_iqrs:backfill"
+BACKFILL_WORKERS = int(os.getenv("CRAWL_BACKFILL_WORKERS", "8"))
+BACKFILL_RATE = float(os.getenv("CRAWL_RATE_LIMIT", "4"))  # 초당 요청 수 (호스트 전역)
 BASE_LIST_URL = "https://labor.moel.go.kr/cmmt/iqrs_list.do"
 BASE_DETAIL_URL = "https://labor.moel.go.kr/cmmt/iqrs_detail.do?id="
 BASE_URL = "https://labor.moel.go.kr"
+# 상세 페이지(질의/답변 본문)는 게시 후 거의 바뀌지 않으므로 디스크 캐시를 길게 재사용
+DETAIL_CACHE_TTL = 7 * 24 * 60 * 60
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; YourBot/1.0; +youremail@example.com)"
 }
@@ -42,33 +60,32 @@ HEADERS = {
 # 0-1) DB 초기화
 # -------------------------
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS moel_iqrs (
-            qnum TEXT PRIMARY KEY,
-            title TEXT,
-            question TEXT,
-            answer TEXT,
-            link TEXT,
-            ref_no TEXT,
-            date TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with db.transaction(DB_PATH) as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS moel_iqrs (
+                qnum TEXT PRIMARY KEY,
+                title TEXT,
+                question TEXT,
+                answer TEXT,
+                link TEXT,
+                ref_no TEXT,
+                date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_moel_iqrs_date ON moel_iqrs (date)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_moel_iqrs_created_at ON moel_iqrs (created_at)")
+        init_checkpoint_table(cur)
+        init_near_dup_tables(cur, "moel_iqrs")
 
 # -------------------------
 # 0-2) DB 저장
 # -------------------------
-def save_to_db(items):
-    if not items:
+def save_to_db(items, checkpoint=None):
+    """checkpoint(dict)가 주어지면 레코드와 같은 트랜잭션으로 크롤링 체크포인트를 기록"""
+    if not items and checkpoint is None:
         return
     
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
     data_to_insert = [
         (
             item["qnum"],
@@ -82,82 +99,140 @@ def save_to_db(items):
         for item in items
         ]
 
-    cur.executemany("""
-        INSERT OR IGNORE INTO moel_iqrs (qnum, title, question, answer, link, ref_no, date)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, data_to_insert)
+    with db.transaction(DB_PATH) as cur:
+        cur.executemany("""
+            INSERT OR IGNORE INTO moel_iqrs (qnum, title, question, answer, link, ref_no, date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, data_to_insert)
+        if checkpoint is not None:
+            write_checkpoint(cur, **checkpoint)
     
-    conn.commit()
-    conn.close()
-    print(f"[DB] Saved {len(data_to_insert)} items to {DB_PATH}")
+    if data_to_insert:
+        print(f"[DB] Saved {len(data_to_insert)} items to {DB_PATH}")
 
 # -------------------------
 # 0-3) 임베딩 처리
 # -------------------------
+def vector_id(qnum):
+    # 기존 컬렉션의 순번 id("0", "1", ...)와 겹치지 않도록 접두어 사용
+    return f"iqrs-{qnum}"
+
+def vector_metadata(item):
+    return {
+        "qnum": str(item["qnum"]),
+        "date": item["date"] or "",
+        "title": item["title"] or "",
+        "link": item["link"] or "",
+        "duplicates": int(item.get("duplicates") or 0),  # 이 글에 묶인 근접 중복 글 수 (utils/near_dup.py)
+    }
+
+def document_text(item):
+    """벡터 컬렉션에 저장하는 문서 포맷 (증분 임베딩과 컬렉션 재구축이 같은 포맷을 사용)"""
+    return (
+        f"Title: {item['title']}\n"
+        f"Q: {item['question']}\n"
+        f"A: {item['answer']}\n"
+        f"Link: {item['link']}\n"
+        f"Ref_no: {item['ref_no']}"
+    )
+
+def dedup_text(item):
+    """근접 중복 판정에 쓰는 텍스트: 제목 + 질문 (답변의 정형 문구로 다른 질문이 묶이지 않도록 답변 제외)"""
+    return f"{item['title']}\n{item['question']}"
+
+def get_near_dups():
+    return NearDupIndex(DB_PATH, "moel_iqrs")
+
+def update_duplicate_counts(qnums):
+    """새 근접 중복이 묶인 기존 대표 글 벡터의 duplicates 메타데이터 갱신 (재임베딩 없음)"""
+    if not qnums:
+        return
+    rows = [
+        row
+        for batch in iter_saved_records(columns=f"*, {duplicate_count_sql('moel_iqrs')}",
+                                        where=f"qnum IN ({','.join('?' * len(qnums))})", params=tuple(qnums))
+        for row in batch
+    ]
+    groups = ingest_groups(resolve_collection("moel_iqrs"), rows)
+    for collection_name, group in groups.items():
+        update_metadatas([vector_id(row["qnum"]) for row in group], [vector_metadata(row) for row in group],
+                         collection_name=collection_name)
+
+@metered_agent("crawler.iqrs")
 def process_embeddings(items):
+    # 근접 중복 글은 대표 글에 묶고(duplicates 증가) 대표 글만 임베딩
+    items, attached = get_near_dups().split(items, dedup_text)
+    update_duplicate_counts(attached)
     if not items:
         return
 
-    # 텍스트 청크 생성
-    chunks = []
-    for item in items:
-        text = (
-            f"Title: {item['title']}\n"
-            f"Q: {item['question']}\n"
-            f"A: {item['answer']}\n"
-            f"Link: {item['link']}\n"
-            f"Ref_no: {item['ref_no']}"
+    # 텍스트 청크 생성 (date 기준 기간 분할 컬렉션별로 저장)
+    print(f"[Embedding] Processing {len(items)} chunks...")
+    groups = ingest_groups(resolve_collection("moel_iqrs"), items)
+    for collection_name, group in groups.items():
+        # 페이지의 글을 한 번의 배치 요청으로 임베딩 (글마다 API를 호출하지 않음)
+        documents = [document_text(item) for item in group]
+        add_documents(
+            documents, None, collection_name=collection_name,
+            ids=[vector_id(item["qnum"]) for item in group],
+            metadatas=[vector_metadata(item) for item in group],
+            embeddings=get_embeddings(documents),
         )
-        
-        chunks.append(text)
-    
-    if chunks:
-        print(f"[Embedding] Processing {len(chunks)} chunks...")
-        add_documents(chunks, get_embedding, collection_name="moel_iqrs")
-        print("[Embedding] Done.")
+    print("[Embedding] Done.")
 
 # -------------------------
 # 1) 기존 보유 qnum 불러오기
 # -------------------------
 def get_existing_qnums():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT qnum FROM moel_iqrs")
-    rows = cur.fetchall()
-    conn.close()
-    return set(row[0] for row in rows)
+    """
+    `qnum in ...`으로 조회하는 membership 인덱스 (워터마크 -> bloom filter -> PK 조회).
+    qnum 전체를 set으로 메모리에 올리지 않는다.
+    """
+    return QnumIndex(DB_PATH, "moel_iqrs")
+
+def iter_saved_records(columns="*", where="", params=(), batch_size=1000):
+    """저장된 레코드를 batch_size 행씩 스트리밍 (전체를 한 번에 메모리에 올리지 않음)"""
+    return db.iter_batches(DB_PATH, "moel_iqrs", columns=columns, where=where, params=params,
+                           batch_size=batch_size)
+
+def iter_vector_records(after_rowid=-1, batch_size=1000):
+    """벡터 컬렉션에 들어가는 레코드 = 근접 중복 대표 글 (컬렉션 재구축용, rid = rowid, duplicates = 묶인 글 수)"""
+    return iter_saved_records(columns=f"rowid AS rid, *, {duplicate_count_sql('moel_iqrs')}",
+                              where=f"rowid > ? AND {canonical_sql('moel_iqrs')}", params=(after_rowid,),
+                              batch_size=batch_size)
 
 # -------------------------
 # 2) 리스트 페이지 XHR 요청 (HTML 예시)
 # -------------------------
 def fetch_list_page(page_index):
     params = {"pageNum": page_index}
-    resp = requests.get(BASE_LIST_URL, headers=HEADERS, params=params, timeout=30, verify=False)
-    resp.raise_for_status()
+    with span("crawler.iqrs.list_page", page=page_index) as sp:
+        resp = http.get(BASE_LIST_URL, headers=HEADERS, params=params, timeout=30, verify=False)
+        resp.raise_for_status()
+        sp.set_attribute("bytes", len(resp.content))
     return resp.text
 
 # -------------------------
 # 3) 리스트 파싱 (HTML)
 # -------------------------
 def parse_list_page(html):
-    soup = BeautifulSoup(html, "html5lib")
-    rows = soup.select("table tbody tr")
+    rows = table_rows(parse_html(html))
     items = []
     
     for tr in rows:
-        if tr.find("th"):  # th 있는 행 제거
+        if tr.select_one("th"):  # th 있는 행 제거
             continue
         tds = tr.select("td")
         if len(tds) < 4:
             continue
         else:
-            qnum = tds[0].get_text(strip=True)
-            title = tds[1].get_text(strip=True)
-            link_tag = tds[1].find("a")["onclick"]
+            qnum = tds[0].text()
+            title = tds[1].text()
+            link_tag = tds[1].select_one("a").attr("onclick")
             link_id = re.search(r'fn_detail\((\d+)\)', link_tag).group(1)
             link = BASE_DETAIL_URL + link_id if link_tag else ""
-            ref_no = tds[2].get_text(strip=True)
-            date = tds[3].get_text(strip=True)
+            ref_no = tds[2].text()
+            date = tds[3].text()
 
         items.append({
             "qnum": qnum,
@@ -171,50 +246,111 @@ def parse_list_page(html):
 # -------------------------
 # 4) 상세 페이지 크롤링
 # -------------------------
+def parse_detail(html):
+    """상세 페이지의 질의(qBox span) / 회시(aBox p) 본문 추출"""
+    root = parse_html(html)
+    qbox = root.select_one("dd.qBox")
+    abox = root.select_one("dd.aBox")
+
+    question = joined_text(qbox.select("span")) if qbox else ""
+    answer = joined_text(abox.select("p")) if abox else ""
+    return {"question": question, "answer": answer}
+
+@traced("crawler.iqrs.detail")
 def fetch_detail(link):
     try:
-        resp = requests.get(link, headers=HEADERS, timeout=20, verify=False)
+        resp = http.get(link, headers=HEADERS, timeout=20, verify=False, ttl=DETAIL_CACHE_TTL)
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html5lib")
-
-        qbox = soup.find_all("dd", class_="qBox")
-        abox = soup.find_all("dd", class_="aBox")
-
-        dd_q = qbox[0].select("span") if qbox else []
-        dd_a = abox[0].select("p") if abox else []
-        
-        question = " ".join([dd_q[i].get_text(strip=True) for i in range(len(dd_q))]) if len(dd_q) > 0 else ""
-        answer = " ".join([dd_a[i].get_text(strip=True) for i in range(len(dd_a))]) if len(dd_a) > 0 else ""
-        # print('q:', question)
-        # print('a:', answer)
-
-        return {"question": question, "answer": answer}
+        current_span().set_attributes(url=link, bytes=len(resp.content))
+        return parse_detail(resp.text)
     except Exception as e:
         return {"question": "[ERROR]", "answer": str(e)}
 
+def make_record(item, detail):
+    return {
+        "qnum": item["qnum"],
+        "title": item["title"],
+        "question": detail.get("question", ""),
+        "answer": detail.get("answer", ""),
+        "link": item["link"],
+        "ref_no": item["ref_no"],
+        "date": item["date"]
+    }
+
 # -------------------------
-# 5) 증분 merge
+# 5) 원문 아카이브 (세그먼트 JSONL)
 # -------------------------
-def append_jsonl(record):
-    with open(JSON_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+_archive = None
+
+def get_archive():
+    """크롤링 동안 재사용하는 버퍼 아카이브 writer (기존 단일 JSONL은 첫 세그먼트로 이관)"""
+    global _archive
+    if _archive is None:
+        _archive = ArchiveWriter(ARCHIVE_DIR, "moel_iqrs")
+        with _archive.locked():
+            if _archive.import_legacy(JSON_PATH):
+                print(f"[ARCHIVE] Imported {JSON_PATH.name} as the first archive segment")
+    return _archive
+
+def open_archive():
+    """크롤링 시작 시 호출: 마지막 커밋 이후에 덧붙은 기록 제거"""
+    archive = get_archive()
+    # 잠금 안에서는 다른 writer의 커밋되지 않은 기록이 없으므로, 커밋 오프셋 이후는 중단된 실행의 잔여분
+    with archive.locked():
+        if archive.truncate_to(committed_jsonl_size(DB_PATH)):
+            print(f"[RESUME] Truncated uncommitted records in {archive.active['file']}")
+    return archive
+
+def close_archive():
+    global _archive
+    if _archive is not None:
+        _archive.close()
+        _archive = None
 
 # -------------------------
-# 6) 메인
+# 6) 배치 커밋 / 체크포인트
 # -------------------------
-def main(max_pages=None):
-    init_db() # DB 초기화
-    
-    existing_qnums = get_existing_qnums()
-    print(f"[INFO] Existing records in DB: {len(existing_qnums)}")
-    all_new = []
+def commit_batch(records, page_index, last_qnum, status="running", name=CHECKPOINT_NAME):
+    """
+    한 페이지 분량의 신규 레코드를 벡터 인덱스 -> JSONL -> DB(+체크포인트) 순으로 반영.
+    DB 트랜잭션이 커밋되어야 배치가 완료된 것으로 보며, 그 전에 중단되면
+    벡터는 같은 qnum id로 다시 upsert되고 아카이브는 재개 시 jsonl_size(논리 오프셋)로 잘려 세 저장소가 맞춰진다.
+    세그먼트 봉인(압축)은 DB 커밋 이후에만 일어난다.
+    """
+    archive = get_archive()
+    if records:
+        process_embeddings(records)
+    # 다른 writer(앱 / CLI 백필)와 아카이브를 공유하므로 JSONL 쓰기 ~ 체크포인트 오프셋 기록 ~ commit을 한 잠금 안에서
+    with archive.locked():
+        archive.write_many(records)
+        save_to_db(records, checkpoint={
+            "name": name,
+            "status": status,
+            "page": page_index,
+            "last_qnum": last_qnum,
+            "jsonl_size": archive.position(),
+        })
+        archive.commit()
 
-    page_index = 1
+# -------------------------
+# 7) 메인
+# -------------------------
+def crawl_pages(page_index, existing_qnums, crawled_qnums, max_pages=None, skip_from=None, last_qnum=None,
+                gap_floor=None):
+    """
+    page_index부터 목록을 내려가며 신규 글을 페이지 단위로 커밋
+    -> (stop_flag, 다음 page_index, 크롤링한 페이지 수, 신규 수, 마지막 qnum)
+    skip_from: 이 번호 이상의 기존 글은 건너뛰고(이미 수집한 구간) 그보다 오래된 기존 글에서 종료 (None이면 첫 기존 글에서 종료)
+    gap_floor: 미수집 구간(gap)을 이어받는 중이면 구간 하한 qnum. 체크포인트를 GAP_CHECKPOINT_NAME에 status=gap으로 기록
+    stop_flag: 기존 데이터(또는 목록 끝)에 도달했으면 True, max_pages에서 멈췄으면 False
+    """
+    pages_crawled = 0
+    total_new = 0
     stop_flag = False
 
     while True:
         # Stop if we've reached max_pages (if max_pages is not None)
-        if max_pages is not None and page_index > max_pages:
+        if max_pages is not None and pages_crawled >= max_pages:
             break
 
         html = fetch_list_page(page_index)
@@ -222,31 +358,39 @@ def main(max_pages=None):
 
         # Stop if no more items on the page
         if not page_items:
+            stop_flag = True
             break
 
+        page_new = []
         for item in page_items:
             qnum = item["qnum"]
 
+            if qnum in crawled_qnums:
+                continue  # 크롤링 도중 신규 글로 목록이 밀려 다시 보이는 글
+
             if qnum in existing_qnums:
+                # 재개 중에는 이미 커밋된(마지막 qnum 이후) 글은 건너뛰고, 그보다 오래된 기존 글에서 종료
+                key = qnum_key(qnum)
+                if skip_from is not None and key is not None and key >= skip_from:
+                    continue
                 # ★ 증분 크롤링 종료 지점
                 print(f"[STOP] Reached existing qnum {qnum}. Stopping incremental crawl.")
                 stop_flag = True
                 break
 
-            detail = fetch_detail(item["link"])
-            record = {
-                "qnum": item["qnum"],
-                "title": item["title"],
-                "question": detail.get("question", ""),
-                "answer": detail.get("answer", ""),
-                "link": item["link"],
-                "ref_no": item["ref_no"],
-                "date": item["date"]
-            }
+            record = make_record(item, fetch_detail(item["link"]))
 
             # 신규만 추가
-            append_jsonl(record)
-            all_new.append(record)
+            page_new.append(record)
+            crawled_qnums.add(qnum)
+            last_qnum = qnum
+
+        if gap_floor is None:
+            commit_batch(page_new, page_index, last_qnum)
+        else:
+            commit_batch(page_new, page_index, gap_floor, status="gap", name=GAP_CHECKPOINT_NAME)
+        total_new += len(page_new)
+        pages_crawled += 1
 
         if stop_flag:
             break
@@ -255,12 +399,116 @@ def main(max_pages=None):
         page_index += 1
         time.sleep(0.2)
 
-    # DB 및 임베딩 저장 (신규 데이터만)
-    if all_new:
-        save_to_db(all_new)
-        process_embeddings(all_new)
+    return stop_flag, page_index, pages_crawled, total_new, last_qnum
+
+def main(max_pages=None, resume=True):
+    """
+    max_pages: 이번 실행에서 크롤링할 최대 페이지 수
+      여기서 멈추면 읽지 못한 구간을 gap 체크포인트로 남기고, 다음 실행은 1페이지부터 신규 글을 받은 뒤 그 구간을 이어서 수집
+    resume: 이전 실행이 중단되었으면(체크포인트 status=running) 마지막 커밋 페이지부터 재개
+    """
+    init_db() # DB 초기화
+    
+    existing_qnums = get_existing_qnums()
+    print(f"[INFO] Existing records in DB: {len(existing_qnums)}")
+
+    open_archive()
+
+    checkpoint = load_checkpoint(DB_PATH, CHECKPOINT_NAME)
+    gap = load_checkpoint(DB_PATH, GAP_CHECKPOINT_NAME)
+    if gap is not None and gap["status"] != "gap":
+        gap = None
+
+    resume_qnum = None
+    last_qnum = None
+    if resume and checkpoint and checkpoint["status"] == "running":
+        # 중단 이후 신규 글이 올라오면 목록이 밀리므로 마지막 커밋 페이지부터 다시 확인
+        page_index = max(1, checkpoint["page"] or 1)
+        last_qnum = checkpoint["last_qnum"]
+        resume_qnum = qnum_key(last_qnum)
+        print(f"[RESUME] Resuming from page {page_index} (last qnum {last_qnum})")
+    else:
+        page_index = 1
+
+    crawled_qnums = set()
+    stop_flag, page_index, pages_crawled, total_new, last_qnum = crawl_pages(
+        page_index, existing_qnums, crawled_qnums, max_pages, skip_from=resume_qnum, last_qnum=last_qnum,
+    )
+    # 이번 증분 크롤링은 끝남 (running은 중단된 실행만 남아 그 페이지부터 재개)
+    commit_batch([], page_index, last_qnum, status="done")
+
+    if not stop_flag:
+        # max_pages에서 멈춤: 읽지 못한 구간(page_index ~ 구간 하한)을 gap으로 남긴다.
+        # 이전 gap이 남아 있으면 그 하한을 그대로 써서 두 구간을 하나로 합친다 (사이의 수집된 글은 건너뜀)
+        floor = gap["last_qnum"] if gap else max_qnum_below(DB_PATH, "moel_iqrs", last_qnum)
+        commit_batch([], page_index, floor, status="gap", name=GAP_CHECKPOINT_NAME)
+        print(f"[GAP] Stopped at max_pages. Next run continues from page {page_index} down to qnum {floor}.")
+    elif gap and (max_pages is None or pages_crawled < max_pages):
+        # 신규 글을 다 받았으면 남은 페이지 수만큼 이전 실행의 미수집 구간을 이어서 수집
+        floor = gap["last_qnum"]
+        print(f"[GAP] Continuing unfinished range from page {gap['page']} down to qnum {floor}")
+        gap_done, gap_page, _, gap_new, _ = crawl_pages(
+            max(1, gap["page"] or 1), existing_qnums, crawled_qnums,
+            None if max_pages is None else max_pages - pages_crawled,
+            skip_from=(qnum_key(floor) or -1) + 1, gap_floor=floor,
+        )
+        total_new += gap_new
+        if gap_done:
+            commit_batch([], gap_page, floor, status="done", name=GAP_CHECKPOINT_NAME)
+            print("[GAP] Unfinished range completed.")
+
+    print(f"[DONE] 신규 {total_new}개 저장 완료.")
+    close_archive()
 
-    print(f"[DONE] 신규 {len(all_new)}개 저장 완료.")
+
+# -------------------------
+# 8) 백필 (전체 이력)
+# -------------------------
+def build_record(item):
+    detail = fetch_detail(item["link"])
+    if detail.get("question") == "[ERROR]":
+        # 실패한 글은 저장하지 않고 다음 백필에서 다시 시도
+        print(f"[WARN] Detail fetch failed for qnum {item['qnum']}: {detail.get('answer')}")
+        return None
+    return make_record(item, detail)
+
+def backfill(workers=BACKFILL_WORKERS, rate=BACKFILL_RATE, start_page=None, end_page=None, resume=True, on_progress=None):
+    """
+    목록 전체를 훑어 DB에 없는 글을 모두 수집 (중간 누락 구간 포함).
+    resume: 이전 백필이 중단되었으면 마지막 커밋 페이지부터 재개
+    """
+    init_db()
+    open_archive()
+
+    checkpoint = load_checkpoint(DB_PATH, BACKFILL_CHECKPOINT_NAME)
+    if start_page is None:
+        start_page = 1
+        if resume and checkpoint and checkpoint["status"] == "running":
+            start_page = max(1, checkpoint["page"] or 1)
+            print(f"[RESUME] Resuming backfill from page {start_page}")
+
+    existing_qnums = get_existing_qnums()
+    print(f"[INFO] Existing records in DB: {len(existing_qnums)}")
+
+    try:
+        return run_backfill(
+            "iqrs",
+            BASE_LIST_URL,
+            fetch_list_page,
+            parse_list_page,
+            build_record,
+            lambda records, page_index, last_qnum, status: commit_batch(
+                records, page_index, last_qnum, status=status, name=BACKFILL_CHECKPOINT_NAME
+            ),
+            existing_qnums,
+            start_page=start_page,
+            end_page=end_page,
+            workers=workers,
+            rate=rate,
+            on_progress=on_progress,
+        )
+    finally:
+        close_archive()
 
 
 if __name__ == "__main__":
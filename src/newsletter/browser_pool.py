@@ -0,0 +1,162 @@
+"""
+Headless Chrome 드라이버 풀
+
+프로세스 단위로 공유되는 webdriver 풀. 검색마다 Chrome을 새로 띄우지 않고
+미리 띄워둔(warm) 드라이버를 빌려 쓰고 반납한다.
+- 대여 시 health check (응답 없는 드라이버는 폐기 후 재생성)
+- 드라이버당 max_pages 페이지를 처리하면 재생성(recycle)하여 메모리 누수 방지
+
+환경 변수
+- BROWSER_POOL_SIZE      : 드라이버 수 (기본 2)
+- BROWSER_POOL_MAX_PAGES : 드라이버 재생성 주기 (기본 50 페이지)
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from src.utils.tracing import span
+
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+MAX_PAGES_PER_DRIVER = int(os.getenv("BROWSER_POOL_MAX_PAGES", "50"))
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, acquire_timeout=120):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()  # 최근 사용한(따뜻한) 드라이버 우선
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    # -------------------------
+    # 드라이버 생성 / 폐기
+    # -------------------------
+    def _create(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument("--headless=new")  # 최신 headless
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+
+        with span("browser_pool.create_driver"):
+            return _PooledDriver(webdriver.Chrome(options=chrome_options))
+
+    def _discard(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def _is_healthy(self, entry):
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    # -------------------------
+    # 대여 / 반납
+    # -------------------------
+    def _acquire(self):
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._create()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                entry = self._idle.get(timeout=self.acquire_timeout)
+
+            if entry.pages >= self.max_pages or not self._is_healthy(entry):
+                print(f"[BrowserPool] Recycling driver after {entry.pages} pages")
+                self._discard(entry)
+                continue
+            return entry
+
+    def _release(self, entry, broken=False):
+        entry.pages += 1
+        if broken or self._closed:
+            self._discard(entry)
+        else:
+            self._idle.put(entry)
+
+    @contextmanager
+    def driver(self):
+        """
+        with pool.driver() as driver:
+            driver.get(url)
+        """
+        entry = self._acquire()
+        broken = False
+        try:
+            yield entry.driver
+        except Exception:
+            # 페이지 타임아웃 등은 드라이버 상태를 알 수 없으므로 폐기
+            broken = True
+            raise
+        finally:
+            self._release(entry, broken=broken)
+
+    def warmup(self):
+        """size 개수만큼 드라이버를 미리 띄워 둔다."""
+        entries = []
+        with self._lock:
+            missing = self.size - self._created
+            self._created += missing
+        for _ in range(missing):
+            try:
+                entries.append(self._create())
+            except Exception as e:
+                with self._lock:
+                    self._created -= 1
+                print(f"[BrowserPool] Warmup failed: {e}")
+        for entry in entries:
+            self._idle.put(entry)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """프로세스 전역(세션 간 공유) 브라우저 풀"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
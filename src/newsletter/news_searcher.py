@@ -3,25 +3,25 @@
 """
 
 
+import asyncio
+import html
 import json
 import os
 import re
+import threading
+from collections import OrderedDict
 import sys
 import urllib.request
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-import numpy as np
 import urllib.parse
-from urllib.parse import urlencode
-from openai import OpenAI
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlsplit, parse_qsl
 from dotenv import load_dotenv
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from src.utils import http
+from src.utils.tracing import propagate, span, traced
 
 
 # Explicitly load .env from project root (parent of src)
@@ -53,23 +53,31 @@ def search_naver_news(query, display=20, sort="date"):
         "X-Naver-Client-Secret": NAVER_CLIENT_SECRET
     }
     url = f"{base_url}?{urlencode(params)}"
-    res = requests.get(url, headers=headers)
-    res.raise_for_status()
+    with span("news.naver.search", query=query) as sp:
+        res = http.get(url, headers=headers, cache=False)
+        res.raise_for_status()
+        sp.set_attribute("bytes", len(res.content))
 
     articles = []
 
     items = res.json().get("items", [])
     for k, item in enumerate(items):
-        title = item['title'].replace('<b>', '').replace('</b>', '').replace('&quot;', '')  # HTML 태그 제거
-        link = item['link']
-        description = item['description'].replace('<b>', '').replace('</b>', '').replace('&quot;', '')
+        title = html.unescape(re.sub(r"<[^>]+>", "", item['title']))  # HTML 태그 제거
+        link = item.get('originallink') or item['link']
+        description = html.unescape(re.sub(r"<[^>]+>", "", item['description']))
         pubDate = item['pubDate']
+        try:
+            date = parsedate_to_datetime(pubDate).strftime("%Y.%m.%d")
+        except (TypeError, ValueError):
+            date = ""
 
         articles.append({
             "key": "N"+str(k + 1).zfill(4),
             "title": title,
             "link": link,
-            "content": description
+            "content": description,
+            "date": date,
+            "source": "네이버뉴스"
             })
         
     return articles 
@@ -80,71 +88,95 @@ def search_naver_news(query, display=20, sort="date"):
 
 query = "산재"
 
-def search_worklaw_news(query, n_news=5, max_pages=10):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")  # 최신 headless
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    
-    driver = webdriver.Chrome(options=chrome_options)
+def unicode_escape_url(text):
+    return ''.join(f'%u{ord(c):04X}' for c in text)
 
-    def unicode_escape_url(text):
-        return ''.join(f'%u{ord(c):04X}' for c in text)
-    
+def worklaw_list_url(query, page):
+    return (
+        "https://www.worklaw.co.kr/main2022/list/list.asp?"
+        f"in_cate=122&in_cate2=0&search_Text={unicode_escape_url(query)}&keyword={unicode_escape_url(query)}&"
+        f"research_keyword={unicode_escape_url(query)}&resrch_depth=0&keyword_pfet=&keyword_cont=&"
+        f"keyword_excd=&fd_opt=fd_all^nv_title^nv_contents^nv_writer^tm_code^&dt_opt=1&dt_st=&dt_ed=&odr_type=2&andor=1&"
+        f"gopage={page}&detail_search_chk=1&svc_ver="
+        )
+
+def fetch_worklaw_page(pool, query, page):
+    """풀에서 드라이버를 빌려 검색결과 한 페이지의 HTML을 반환 (결과 없음/타임아웃 시 빈 문자열)"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    with span("news.worklaw.list_page", page=page) as sp:
+        with pool.driver() as driver:
+            driver.get(worklaw_list_url(query, page))
+            try:
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_all_elements_located((By.CLASS_NAME, "list_menu_order"))
+                )
+            except TimeoutException:
+                return ""
+            page_source = driver.page_source
+        sp.set_attribute("bytes", len(page_source.encode("utf-8")))
+    return page_source
+
+def parse_worklaw_page(page_source):
+    soup = BeautifulSoup(page_source, "html.parser")
     articles = []
 
-    for page in range(1, max_pages + 1):
-        url = (
-            "https://www.worklaw.co.kr/main2022/list/list.asp?"
-            f"in_cate=122&in_cate2=0&search_Text={unicode_escape_url(query)}&keyword={unicode_escape_url(query)}&"
-            f"research_keyword={unicode_escape_url(query)}&resrch_depth=0&keyword_pfet=&keyword_cont=&"
-            f"keyword_excd=&fd_opt=fd_all^nv_title^nv_contents^nv_writer^tm_code^&dt_opt=1&dt_st=&dt_ed=&odr_type=2&andor=1&"
-            f"gopage={page}&detail_search_chk=1&svc_ver="
-            )
-    
-        driver.get(url)
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_all_elements_located((By.CLASS_NAME, "list_menu_order"))
-        )
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+    for k, div in enumerate(soup.find_all("div", class_="list_menu_order")):
+        la_text = div.find("div", class_="la_text")
+        if not la_text:
+            continue
+
+        title = la_text.find_all("p")[0].get_text(strip=True)
+        content = la_text.find_all("p")[1].get_text(strip=True)
+        date_tag = la_text.find("ul", class_="ndp").find_all("li")[1]
+        date = date_tag.get_text(strip=True).replace("-", ".") if date_tag else ""
+        onclick = div.get("onclick", "")
+        link = ""
+        if "/main2022/view/view.asp" in onclick:
+            parts = onclick.split("'/main2022/view/view.asp','','")
+            if len(parts) > 1:
+                link_query = parts[1].split("'")[0].replace("&amp;", "&")
+                link = "https://www.worklaw.co.kr/main2022/view/view.asp" + link_query
 
-        for k, div in enumerate(soup.find_all("div", class_="list_menu_order")):
-            la_text = div.find("div", class_="la_text")
-            if not la_text:
-                continue
+        articles.append({
+            "key": "W"+ str(k + 1).zfill(4),
+            "title": title,
+            "link": link,
+            "content": content,
+            "date": date,
+            "source": "월간노동법률"
+        })
+    return articles
 
-            title = la_text.find_all("p")[0].get_text(strip=True)
-            content = la_text.find_all("p")[1].get_text(strip=True)
-            date_tag = la_text.find("ul", class_="ndp").find_all("li")[1]
-            date = date_tag.get_text(strip=True).replace("-", ".") if date_tag else ""
-            onclick = div.get("onclick", "")
-            link = ""
-            # if "/main2022/view/view.asp" in onclick:
-            #     query_part = onclick.split("','','")[4].replace("&amp;", "&")
-            #     link = "https://www.worklaw.co.kr/main2022/view/view.asp" + query_part
-            if "/main2022/view/view.asp" in onclick:
-                parts = onclick.split("'/main2022/view/view.asp','','")
-                if len(parts) > 1:
-                    query = parts[1].split("'")[0].replace("&amp;", "&")
-                    link = "https://www.worklaw.co.kr/main2022/view/view.asp" + query
-
-            articles.append({
-                "key": "W"+ str(k + 1).zfill(4),
-                "title": title,
-                "link": link,
-                "content": content,
-                "date": date,
-                "source": "월간노동법률"
-            })
+def search_worklaw_news(query, n_news=5, max_pages=10):
+    """
+    공유 브라우저 풀(browser_pool)의 드라이버들로 검색결과 페이지를 동시에 가져온다.
+    풀 크기만큼의 페이지를 한 묶음으로 요청하고, 기사 수가 채워지면 다음 묶음은 요청하지 않는다.
+    """
+    from src.newsletter.browser_pool import get_browser_pool
 
-            if len(articles) >= n_news:
+    pool = get_browser_pool()
+    articles = []
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        for batch_start in range(1, max_pages + 1, pool.size):
+            pages = range(batch_start, min(batch_start + pool.size, max_pages + 1))
+            page_sources = list(executor.map(propagate(lambda page: fetch_worklaw_page(pool, query, page)), pages))
+
+            exhausted = False
+            for page_source in page_sources:  # 페이지 순서 유지
+                page_articles = parse_worklaw_page(page_source) if page_source else []
+                if not page_articles:
+                    exhausted = True
+                    break
+                articles.extend(page_articles)
+
+            if len(articles) >= n_news or exhausted:
                 break
-            
-        if len(articles) >= n_news:
-            break
-        
-    driver.quit()
+
     return articles[:min(len(articles), n_news)]
 
 
@@ -206,7 +238,9 @@ def search_labortoday_news(query, n_news=5, max_pages=10):
             "page": page
         }
 
-        res = requests.get(base, params=params, headers={"User-Agent": "Mozilla/5.0"})
+        with span("news.labortoday.list_page", page=page) as sp:
+            res = http.get(base, params=params, headers={"User-Agent": "Mozilla/5.0"}, cache=False)
+            sp.set_attribute("bytes", len(res.content))
         soup = BeautifulSoup(res.text, "html.parser")
 
         for k, li in enumerate(soup.select("li")):
@@ -244,37 +278,210 @@ def search_labortoday_news(query, n_news=5, max_pages=10):
 # 4. 기사 본문 크롤링
 # ------------------------------------------------------------
 
-def get_worklaw_full_text(url):
-    res = requests.get(url, headers={"User-Agent":"Mozilla/5.0"})
-    soup = BeautifulSoup(res.text, "html.parser")
+# 파싱된 기사 본문 캐시: url -> {"text", "fetched_at"}
+# FULL_TEXT_TTL 이내면 그대로 사용하고, 이후에는 HTTP 계층의 조건부 재검증 결과를 따름
+FULL_TEXT_TTL = 600
+FULL_TEXT_CACHE_SIZE = 256
+_full_text_cache = OrderedDict()
+_full_text_inflight = {}
+_full_text_lock = threading.Lock()
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="news-prefetch")
+
+def parse_worklaw_full_text(page):
+    soup = BeautifulSoup(page, "html.parser")
 
     paragraphs = soup.find_all("br")
     text = "\n".join(p.get_text(strip=True) for p in paragraphs)
     return text
 
-def get_labortoday_full_text(url):
-    res = requests.get(url, headers={"User-Agent":"Mozilla/5.0"})
-    soup = BeautifulSoup(res.text, "html.parser")
+def parse_paragraph_full_text(page):
+    soup = BeautifulSoup(page, "html.parser")
 
     paragraphs = soup.find_all("p")
     text = "\n".join(p.get_text(strip=True) for p in paragraphs)
     return text
 
+def fetch_full_text(url, parse_fn):
+    with _full_text_lock:
+        cached = _full_text_cache.get(url)
+        if cached:
+            _full_text_cache.move_to_end(url)
+    if cached and time.time() - cached["fetched_at"] < FULL_TEXT_TTL:
+        return cached["text"]
+
+    # 디스크 캐시 + ETag / Last-Modified 재검증은 공통 HTTP 계층에서 처리
+    with span("news.full_text.fetch", url=url, revalidate=cached is not None) as sp:
+        res = http.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=20, ttl=FULL_TEXT_TTL)
+        sp.set_attributes(status=res.status_code, bytes=len(res.content), cache=res.cache_status)
+
+    res.raise_for_status()
+    if res.from_cache and cached:
+        text = cached["text"]  # 본문이 바뀌지 않았으면 파싱 생략
+    else:
+        text = parse_fn(res.text)
+
+    with _full_text_lock:
+        _full_text_cache[url] = {"text": text, "fetched_at": time.time()}
+        _full_text_cache.move_to_end(url)
+        while len(_full_text_cache) > FULL_TEXT_CACHE_SIZE:
+            _full_text_cache.popitem(last=False)
+    return text
+
+@traced("news.worklaw.full_text")
+def get_worklaw_full_text(url):
+    return fetch_full_text(url, parse_worklaw_full_text)
+
+@traced("news.article.full_text")
+def get_article_full_text(url):
+    # 네이버 뉴스 검색결과(언론사 원문) 등 일반 기사 페이지
+    return fetch_full_text(url, parse_paragraph_full_text)
+
+@traced("news.labortoday.full_text")
+def get_labortoday_full_text(url):
+    return fetch_full_text(url, parse_paragraph_full_text)
+
 
 # ------------------------------------------------------------
-# 5. 월간노동법률 + 매일노동법률
+# 5. 월간노동법률 + 매일노동법률 + 네이버 뉴스 (동시 검색)
 # ------------------------------------------------------------
-def search_all_newslist(query, n_news_each=5):
-    l_news = search_labortoday_news(query, n_news=n_news_each, max_pages=10)
-    w_news = search_worklaw_news(query, n_news=n_news_each, max_pages=10)
+def _search_naver(query, n_news):
+    return search_naver_news(query, display=n_news)
+
+def _search_labortoday(query, n_news):
+    return search_labortoday_news(query, n_news=n_news, max_pages=10)
+
+def _search_worklaw(query, n_news):
+    return search_worklaw_news(query, n_news=n_news, max_pages=10)
+
+# 소스 이름 → (검색 함수, timeout 초). 병합 시 이 순서를 우선순위로 사용
+NEWS_SOURCES = {
+    "매일노동법률": (_search_labortoday, 20),
+    "월간노동법률": (_search_worklaw, 60),
+    "네이버뉴스": (_search_naver, 10),
+}
+
+def normalize_url(url):
+    parts = urlsplit(url or "")
+    netloc = parts.netloc.lower().removeprefix("www.")
+    query = "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(parts.query)))
+    return f"{netloc}{parts.path.rstrip('/')}?{query}"
+
+def normalize_title(title):
+    title = html.unescape(title or "")
+    title = re.sub(r"\[[^\]]*\]|\([^)]*\)", "", title)  # [단독], (종합) 등 머리말 제거
+    return re.sub(r"[\W_]+", "", title).lower()
+
+def dedupe_articles(articles):
+    """URL 또는 정규화한 제목이 같은 기사는 먼저 나온 것만 남긴다."""
+    seen_urls, seen_titles = set(), set()
+    unique = []
+    for article in articles:
+        url_key = normalize_url(article.get("link")) if article.get("link") else None
+        title_key = normalize_title(article.get("title"))
+        if (url_key and url_key in seen_urls) or (title_key and title_key in seen_titles):
+            continue
+        if url_key:
+            seen_urls.add(url_key)
+        if title_key:
+            seen_titles.add(title_key)
+        unique.append(article)
+    return unique
+
+async def iter_news_sources(query, n_news_each=5, sources=None):
+    """
+    모든 뉴스 소스를 동시에 검색하고, 응답이 빠른 소스부터 (소스 이름, 기사 목록)을 yield.
+    소스별 timeout을 넘기거나 실패한 소스는 빈 목록을 반환한다.
+    """
+    sources = sources or NEWS_SOURCES
+
+    async def run(name, fn, timeout):
+        try:
+            articles = await asyncio.wait_for(asyncio.to_thread(fn, query, n_news_each), timeout)
+        except asyncio.TimeoutError:
+            print(f"[NEWS] {name} timed out after {timeout}s")
+            articles = []
+        except Exception as e:
+            print(f"[NEWS] {name} failed: {type(e).__name__} - {e}")
+            articles = []
+        return name, articles
+
+    tasks = [asyncio.create_task(run(name, fn, timeout)) for name, (fn, timeout) in sources.items()]
+    for next_done in asyncio.as_completed(tasks):
+        yield await next_done
+
+@traced("news.search_all_newslist")
+def search_all_newslist(query, n_news_each=5, min_sources=None, grace=0.0, on_update=None, sources=None):
+    """
+    뉴스 소스 동시 검색 후 중복 제거된 기사 목록 반환.
+    - min_sources: 이 개수의 소스가 응답하면 (grace 초 추가 대기 후) 부분 결과를 바로 반환 (기본: 전체 소스)
+    - on_update: 반환 이후 늦게 도착한 소스까지 포함한 전체 목록을 받을 콜백
+    """
+    sources = sources or NEWS_SOURCES
+    min_sources = len(sources) if min_sources is None else min(min_sources, len(sources))
+    by_source = {}
+    cond = threading.Condition()
+
+    def merged():
+        return dedupe_articles([a for name in sources for a in by_source.get(name, [])])
+
+    async def collect():
+        async for name, articles in iter_news_sources(query, n_news_each, sources):
+            with cond:
+                by_source[name] = articles
+                snapshot = merged()
+                cond.notify_all()
+            if on_update is not None:
+                on_update(snapshot)
+
+    # 호출 측 event loop(Streamlit 등) 유무와 무관하게 별도 스레드에서 실행
+    threading.Thread(target=propagate(lambda: asyncio.run(collect())), daemon=True).start()
+
+    overall_timeout = max(timeout for _, timeout in sources.values()) + 5
+    with cond:
+        cond.wait_for(lambda: len(by_source) >= min_sources, timeout=overall_timeout)
+        if grace and len(by_source) < len(sources):
+            cond.wait_for(lambda: len(by_source) >= len(sources), timeout=grace)
+        return merged()
+
+def prefetch_full_texts(articles):
+    """
+    선택지로 제시된 기사들의 본문을 백그라운드에서 미리 가져와 캐시에 저장.
+    사용자가 기사를 고르는 동안 실행되어, 선택 후 search_all_text는 네트워크 대기 없이 반환된다.
+    """
+    for article in articles:
+        url = article.get("link")
+        if not url:
+            continue
+        with _full_text_lock:
+            if url in _full_text_inflight:
+                continue
+            future = _prefetch_executor.submit(propagate(_fetch_article_text), article)
+            _full_text_inflight[url] = future
+        future.add_done_callback(lambda _, url=url: _discard_inflight(url))
 
-    return l_news + w_news
+def _discard_inflight(url):
+    with _full_text_lock:
+        _full_text_inflight.pop(url, None)
 
 def search_all_text(list_dict):
+    # 진행 중인 prefetch가 있으면 그 결과를 기다림
+    with _full_text_lock:
+        future = _full_text_inflight.get(list_dict.get('link'))
+    if future is not None:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[NEWS] prefetch failed, refetching: {e}")
+
+    return _fetch_article_text(list_dict)
+
+def _fetch_article_text(list_dict):
     if list_dict['source'] == "매일노동법률":
         text = get_labortoday_full_text(list_dict['link'])
     elif list_dict['source'] == "월간노동법률":
         text = get_worklaw_full_text(list_dict['link'])
+    elif list_dict['source'] == "네이버뉴스":
+        text = get_article_full_text(list_dict['link'])
     else:
         raise ValueError("가져올 수 없는 기사입니다.")
     
@@ -2,19 +2,27 @@ from datetime import datetime
 import json
 import math
 import os
+import threading
 import streamlit as st
 
 from src.embeddings import get_embedding
-from src.rag.load_index import load_chroma_collection, search_vector_store
-from src.newsletter.news_searcher import search_all_newslist, search_all_text
+from src.rag.load_index import get_chroma_client, search_multiple_collections
+from src.newsletter.news_searcher import search_all_newslist, search_all_text, prefetch_full_texts, dedupe_articles
 from src.newsletter.policy_search import search_press_release
 from src.newsletter.newsletter_renderer import NewsletterRenderer
 from src.utils.storage import save_html
+from src.utils.llm import chat_completion
+from src.utils.metering import metered_agent
+from src.utils.timing import stage
+from src.utils.tracing import traced
 from openai import OpenAI
 
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# 자문사례 검색 기간: 최근 N년(올해 포함)의 질의회시만 검색 (0 = 전체, 기간 분할 컬렉션이면 오래된 분할은 건너뜀)
+CONSULT_RECENT_YEARS = int(os.getenv("NEWSLETTER_CONSULT_YEARS", "0"))
+
 # KK = NewsletterAgent()
 # KK.run()
 # KK.state['articles']
@@ -52,6 +60,7 @@ class NewsletterAgent:
         self._selected_policy_items = None
         self._news_options = None
         self._consult_options = None
+        self._news_options_lock = threading.Lock()
 
          # 멀티턴 진행 상태
         self._phase = self.PHASE_ASK_NEWS_TOPIC
@@ -76,6 +85,8 @@ class NewsletterAgent:
         self._consult_options = None
         self._phase = self.PHASE_ASK_NEWS_TOPIC
 
+    @traced("NewsletterAgent.run_steps")
+    @metered_agent("NewsletterAgent")
     def run_steps(self, user_input: str):
         # Check for the INITIAL state first, regardless of user input content.
         print('### 뉴스레터 작성 에이전트 시작 ###')
@@ -93,13 +104,17 @@ class NewsletterAgent:
             # Case: User has provided a subject (e.g., "산재"). Execute search immediately.
             self.state["news_topic"] = user_input
 
-            # Execute search
-            print('searching news...')
-            results = self.search_news_sources(user_input)
-            self._news_options = results
-            
             # Transition to waiting for the user to pick one of the options
+            # (검색 전에 전환해야 검색 반환 직전에 도착한 늦은 소스 결과도 옵션에 반영된다)
+            print('searching news...')
+            self._news_options = []
             self._phase = self.PHASE_AWAITING_NEWS_PICK
+            try:
+                self.search_news_sources(user_input)
+            except Exception:
+                self._phase = self.PHASE_SET_NEWS_TOPIC
+                raise
+            results = self._news_options
             return {"type": "options_news", "content": results, "message": f"'{user_input}'(으)로 검색된 뉴스 기사 목록입니다. **하나를 선택**해 주세요."}
         
         # --- PHASE 3/4: CONSULT TOPIC START/INPUT ---
@@ -157,16 +172,40 @@ class NewsletterAgent:
     # ===========================
     def search_news_sources(self, topic: str):
         self.state["news_topic"] = topic
-        return search_all_newslist(topic)
+        with stage("newsletter.news_search"):
+            # 가장 빠른 소스가 응답하면 바로 선택지를 보여주고, 나머지 소스 결과는 도착하는 대로 옵션에 반영
+            results = search_all_newslist(
+                topic, min_sources=1, grace=2.0,
+                on_update=lambda articles: self._update_news_options(topic, articles),
+            )
+        self._update_news_options(topic, results)
+        return results
+
+    def _update_news_options(self, topic, articles):
+        # 사용자가 아직 기사를 고르는 중이고 같은 주제일 때만 갱신.
+        # 이미 보여준 선택지는 그대로 두고(순서 / 제목 유지) 기존 옵션과 중복되지 않는 기사만 뒤에 붙인다
+        with self._news_options_lock:
+            if self._phase != self.PHASE_AWAITING_NEWS_PICK or self.state["news_topic"] != topic:
+                return
+            current = self._news_options or []
+            added = dedupe_articles(current + list(articles))[len(current):]
+            if not added:
+                return
+            self._news_options = current + added
+        # 사용자가 기사를 고르는 동안 본문을 미리 가져옴
+        prefetch_full_texts(added)
 
     def choose_news_source(self, selected_title):
 
         if not self._news_options:
             raise Exception("뉴스 옵션이 없습니다. 먼저 검색을 실행해야 합니다.")
 
-        chosen = next(item for item in self._news_options if item["title"] == selected_title)
+        chosen = next((item for item in self._news_options if item["title"] == selected_title), None)
+        if chosen is None:
+            raise Exception(f"선택한 기사('{selected_title}')가 뉴스 옵션에 없습니다. 목록에서 다시 선택해 주세요.")
         self._selected_news_source = chosen
-        self._raw_articles = search_all_text(chosen)
+        with stage("newsletter.full_text_fetch"):
+            self._raw_articles = search_all_text(chosen)
 
         self._phase = self.PHASE_ASK_CONSULT_TOPIC
         return chosen
@@ -174,19 +213,20 @@ class NewsletterAgent:
     # ===========================
     # 2) 자문사례 검색 및 선택
     # ===========================
-    def search_consult_sources(self, topic: str):
-        moel_iqrs = load_chroma_collection(
-            load_dir="db/chroma_index",
-            collection_name="moel_iqrs"
-        )[0]
-
-        results = search_vector_store(
-            collection=moel_iqrs,
+    def search_consult_sources(self, topic: str, date_from=None, date_to=None):
+        if date_from is None and CONSULT_RECENT_YEARS > 0:
+            date_from = str(datetime.today().year - CONSULT_RECENT_YEARS + 1)
+
+        results = search_multiple_collections(
+            client=get_chroma_client(),
+            collection_names=["moel_iqrs"],
             query=topic,
             get_embedding_fn=get_embedding,
-            top_k=5
-        )   
-        return results
+            top_k=5,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return [r["document"] for r in results]
 
     def choose_consult_source(self, selected_title):
         if not self._consult_options:
@@ -201,8 +241,10 @@ class NewsletterAgent:
     # ===========================
     # 3) 정책자료 검색 및 선택
     # ===========================
-    def search_policy_sources(self, max_page=3):
-        results = search_press_release(max_page)
+    def search_policy_sources(self, max_page=3, date_from=None, date_to=None):
+        # 로컬 보도자료 인덱스에서 조회 (필요 시 증분 갱신)
+        with stage("newsletter.policy_search"):
+            results = search_press_release(max_page, date_from=date_from, date_to=date_to)
         self._selected_policy_items = results 
         return results
 
@@ -272,7 +314,8 @@ class NewsletterAgent:
             {"role": "user", "content": f"뉴스 기사 전문:\n{self._raw_articles}"}
             ]
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "newsletter.create_article_section",
             model="gpt-4o",
             messages=session,
             response_format={"type": "json_object"},
@@ -342,7 +385,8 @@ class NewsletterAgent:
             {"role": "user", "content": f"질의회시 전문:\n{self._raw_consult}"}
             ]
 
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client, "newsletter.create_consult_section",
             model="gpt-4o",
             messages=session,
             response_format={"type": "json_object"},
@@ -380,18 +424,23 @@ class NewsletterAgent:
     # ===========================
     # 9) 전체 실행 run()
     # ===========================
+    @traced("NewsletterAgent.run")
+    @metered_agent("NewsletterAgent")
     def run(self):
         print("\n=== 뉴스레터 생성 프로세스 시작 ===")
         if self._phase != self.PHASE_READY_TO_GENERATE:
             raise ValueError("아직 모든 선택이 완료되지 않았습니다.")
 
         self.create_main_title()
-        self.create_article_section()
-        self.create_consult_section()
+        with stage("newsletter.llm.create_article_section"):
+            self.create_article_section()
+        with stage("newsletter.llm.create_consult_section"):
+            self.create_consult_section()
         self.create_policy_section()
 
         # 1. Capture the final HTML content
-        final_html_content = self.render_html()
+        with stage("newsletter.render_html"):
+            final_html_content = self.render_html()
 
         print("\n### 뉴스레터 생성이 완료되었습니다! ###")
         
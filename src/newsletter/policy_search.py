@@ -2,18 +2,14 @@
 고용노동부 보도자료 모듈
 """
 
-from bs4 import BeautifulSoup
-import json
 import re
 import requests
 import time
-import sqlite3
-import datetime
 from pathlib import Path
-import sys
 import urllib3
-from src.embeddings import get_embedding
-from src.rag.build_index import add_documents
+from src.utils import db, http
+from src.utils.html_parser import parse_html, table_rows
+from src.utils.tracing import span
 
 
 # -------------------------
@@ -22,10 +18,16 @@ from src.rag.build_index import add_documents
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 try:
-    BASE_DIR = Path(__file__).resolve().parent.parent
+    BASE_DIR = Path(__file__).resolve().parent.parent.parent
 except NameError:
     BASE_DIR = Path.cwd()
 
+OUTPUT_DB = "moel_press.db"
+DB_PATH = BASE_DIR / "db" / OUTPUT_DB
+PAGE_SIZE = 10  # 목록 페이지당 보도자료 수
+REFRESH_INTERVAL = 60 * 60  # 초
+DATE_PATTERN = re.compile(r"(\d{4})[.\-/](\d{1,2})[.\-/](\d{1,2})")
+
 BASE_LIST_URL = "https://www.moel.go.kr/news/enews/report/enewsList.do"
 BASE_DETAIL_URL = "https://www.moel.go.kr/news/enews/report/"
 BASE_URL = "https://labor.moel.go.kr"
@@ -33,49 +35,155 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; YourBot/1.0; +youremail@example.com)"
 }
 
+# -------------------------
+# 0-1) DB 초기화
+# -------------------------
+def init_db():
+    with db.transaction(DB_PATH) as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS moel_press_release (
+                link TEXT PRIMARY KEY,
+                title TEXT,
+                date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_moel_press_release_date ON moel_press_release (date)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS refresh_log (
+                name TEXT PRIMARY KEY,
+                refreshed_at REAL
+            )
+        """)
+
 # -------------------------
 # 1) 리스트 페이지 XHR 요청 (HTML 예시)
 # -------------------------
+def normalize_date(text):
+    """'2025.05.23' / '2025-05-23' 형태를 'YYYY-MM-DD'로 변환 (없으면 빈 문자열)"""
+    match = DATE_PATTERN.search(text or "")
+    if not match:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
 def fetch_press_list(page_index):
     params = {"pageIndex": page_index}
-    resp = requests.get(BASE_LIST_URL, headers=HEADERS, params=params, timeout=30, verify=False)
-    resp.raise_for_status()
+    with span("crawler.press_release.list_page", page=page_index) as sp:
+        resp = http.get(BASE_LIST_URL, headers=HEADERS, params=params, timeout=30, verify=False)
+        resp.raise_for_status()
+        sp.set_attribute("bytes", len(resp.content))
 
-    soup = BeautifulSoup(resp.text, "html5lib")
-    soup.find_all("td")
-    td_list = soup.find_all("td")
+    return parse_press_list(resp.text)
 
+def parse_press_list(html):
     results = []
 
-    for td in td_list:
-        a_tag = td.find("a")
-        if a_tag:
-            title = a_tag.get_text(strip=True)
-            link = a_tag.get("href")
-            results.append({"title": title, "link": BASE_DETAIL_URL + link})
+    for tr in table_rows(parse_html(html)):
+        a_tag = tr.select_one("a")
+        if not a_tag:
+            continue
+        title = a_tag.text()
+        link = a_tag.attr("href")
+        date = next(
+            (normalize_date(td.text()) for td in tr.select("td") if normalize_date(td.text())),
+            "",
+        )
+        results.append({"title": title, "link": BASE_DETAIL_URL + link, "date": date})
     
     return results
 
 # -------------------------
-# 2) 메인
+# 2) 로컬 인덱스 증분 갱신
 # -------------------------
-def search_press_release(max_pages=None):
-    
+def get_last_refreshed():
+    row = db.query_one(DB_PATH, "SELECT refreshed_at FROM refresh_log WHERE name = 'press_release'")
+    return row["refreshed_at"] if row else None
+
+def refresh_press_releases(max_pages=None):
+    """
+    보도자료 목록을 1페이지부터 읽어 신규 항목만 저장.
+    이미 저장된 항목을 만나면 그 이후는 모두 기존 데이터이므로 중단한다. (질의회시 크롤러와 동일)
+    """
+    init_db()
+
     page_index = 1
+    new_items = []
     stop_flag = False
 
-    rslt = []
-
     while True:
-        # Stop if we've reached max_pages (if max_pages is not None)
         if max_pages is not None and page_index > max_pages:
             break
 
-        html = fetch_press_list(page_index)
-        
-        rslt.extend(html)
-        # print(f"[INFO] Page {page_index} crawled, {len(html)} items")
+        page_items = fetch_press_list(page_index)
+        if not page_items:
+            break
+
+        for item in page_items:
+            if db.query_one(DB_PATH, "SELECT 1 FROM moel_press_release WHERE link = ?", (item["link"],)):
+                print("[STOP] Reached existing press release. Stopping incremental refresh.")
+                stop_flag = True
+                break
+            new_items.append(item)
+
+        if stop_flag:
+            break
+
         page_index += 1
         time.sleep(0.2)
 
-    return rslt
+    with db.transaction(DB_PATH) as cur:
+        cur.executemany("""
+            INSERT OR IGNORE INTO moel_press_release (link, title, date)
+            VALUES (?, ?, ?)
+        """, [(item["link"], item["title"], item["date"]) for item in new_items])
+        cur.execute("INSERT OR REPLACE INTO refresh_log (name, refreshed_at) VALUES ('press_release', ?)", (time.time(),))
+
+    print(f"[DB] Saved {len(new_items)} new press releases to {DB_PATH}")
+    return len(new_items)
+
+# -------------------------
+# 3) 메인 (로컬 인덱스 조회)
+# -------------------------
+def search_press_release(max_pages=None, date_from=None, date_to=None, limit=None, refresh=None):
+    """
+    로컬 인덱스에서 최신 보도자료 목록 반환.
+    - refresh: True면 항상, None이면 마지막 갱신 후 REFRESH_INTERVAL이 지난 경우에만 증분 갱신
+    - date_from / date_to: 'YYYY-MM-DD' 또는 'YYYY.MM.DD' (양 끝 포함)
+    - limit: 반환 개수 (기본: max_pages * PAGE_SIZE, max_pages도 없으면 전체)
+    """
+    init_db()
+
+    if refresh is None:
+        last_refreshed = get_last_refreshed()
+        refresh = last_refreshed is None or time.time() - last_refreshed > REFRESH_INTERVAL
+    if refresh:
+        try:
+            refresh_press_releases(max_pages=max_pages)
+        except requests.RequestException as e:
+            # 사이트 장애 시에도 로컬 인덱스로 응답
+            print(f"[WARN] Press release refresh failed: {e}")
+
+    where, params = [], []
+    if date_from:
+        where.append("date >= ?")
+        params.append(normalize_date(date_from))
+    if date_to:
+        where.append("date <= ?")
+        params.append(normalize_date(date_to))
+    if limit is None and max_pages is not None:
+        limit = max_pages * PAGE_SIZE
+
+    sql = "SELECT title, link, date FROM moel_press_release"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY date DESC, created_at DESC, rowid ASC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with span("press_release.index_query", date_from=date_from or "", date_to=date_to or "") as sp:
+        rows = db.query(DB_PATH, sql, params)
+        sp.set_attribute("results", len(rows))
+
+    return rows
@@ -0,0 +1,105 @@
+# rag/aliases.py
+"""
+Chroma 컬렉션 별칭(alias)
+
+검색 / 크롤러는 논리 이름(moel_iqrs 등)을 쓰고, 실제 컬렉션은 별칭 파일이 가리키는 버전(moel_iqrs__v20261019...)이다.
+재구축(rebuild.py)은 새 버전 컬렉션을 모두 채운 뒤 별칭 파일만 os.replace로 교체하므로
+검색 중단 없이 전환되고, 이전 버전을 previous로 남겨 즉시 롤백할 수 있다.
+별칭이 없는 이름은 그대로 실제 컬렉션 이름으로 사용한다.
+기간 분할된 컬렉션은 <실제 이름>__p<기간> 여러 개로 저장된다 (rag/partitions.py).
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+
+ALIAS_PATH = Path(os.getenv("CHROMA_ALIAS_PATH", "db/chroma_aliases.json"))
+VERSION_SEP = "__v"
+PARTITION_SEP = "__p"
+
+_cache = {"key": None, "aliases": {}}
+
+
+def load_aliases(path=ALIAS_PATH):
+    """별칭 파일 (mtime이 바뀌었을 때만 다시 읽음)"""
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return {}
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if _cache["key"] != key:
+        try:
+            aliases = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return _cache["aliases"]  # 마지막으로 읽은 내용 유지
+        _cache.update(key=key, aliases=aliases)
+    return _cache["aliases"]
+
+
+def resolve_collection(name, path=ALIAS_PATH):
+    return load_aliases(path).get(name, {}).get("current", name)
+
+
+def version_of(name):
+    """버전 컬렉션(또는 그 기간 분할)이면 논리 이름, 아니면 None"""
+    base, sep, _ = name.partition(VERSION_SEP)
+    return base if sep else None
+
+
+def base_of(name):
+    """기간 분할 컬렉션이면 분할 전 이름 (moel_iqrs__v1__p2023 -> moel_iqrs__v1), 아니면 그대로"""
+    return name.partition(PARTITION_SEP)[0]
+
+
+def logical_name(name):
+    """버전 / 기간 분할 접미사를 뗀 논리 이름"""
+    base = base_of(name)
+    return version_of(base) or base
+
+
+def list_collections(client, path=ALIAS_PATH):
+    """검색 대상 논리 컬렉션 이름 (버전 컬렉션 / 기간 분할 컬렉션은 별칭 이름 하나로 합침)"""
+    existing = list(dict.fromkeys(base_of(c.name) for c in client.list_collections()))
+    aliases = load_aliases(path)
+    names = [name for name, entry in aliases.items() if entry.get("current") in existing]
+    names += [name for name in existing if version_of(name) is None and name not in names]
+    return names
+
+
+def _write(aliases, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(aliases, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)  # 원자적 교체: 읽는 쪽은 이전 / 새 파일 중 하나만 본다
+
+
+def set_alias(name, target, path=ALIAS_PATH):
+    """name -> target 전환. 직전 대상은 previous로 남긴다"""
+    aliases = dict(load_aliases(path))
+    entry = aliases.get(name, {})
+    previous = entry.get("current", name)
+    aliases[name] = {
+        "current": target,
+        "previous": previous if previous != target else entry.get("previous"),
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _write(aliases, path)
+    return previous
+
+
+def rollback_alias(name, path=ALIAS_PATH):
+    aliases = dict(load_aliases(path))
+    entry = aliases.get(name)
+    if not entry or not entry.get("previous"):
+        raise ValueError(f"No previous version recorded for collection alias '{name}'")
+    aliases[name] = {
+        "current": entry["previous"],
+        "previous": entry["current"],
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _write(aliases, path)
+    return entry["previous"]
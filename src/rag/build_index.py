@@ -1,13 +1,20 @@
 # rag/build_chroma_index.py
 
-import json
 from pathlib import Path
-from chromadb import PersistentClient
+
+from src.rag.index_config import hnsw_config
 
 
 DEFAULT_COLLECTION = "chunks"
 
-def initialize_collection(save_dir="db/chroma_index", collection_name=DEFAULT_COLLECTION):
+def initialize_collection(save_dir="db/chroma_index", collection_name=DEFAULT_COLLECTION, metadata=None, hnsw=None):
+    """
+    Get or create a collection.
+    metadata and the HNSW index settings (rag/index_config.py, hnsw overrides them) are only applied
+    when the collection is created.
+    """
+    from chromadb import PersistentClient
+
     save_dir = Path(save_dir)
     save_dir.mkdir(parents=True, exist_ok=True)
 
@@ -15,17 +22,25 @@ def initialize_collection(save_dir="db/chroma_index", collection_name=DEFAULT_CO
     if collection_name in [c.name for c in client.list_collections()]:
         collection = client.get_collection(name=collection_name)
     else:
-        collection = client.create_collection(name=collection_name)
+        collection = client.create_collection(
+            name=collection_name,
+            configuration={"hnsw": hnsw_config(collection_name, hnsw)},
+            metadata=metadata,
+        )
 
     return collection, client
 
 
 def add_documents(chunks, get_embedding_fn, save_dir="db/chroma_index",
-                  collection_name=DEFAULT_COLLECTION, auto_init=True):
+                  collection_name=DEFAULT_COLLECTION, auto_init=True, ids=None, metadatas=None, embeddings=None):
     """
     Append documents to a Chroma collection.
     If collection/DB doesn't exist and auto_init=True, initialize automatically.
+    If ids are given, documents are upserted so re-adding the same ids (e.g. a resumed crawl) is idempotent.
+    If embeddings are given (e.g. from one batched get_embeddings call), get_embedding_fn is not called;
+    otherwise each chunk is embedded with its own get_embedding_fn call.
     """
+    from chromadb import PersistentClient
 
     client = PersistentClient(path=str(save_dir))
 
@@ -39,11 +54,72 @@ def add_documents(chunks, get_embedding_fn, save_dir="db/chroma_index",
             raise FileNotFoundError(f"Collection '{collection_name}' not found in {save_dir}")
 
     # 임베딩 추가
-    new_embeddings = [get_embedding_fn(chunk) for chunk in chunks]
-    collection.add(
-        documents=chunks,
-        embeddings=new_embeddings,
-        ids=[str(i) for i in range(collection.count(), collection.count() + len(chunks))]
-    )
+    new_embeddings = list(embeddings) if embeddings is not None else [get_embedding_fn(chunk) for chunk in chunks]
+    if ids is not None:
+        collection.upsert(
+            documents=chunks,
+            embeddings=new_embeddings,
+            ids=[str(i) for i in ids],
+            metadatas=metadatas,
+        )
+    else:
+        collection.add(
+            documents=chunks,
+            embeddings=new_embeddings,
+            ids=[str(i) for i in range(collection.count(), collection.count() + len(chunks))],
+            metadatas=metadatas,
+        )
 
     return collection, client
+
+
+def upsert_embeddings(ids, documents, embeddings, metadatas=None, save_dir="db/chroma_index",
+                      collection_name=DEFAULT_COLLECTION, batch_size=1000):
+    """
+    Upsert documents with precomputed embeddings (no embedding API calls), batch_size rows per request.
+    Used to bulk-load a collection from a corpus snapshot.
+    """
+    collection, client = initialize_collection(save_dir, collection_name)
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.upsert(
+            ids=[str(i) for i in ids[start:end]],
+            documents=list(documents[start:end]),
+            embeddings=embeddings[start:end],
+            metadatas=metadatas[start:end] if metadatas is not None else None,
+        )
+    return collection, client
+
+
+def update_metadatas(ids, metadatas, save_dir="db/chroma_index", collection_name=DEFAULT_COLLECTION):
+    """Replace the metadata of existing documents (no re-embedding). Missing collections are ignored."""
+    from chromadb import PersistentClient
+
+    client = PersistentClient(path=str(save_dir))
+    if not ids or collection_name not in [c.name for c in client.list_collections()]:
+        return
+    client.get_collection(name=collection_name).update(ids=[str(i) for i in ids], metadatas=metadatas)
+
+
+def delete_documents(contains, predicate=None, keep_ids=(), save_dir="db/chroma_index",
+                     collection_name=DEFAULT_COLLECTION):
+    """
+    Delete documents whose text contains `contains` (and satisfies predicate(document), if given).
+    Used to drop stale copies of a document before it is re-embedded under a stable id.
+    Returns the deleted ids.
+    """
+    from chromadb import PersistentClient
+
+    client = PersistentClient(path=str(save_dir))
+    if collection_name not in [c.name for c in client.list_collections()]:
+        return []
+    collection = client.get_collection(name=collection_name)
+
+    found = collection.get(where_document={"$contains": contains}, include=["documents"])
+    ids = [
+        doc_id for doc_id, document in zip(found["ids"], found["documents"])
+        if doc_id not in keep_ids and (predicate is None or predicate(document))
+    ]
+    if ids:
+        collection.delete(ids=ids)
+    return ids
@@ -0,0 +1,122 @@
+# rag/compact.py
+"""
+프롬프트용 검색 결과 요약 레코드
+
+search_multiple_collections 결과(질의 / 회시 전문 문서)를 tool 메시지에 그대로 json.dumps하면
+결과 하나가 수 KB라 매 턴 프롬프트가 커진다. LLM에는 요약 레코드만 보내고,
+전문이 필요하면 id로 fetch_documents(load_index.py)를 호출하게 한다.
+- 레코드: id, collection, title, question(앞부분, 정규화했을 때 제목과 같으면 생략), snippet, link, date,
+  ref_no(질의회시 회시번호, 있을 때만), score(cosine 유사도, 없으면 distance)
+- snippet: 답변을 문장으로 나눠 질의와 글자 bigram이 가장 많이 겹치는 문장부터 SNIPPET_CHARS까지
+"""
+
+import math
+import re
+
+
+SNIPPET_CHARS = 300
+QUESTION_CHARS = 120
+
+# crawler.document_text 포맷 ("Title: ...\nQ: ...\nA: ...\nLink: ...[\nRef_no: ...]")
+_DOCUMENT_RE = re.compile(
+    r"^Title: (?P<title>.*?)\nQ: (?P<question>.*?)\nA: (?P<answer>.*?)\nLink: (?P<link>[^\n]*)"
+    r"(?:\nRef_no: (?P<ref_no>.*))?$",
+    re.S,
+)
+# 마침표 뒤 공백, 또는 공백 없이 이어 쓴 한국어 종결("~다.상담센터는")에서 문장을 나눈다 (날짜 / 조항 번호는 유지)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|(?<=[다요함음됨임][.!?])|\n+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def parse_document(document):
+    """문서 텍스트 -> {title, question, answer, link, ref_no} (포맷이 다르면 answer에 전체)"""
+    match = _DOCUMENT_RE.match(document or "")
+    if match is None:
+        return {"title": "", "question": "", "answer": document or "", "link": "", "ref_no": None}
+    return match.groupdict()
+
+
+def char_bigrams(text):
+    text = _SPACE_RE.sub("", str(text or "").lower())
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def shorten(text, limit):
+    text = _SPACE_RE.sub(" ", str(text or "")).strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def key_snippet(text, query, limit=SNIPPET_CHARS):
+    """text에서 query와 가장 많이 겹치는 문장부터 이어서 limit자 이내 (query가 없으면 앞부분)"""
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text or "") if s.strip()]
+    if not sentences:
+        return ""
+    query_grams = char_bigrams(query)
+    best = 0
+    if query_grams:
+        # 긴 문장이 겹치는 bigram 수만으로 뽑히지 않도록 길이의 제곱근으로 나눈다
+        scores = [len(char_bigrams(s) & query_grams) / math.sqrt(len(s)) for s in sentences]
+        best = max(range(len(sentences)), key=scores.__getitem__)
+    snippet = sentences[best]
+    for sentence in sentences[best + 1:]:
+        if len(snippet) + 1 + len(sentence) > limit:
+            break
+        snippet += " " + sentence
+    return shorten(snippet, limit)
+
+
+def compact_result(result, query):
+    parsed = parse_document(result.get("document"))
+    record = {
+        "id": result.get("id"),
+        "collection": result.get("collection"),
+        "title": shorten(parsed["title"], QUESTION_CHARS),
+    }
+    # 질문이 제목과 같을 때만 생략 (제목이 질문 앞부분일 뿐이면 뒤쪽 내용이 빠지므로 줄인 질문을 보낸다)
+    title, question = (_SPACE_RE.sub("", parsed[key]).rstrip(".…") for key in ("title", "question"))
+    if question and question != title:
+        record["question"] = shorten(parsed["question"], QUESTION_CHARS)
+    record.update({
+        "snippet": key_snippet(parsed["answer"], query),
+        "link": parsed["link"],
+        "date": result.get("date") or "",
+    })
+    if (parsed["ref_no"] or "").strip():
+        record["ref_no"] = parsed["ref_no"].strip()
+    if "score" in result:
+        record["score"] = result["score"]
+    else:
+        record["distance"] = round(float(result["distance"]), 4)
+    if result.get("duplicates"):
+        record["duplicates"] = result["duplicates"]
+    if result.get("near_duplicates"):
+        record["near_duplicates"] = [
+            {"title": shorten(p["title"], QUESTION_CHARS), "link": p["link"]}
+            for p in map(parse_document, result["near_duplicates"])
+        ]
+    return record
+
+
+def compact_results(results, query):
+    """search_multiple_collections 결과 -> tool 메시지용 요약 레코드 목록"""
+    return [compact_result(result, query) for result in results]
+
+
+def format_documents(results, full_text=3, query=""):
+    """
+    프롬프트에 넣을 평문 블록 (Python repr 대신). 앞의 full_text개는 질의 / 답변 전문,
+    나머지는 요약(질문 앞부분 + snippet)만 넣는다
+    """
+    blocks = []
+    for rank, result in enumerate(results, 1):
+        parsed = parse_document(result.get("document"))
+        header = f"[{rank}] {shorten(parsed['title'], QUESTION_CHARS) or result.get('id', '')}"
+        if result.get("date"):
+            header += f" ({result['date']})"
+        if rank <= full_text:
+            body = f"질의: {parsed['question'].strip()}\n응답: {parsed['answer'].strip()}"
+        else:
+            body = (f"질의: {shorten(parsed['question'], QUESTION_CHARS)}\n"
+                    f"응답(요약): {key_snippet(parsed['answer'], query)}")
+        blocks.append(f"{header}\n{body}\nlink: {parsed['link']}")
+    return "\n\n".join(blocks)
@@ -0,0 +1,51 @@
+# rag/index_config.py
+"""
+Chroma 컬렉션별 HNSW 인덱스 설정
+
+컬렉션을 만들 때(initialize_collection) 논리 이름(별칭 / 버전 접미사 제외) 기준 설정을 configuration으로 넘긴다.
+- space / max_neighbors(M) / ef_construction: 생성 시 고정 -> 바꾸려면 rebuild (scripts/rebuild_collections.py build --m 32 ...)
+- ef_search: 검색 시 후보 수, 기존 컬렉션에서도 바로 변경 가능 (set_ef_search)
+
+검색은 여러 컬렉션의 distance를 합쳐 정렬하므로 space는 모든 컬렉션이 같아야 한다.
+"""
+
+from src.rag.aliases import logical_name
+
+
+# Chroma 기본값과 같음 (l2, M=16, ef_construction=100, ef_search=100)
+DEFAULT_HNSW = {
+    "space": "l2",
+    "max_neighbors": 16,
+    "ef_construction": 100,
+    "ef_search": 100,
+}
+
+# 논리 컬렉션별 설정 (DEFAULT_HNSW 위에 덮어씀)
+HNSW_CONFIG = {
+    "moel_iqrs": {},
+    "moel_fastcounsel": {},
+}
+
+SPACES = ("l2", "cosine", "ip")
+REBUILD_KEYS = ("space", "max_neighbors", "ef_construction")
+
+
+def hnsw_config(collection_name, overrides=None):
+    """collection_name(버전 / 기간 분할 컬렉션 이름도 가능)의 HNSW 설정, overrides의 None이 아닌 값이 우선"""
+    config = {**DEFAULT_HNSW, **HNSW_CONFIG.get(logical_name(collection_name), {})}
+    config.update({key: value for key, value in (overrides or {}).items() if value is not None})
+    if config["space"] not in SPACES:
+        raise ValueError(f"Unknown HNSW space '{config['space']}', expected one of {SPACES}")
+    return config
+
+
+def current_hnsw(collection):
+    """생성된 컬렉션에 실제 적용된 HNSW 설정 (DEFAULT_HNSW 항목만)"""
+    applied = (collection.configuration_json or {}).get("hnsw") or {}
+    return {key: applied[key] for key in DEFAULT_HNSW if key in applied}
+
+
+def set_ef_search(collection, ef_search):
+    """재구축 없이 검색 후보 수만 변경 (값이 클수록 recall↑ / 지연↑)"""
+    collection.modify(configuration={"hnsw": {"ef_search": int(ef_search)}})
+    return current_hnsw(collection)
@@ -1,14 +1,40 @@
 # rag/load_chroma_index.py
 
-import json
+import os
+import time
 from pathlib import Path
-from chromadb import PersistentClient
+from src.rag.aliases import list_collections, resolve_collection
+from src.rag.partitions import covers, in_range, list_partitions, parse_date, route
+from src.utils.timing import stage
+from src.utils.tracing import traced
+
+
+# chroma(기본) | quantized: db/quantized/<컬렉션>이 있으면 양자화 저장소로 검색 (rag/quantized_store.py)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+# 기간 조건이 분할 일부에만 걸칠 때 날짜로 걸러낼 것을 감안해 더 가져오는 배수
+DATE_FILTER_OVERFETCH = 3
+
+_clients = {}
+
+
+def get_chroma_client(load_dir="db/chroma_index"):
+    """프로세스 내에서 경로별로 하나의 PersistentClient를 공유 (warmup한 세그먼트를 검색이 그대로 사용)"""
+    key = str(Path(load_dir))
+    if key not in _clients:
+        from chromadb import PersistentClient
+
+        Path(load_dir).mkdir(parents=True, exist_ok=True)
+        _clients[key] = PersistentClient(path=key)
+    return _clients[key]
 
 
 def load_chroma_collection(load_dir="db/chroma_index", collection_name="default"):
     """
     Load a persisted Chroma DB collection.
+    collection_name may be an alias (see rag/aliases.py); it is resolved to the current version.
     """
+    from chromadb import PersistentClient
+
     load_dir = Path(load_dir)
     load_dir.mkdir(parents=True, exist_ok=True)
 
@@ -16,8 +42,9 @@ def load_chroma_collection(load_dir="db/chroma_index", collection_name="default"
     client = PersistentClient(path=str(load_dir))
 
     # 컬렉션 존재 여부 확인
-    if collection_name in [c.name for c in client.list_collections()]:
-        collection = client.get_collection(name=collection_name)
+    physical_name = resolve_collection(collection_name)
+    if physical_name in [c.name for c in client.list_collections()]:
+        collection = client.get_collection(name=physical_name)
     else:
         raise FileNotFoundError(f"Collection '{collection_name}' not found in {load_dir}")
 
@@ -28,12 +55,14 @@ def search_vector_store(collection, query, get_embedding_fn, top_k=5):
     """
     Chroma collection에서 검색 후 원문 반환
     """
-    query_emb = get_embedding_fn(query)
+    with stage("embedding"):
+        query_emb = get_embedding_fn(query)
 
-    result = collection.query(
-        query_embeddings=[query_emb],
-        n_results=top_k
-    )
+    with stage("vector_search", collection=collection.name, top_k=top_k):
+        result = collection.query(
+            query_embeddings=[query_emb],
+            n_results=top_k
+        )
 
     # Chroma query 결과에서 바로 documents 가져오기
     docs = result["documents"][0]
@@ -41,34 +70,221 @@ def search_vector_store(collection, query, get_embedding_fn, top_k=5):
     return docs
 
 
-def search_multiple_collections(client, collection_names, query, get_embedding_fn, top_k=5):
+_stale_stores = set()
+
+
+def quantized_available(collection_name, collection=None):
+    """
+    양자화 저장소로 검색할 수 있는지. collection(원본 Chroma 컬렉션)을 주면
+    저장소를 만든 뒤 글이 추가 / 삭제된 경우(문서 수가 다름) False -> Chroma로 검색
+    """
+    from src.rag.quantized_store import available, load_store
+
+    if VECTOR_STORE != "quantized" or not available(collection_name):
+        return False
+    if collection is None:
+        return True
+    count = collection.count()
+    if load_store(collection_name).is_fresh(count):
+        return True
+    if (collection_name, count) not in _stale_stores:
+        _stale_stores.add((collection_name, count))
+        print(f"[QUANTIZED] {collection_name} is stale (collection has {count} documents); searching Chroma "
+              f"until scripts/quantize_collections.py build is rerun")
+    return False
+
+
+def _search_quantized(collection_name, query_emb, top_k, include_embeddings=False):
+    """양자화 저장소 검색 (int8 / float16 1차 검색 + float32 재채점)"""
+    from src.rag.quantized_store import load_store
+
+    store = load_store(collection_name)
+    with stage("vector_search", collection=collection_name, top_k=top_k, store=store.dtype) as sp:
+        results = store.query(query_emb, top_k=top_k, include_embeddings=include_embeddings)
+        sp.set_attribute("results", len(results))
+    return ([r["id"] for r in results], [r["document"] for r in results], [r["distance"] for r in results],
+            [r["metadata"] for r in results], [r.get("embedding") for r in results])
+
+
+@traced("rag.warmup_collections")
+def warmup_collections(client=None, collection_names=None):
+    """
+    컬렉션마다 저장된 벡터 1개로 query를 한 번 보내 HNSW 세그먼트를 미리 메모리에 올린다.
+    (임베딩 API는 호출하지 않음) 앱 시작 시 실행하면 첫 사용자 질의도 이후 질의와 같은 속도로 검색된다.
+    {컬렉션: 소요 초} 반환
+    """
+    client = client or get_chroma_client()
+    existing = [c.name for c in client.list_collections()]
+    timings = {}
+    for name in collection_names or list_collections(client):
+        for physical_name in list_partitions(existing, resolve_collection(name)).values():
+            start = time.perf_counter()
+            with stage("vector_warmup", collection=name, partition=physical_name):
+                try:
+                    collection = client.get_collection(physical_name)
+                    if quantized_available(physical_name, collection):
+                        from src.rag.quantized_store import load_store
+
+                        load_store(physical_name)
+                    else:
+                        sample = collection.get(limit=1, include=["embeddings"])
+                        if len(sample["ids"]):
+                            collection.query(query_embeddings=[sample["embeddings"][0]], n_results=1,
+                                             include=["distances"])
+                except Exception as e:
+                    print(f"[WARMUP] {physical_name} failed: {e}")
+                    continue
+            timings[physical_name] = round(time.perf_counter() - start, 3)
+            print(f"[WARMUP] {name} ({physical_name}) loaded in {timings[physical_name]}s")
+    return timings
+
+
+def expand_cluster(collection_name, qnum, limit=None):
+    """대표 글(qnum)에 묶인 근접 중복 글의 문서 (utils/near_dup.py, 유사도 높은 순)"""
+    import importlib
+    from src.rag.rebuild import SOURCES
+
+    if collection_name not in SOURCES or not qnum:
+        return []
+    crawler = importlib.import_module(SOURCES[collection_name])
+    with stage("near_dup_expand", collection=collection_name, qnum=qnum):
+        rows = crawler.get_near_dups().member_rows(qnum, limit)
+    return [crawler.document_text(row) for row in rows]
+
+
+def fetch_documents(ids, client=None, collection_names=None):
+    """
+    검색 결과 id의 전체 문서 {id: 문서, 없으면 None}.
+    qnum id(iqrs-<qnum> 등)는 크롤러 DB에서 읽고, 그 밖의 id(순번 id로 만든 이전 컬렉션)는 컬렉션에서 찾는다
+    """
+    import importlib
+    from src.rag.rebuild import SOURCES
+
+    documents = {str(doc_id): None for doc_id in ids}
+    with stage("fetch_documents", ids=len(documents)):
+        for name, module in SOURCES.items():
+            crawler = importlib.import_module(module)
+            prefix = crawler.vector_id("")
+            qnums = {doc_id[len(prefix):]: doc_id for doc_id in documents if doc_id.startswith(prefix)}
+            if not qnums:
+                continue
+            for batch in crawler.iter_saved_records(where=f"qnum IN ({','.join('?' * len(qnums))})",
+                                                    params=tuple(qnums)):
+                for row in batch:
+                    documents[qnums[str(row["qnum"])]] = crawler.document_text(row)
+
+        missing = [doc_id for doc_id, document in documents.items() if document is None]
+        if missing:
+            client = client or get_chroma_client()
+            existing = [c.name for c in client.list_collections()]
+            for name in collection_names or list_collections(client):
+                for physical_name in list_partitions(existing, resolve_collection(name)).values():
+                    got = client.get_collection(physical_name).get(ids=missing, include=["documents"])
+                    documents.update(zip(got["ids"], got["documents"]))
+    return documents
+
+
+@traced("rag.search_multiple_collections")
+def search_multiple_collections(client, collection_names, query, get_embedding_fn, top_k=5,
+                                date_from=None, date_to=None, expand_duplicates=0, diversify=None, rerank=None):
     """
     Search multiple Chroma collections and merge results.
-    
-    Returns top_k results sorted by distance.
+    Collection names are aliases resolved to their current version; results report the alias name.
+    Time-partitioned collections (rag/partitions.py) only query the partitions overlapping
+    date_from ~ date_to ("2024", "2024.07", "2024.07.01"; either may be omitted).
+    Near-duplicates are folded into one canonical document; results report their count as "duplicates",
+    and expand_duplicates=N attaches up to N of them to each result as "near_duplicates".
+    With diversify (default RETRIEVAL_DIVERSIFY), top_k * FETCH_FACTOR candidates are fetched and
+    rag/postprocess.py drops weak matches and picks diverse ones with MMR, so fewer than top_k may be returned.
+
+    rerank ("lexical" | "cross-encoder", default RETRIEVAL_RERANK) over-fetches RERANK_CANDIDATES candidates
+    and reorders them with a local CPU scorer (rag/rerank.py) before the final selection.
+    Each result carries the vector "id" (full text via fetch_documents) and, when diversified or reranked,
+    a "score" (cosine similarity, or the rerank score).
+
+    Returns up to top_k results (sorted by distance, or in MMR selection order when diversified).
     """
     print("# MCP: search_multiple_collections")
-    query_emb = get_embedding_fn(query)
+    from src.rag import postprocess, rerank as reranker
+
+    diversify = postprocess.DIVERSIFY if diversify is None else diversify
+    rerank = reranker.RERANK if rerank is None else (rerank or "off")
+    fetch_k = top_k * postprocess.FETCH_FACTOR if diversify else top_k
+    if rerank != "off":
+        fetch_k = max(fetch_k, reranker.RERANK_CANDIDATES)
+    with_embeddings = diversify or rerank != "off"
+    include = ["documents", "distances", "metadatas"] + (["embeddings"] if with_embeddings else [])
+    date_from, date_to = parse_date(date_from), parse_date(date_to, end=True)
+    with stage("embedding"):
+        query_emb = get_embedding_fn(query)
+    existing = [c.name for c in client.list_collections()]
     all_results = []
+    embeddings = []
 
     for name in collection_names:
-        collection = client.get_collection(name)
-        print(name)
-        res = collection.query(
-            query_embeddings=[query_emb],
-            n_results=top_k
-        )
+        targets = route(existing, resolve_collection(name), date_from, date_to)
+        for key, physical_name in targets:
+            # 분할 일부만 기간에 걸치면 날짜로 걸러낼 만큼 더 가져온다
+            exact = covers(key, date_from, date_to)
+            n_results = fetch_k if exact else fetch_k * DATE_FILTER_OVERFETCH
+            collection = client.get_collection(physical_name)
+            if quantized_available(physical_name, collection):
+                ids, docs, distances, metadatas, vectors = _search_quantized(physical_name, query_emb, n_results,
+                                                                             include_embeddings=with_embeddings)
+            else:
+                with stage("vector_search", collection=name, partition=physical_name, top_k=n_results) as sp:
+                    res = collection.query(
+                        query_embeddings=[query_emb],
+                        n_results=n_results,
+                        include=include
+                    )
+                    sp.set_attribute("results", len(res["documents"][0]))
 
-        docs = res["documents"][0]
-        distances = res["distances"][0]
+                ids = res["ids"][0]
+                docs = res["documents"][0]
+                distances = res["distances"][0]
+                metadatas = res["metadatas"][0]
+                vectors = res["embeddings"][0] if with_embeddings else [None] * len(docs)
 
-        for doc, dist in zip(docs, distances):
-            all_results.append({
-                "collection": name,
-                "document": doc,
-                "distance": dist
-            })
+            for doc_id, doc, dist, metadata, vector in zip(ids, docs, distances, metadatas, vectors):
+                if not exact and not in_range((metadata or {}).get("date"), date_from, date_to):
+                    continue
+                result = {
+                    "id": doc_id,
+                    "collection": name,
+                    "document": doc,
+                    "distance": dist
+                }
+                if (metadata or {}).get("date"):
+                    result["date"] = metadata["date"]
+                if (metadata or {}).get("duplicates"):
+                    result["duplicates"] = metadata["duplicates"]
+                    result["qnum"] = metadata.get("qnum")
+                all_results.append(result)
+                embeddings.append(vector)
 
-    # 거리 기준 정렬 (작을수록 유사)
-    all_results.sort(key=lambda x: x["distance"])
-    return all_results[:top_k]
+    relevance = None
+    thresholds = {}
+    if rerank != "off" and all_results:
+        # 벡터 유사도 상위 후보를 로컬 reranker 점수 순으로 다시 정렬 (컷오프는 그 점수 척도의 기준으로)
+        all_results, embeddings, relevance, used = reranker.rerank(query, query_emb, all_results, embeddings, rerank)
+        thresholds = reranker.cutoff_thresholds(used)
+
+    if diversify and all_results:
+        # 약한 후보를 컷오프로 버리고 남은 후보에서 서로 겹치지 않는 문서를 MMR로 선택
+        with stage("retrieval_postprocess", candidates=len(all_results), top_k=top_k) as sp:
+            chosen, scores = postprocess.select(query_emb, embeddings, top_k, relevance=relevance, **thresholds)
+            results = [{**all_results[i], "score": round(float(score), 4)} for i, score in zip(chosen, scores)]
+            sp.set_attribute("results", len(results))
+    elif relevance is not None:
+        results = [{**result, "score": round(float(score), 4)}
+                   for result, score in zip(all_results[:top_k], relevance[:top_k])]
+    else:
+        # 거리 기준 정렬 (작을수록 유사)
+        all_results.sort(key=lambda x: x["distance"])
+        results = all_results[:top_k]
+    if expand_duplicates:
+        for result in results:
+            if result.get("duplicates"):
+                result["near_duplicates"] = expand_cluster(result["collection"], result["qnum"], expand_duplicates)
+    return results
@@ -0,0 +1,159 @@
+# rag/partitions.py
+"""
+기간 분할(partition) 벡터 컬렉션
+
+질의회시 / 빠른상담 벡터를 date(YYYY.MM.DD) 기준 연도(또는 분기)별 컬렉션 <실제 이름>__p<기간>에 나눠 저장한다.
+- moel_iqrs__v20261019...__p2023, moel_iqrs__p2024q3 처럼 버전 / 별칭 규칙(rag/aliases.py) 뒤에 붙는다
+- 검색은 요청한 기간(date_from ~ date_to)과 겹치는 분할만 query하고 결과를 합친다
+  (기간을 주지 않으면 모든 분할, 기간을 주면 날짜 없는 글(__pundated)은 제외)
+- 분할 없이 만든 기존 컬렉션(<실제 이름>이 그대로 있음)은 하나짜리로 취급하며,
+  rebuild(rebuild.py)로 새 버전을 만들 때 분할된다
+
+분할 단위는 VECTOR_PARTITION(year | quarter | none, 기본 year)이며 새로 만드는 컬렉션에만 적용된다.
+rebuild는 사용한 분할 단위(--partition-by)를 컬렉션 메타데이터 partition_by에 기록하고,
+크롤러의 증분 저장(ingest_groups)은 환경 변수가 아니라 현재 버전에 기록된 단위를 따른다.
+"""
+
+import calendar
+import os
+import re
+
+from src.rag.aliases import PARTITION_SEP
+
+
+PARTITION_BY = os.getenv("VECTOR_PARTITION", "year")
+SCHEMES = ("year", "quarter", "none")
+UNDATED = "undated"
+
+_KEY_RE = re.compile(r"^(\d{4})(?:q([1-4]))?$")
+
+
+def parse_date(value, end=False):
+    """
+    "2023.04.07" / "2023-04-07" / "2023.04" / "2023" -> (연, 월, 일). 형식이 다르면 None
+    end=True면 생략된 월 / 일을 기간의 마지막 날로 채운다 (date_to용)
+    """
+    parts = [int(p) for p in re.findall(r"\d+", str(value or ""))[:3]]
+    if not parts or len(str(parts[0])) != 4:
+        return None
+    year = parts[0]
+    month = parts[1] if len(parts) > 1 else (12 if end else 1)
+    if not 1 <= month <= 12:
+        return None
+    last_day = calendar.monthrange(year, month)[1]
+    day = parts[2] if len(parts) > 2 else (last_day if end else 1)
+    return year, month, min(max(day, 1), last_day)
+
+
+def partition_key(date, scheme=PARTITION_BY):
+    """글의 date -> 분할 키 ("2023", "2023q2", 날짜가 없으면 "undated")"""
+    parsed = parse_date(date)
+    if parsed is None:
+        return UNDATED
+    year, month, _ = parsed
+    if scheme == "quarter":
+        return f"{year}q{(month - 1) // 3 + 1}"
+    return str(year)
+
+
+def partition_range(key):
+    """분할 키 -> (첫날, 마지막 날) 튜플, undated 등은 None"""
+    match = _KEY_RE.match(key)
+    if not match:
+        return None
+    year, quarter = int(match.group(1)), match.group(2)
+    if quarter is None:
+        return (year, 1, 1), (year, 12, 31)
+    first_month = (int(quarter) - 1) * 3 + 1
+    last_month = first_month + 2
+    return (year, first_month, 1), (year, last_month, calendar.monthrange(year, last_month)[1])
+
+
+def partition_name(base, key):
+    return f"{base}{PARTITION_SEP}{key}"
+
+
+def list_partitions(existing, base):
+    """
+    base(실제 컬렉션 이름)에 속한 컬렉션 {분할 키: 이름}.
+    분할 없는 컬렉션이면 {None: base}, 아무것도 없으면 {}
+    """
+    if base in existing:
+        return {None: base}
+    prefix = base + PARTITION_SEP
+    return {name[len(prefix):]: name for name in sorted(existing) if name.startswith(prefix)}
+
+
+def overlaps(key, date_from=None, date_to=None):
+    """분할 key가 [date_from, date_to] 기간과 겹치는지 (분할 없는 컬렉션 key=None은 항상 True)"""
+    if key is None or (date_from is None and date_to is None):
+        return True
+    span = partition_range(key)
+    if span is None:
+        return False
+    start, end = span
+    return (date_to is None or start <= date_to) and (date_from is None or end >= date_from)
+
+
+def covers(key, date_from=None, date_to=None):
+    """분할 key 전체가 기간 안에 들어가는지 (False면 결과를 날짜로 다시 걸러야 함)"""
+    if date_from is None and date_to is None:
+        return True
+    span = partition_range(key) if key is not None else None
+    if span is None:
+        return False
+    start, end = span
+    return (date_from is None or start >= date_from) and (date_to is None or end <= date_to)
+
+
+def route(existing, base, date_from=None, date_to=None):
+    """검색할 (분할 key, 실제 컬렉션 이름) 목록 (date_from / date_to는 parse_date 결과)"""
+    return [(key, name) for key, name in list_partitions(existing, base).items() if overlaps(key, date_from, date_to)]
+
+
+def in_range(date, date_from=None, date_to=None):
+    """결과 문서 date가 기간 안인지 (date가 없으면 기간 조건이 없을 때만 True)"""
+    if date_from is None and date_to is None:
+        return True
+    parsed = parse_date(date)
+    if parsed is None:
+        return False
+    return (date_from is None or parsed >= date_from) and (date_to is None or parsed <= date_to)
+
+
+def target_collection(existing, base, date, scheme=PARTITION_BY):
+    """새 글을 넣을 실제 컬렉션: 분할 없는 base가 이미 있으면 base, 아니면 date의 분할"""
+    if scheme == "none" or base in existing:
+        return base
+    return partition_name(base, partition_key(date, scheme))
+
+
+def group_by_partition(existing, base, items, scheme=PARTITION_BY):
+    """items(date 필드를 가진 dict)를 넣을 컬렉션별로 묶기 -> {컬렉션 이름: [item, ...]}"""
+    groups = {}
+    for item in items:
+        groups.setdefault(target_collection(existing, base, item.get("date"), scheme), []).append(item)
+    return groups
+
+
+def existing_collections(save_dir="db/chroma_index"):
+    from chromadb import PersistentClient
+
+    return [c.name for c in PersistentClient(path=str(save_dir)).list_collections()]
+
+
+def stored_scheme(base, save_dir="db/chroma_index", default=PARTITION_BY):
+    """base 버전을 만들 때 컬렉션 메타데이터에 기록한 분할 단위 (기록이 없는 이전 컬렉션이면 default)"""
+    from chromadb import PersistentClient
+
+    client = PersistentClient(path=str(save_dir))
+    for name in list_partitions([c.name for c in client.list_collections()], base).values():
+        scheme = (client.get_collection(name).metadata or {}).get("partition_by")
+        if scheme in SCHEMES:
+            return scheme
+    return default
+
+
+def ingest_groups(base, items, save_dir="db/chroma_index"):
+    """크롤러 증분 저장용 group_by_partition: 분할 단위는 base 버전에 기록된 것을 따른다"""
+    return group_by_partition(existing_collections(save_dir), base, items, stored_scheme(base, save_dir))
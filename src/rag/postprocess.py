@@ -0,0 +1,88 @@
+# rag/postprocess.py
+"""
+검색 결과 후처리 (적응형 유사도 컷오프 + MMR 다양화)
+
+search_multiple_collections는 컬렉션 / 분할별로 top_k * FETCH_FACTOR개 후보를 임베딩과 함께 가져온 뒤
+이 모듈로 최종 결과를 고른다. 프롬프트에 들어가는 문서가 줄어 LLM 호출당 토큰 / 지연이 줄어든다.
+- 컷오프: cosine 유사도가 MIN_SIMILARITY 미만이거나 1위보다 RELATIVE_MARGIN 이상 낮은 후보 제외
+  (질의마다 1위 점수를 기준으로 잡으므로 관련 문서가 적은 질의는 top_k보다 적게 반환, 최소 MIN_RESULTS개는 유지)
+- MMR: lambda * (질의 유사도) - (1 - lambda) * (이미 고른 문서와의 최대 유사도)가 가장 큰 후보를 차례로 선택
+  (후보 간 유사도 행렬을 한 번에 계산하고 선택마다 최대 유사도 벡터만 갱신),
+  이미 고른 문서와 MAX_REDUNDANCY 이상 비슷한(사실상 같은 글) 후보는 남은 자리가 있어도 넣지 않는다
+
+점수는 저장소(space / 양자화 여부)와 관계없이 정규화한 임베딩의 cosine 유사도로 계산한다.
+RETRIEVAL_DIVERSIFY=0 이면 후처리 없이 distance 순 top_k를 반환한다.
+reranker(rag/rerank.py)를 켜면 cosine 대신 재정렬 점수로 컷오프 / MMR을 적용한다
+(cross-encoder 점수는 척도가 달라 rerank.cutoff_thresholds의 기준으로 컷오프).
+"""
+
+import os
+
+import numpy as np
+
+from src.rag.quantized_store import normalize, truncate_dimensions
+
+
+DIVERSIFY = os.getenv("RETRIEVAL_DIVERSIFY", "1") != "0"
+FETCH_FACTOR = int(os.getenv("RETRIEVAL_FETCH_FACTOR", "4"))
+MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7"))  # 1.0이면 유사도 순 (다양화 없음)
+MIN_SIMILARITY = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.25"))
+RELATIVE_MARGIN = float(os.getenv("RETRIEVAL_RELATIVE_MARGIN", "0.15"))
+MAX_REDUNDANCY = float(os.getenv("RETRIEVAL_MAX_REDUNDANCY", "0.95"))
+MIN_RESULTS = 1
+
+
+def similarities(query_emb, embeddings):
+    """(정규화한 후보 벡터 (n, d), 질의와의 cosine 유사도 (n,))"""
+    vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+    query = np.asarray(query_emb, dtype=np.float32)
+    # 양자화 저장소가 차원을 줄여 저장한 경우 질의도 같은 차원으로 맞춘다
+    query = truncate_dimensions(query, vectors.shape[1]) if query.shape[-1] > vectors.shape[1] else normalize(query)
+    return vectors, vectors @ query
+
+
+def cutoff(scores, min_similarity=MIN_SIMILARITY, margin=RELATIVE_MARGIN, min_results=MIN_RESULTS):
+    """컷오프를 통과한 후보 번호 (유사도 높은 순)"""
+    order = np.argsort(-scores)
+    if not len(order):
+        return order
+    threshold = max(min_similarity, float(scores[order[0]]) - margin)
+    keep = int(np.count_nonzero(scores[order] >= threshold))
+    return order[:max(keep, min(min_results, len(order)))]
+
+
+def mmr(query_scores, vectors, top_k, lambda_mult=MMR_LAMBDA, max_redundancy=MAX_REDUNDANCY):
+    """MMR로 고른 후보 번호 (선택 순서). query_scores / vectors는 같은 후보 집합"""
+    n = len(query_scores)
+    top_k = min(top_k, n)
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    pairwise = vectors @ vectors.T
+    selected = [int(np.argmax(query_scores))]
+    redundancy = pairwise[selected[0]].copy()
+    available = redundancy < max_redundancy
+    while len(selected) < top_k and available.any():
+        scores = lambda_mult * query_scores - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        np.maximum(redundancy, pairwise[pick], out=redundancy)
+        available &= redundancy < max_redundancy
+    return np.asarray(selected, dtype=np.int64)
+
+
+def select(query_emb, embeddings, top_k, lambda_mult=MMR_LAMBDA,
+           min_similarity=MIN_SIMILARITY, margin=RELATIVE_MARGIN, max_redundancy=MAX_REDUNDANCY, relevance=None):
+    """
+    후보 임베딩에서 최종 결과 고르기 -> (후보 번호 배열, 각 후보의 질의 유사도 배열)
+    컷오프로 후보를 줄인 뒤 그 안에서 MMR로 top_k개 선택.
+    relevance(rerank.py 재정렬 점수)를 주면 질의 유사도 대신 사용한다 (문서 간 중복은 그대로 임베딩으로 계산)
+    """
+    if not len(embeddings):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    vectors, scores = similarities(query_emb, embeddings)
+    if relevance is not None:
+        scores = np.asarray(relevance, dtype=np.float32)
+    kept = cutoff(scores, min_similarity, margin)
+    chosen = kept[mmr(scores[kept], vectors[kept], top_k, lambda_mult, max_redundancy)]
+    return chosen, scores[chosen]
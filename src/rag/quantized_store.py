@@ -0,0 +1,242 @@
+# rag/quantized_store.py
+"""
+양자화 로컬 벡터 저장소 (numpy)
+
+Chroma 컬렉션(또는 스냅샷)의 임베딩을 정규화한 뒤 int8 / float16 코드로 메모리에 올려 1차 검색하고,
+상위 후보(rescore_factor * top_k)만 디스크(memory-map)의 float32 벡터로 다시 점수를 매긴다.
+- int8: 벡터마다 scale(max |x| / 127)을 두는 대칭 양자화, float32 대비 메모리 1/4
+- float16: 메모리 1/2, 재채점 없이도 순위가 거의 같음
+- 문서 / 메타데이터는 records.jsonl에 두고 결과로 나가는 top_k개만 offset으로 읽는다
+
+점수는 cosine 유사도이며, 검색 결과의 distance는 원본 컬렉션의 HNSW space(meta.json의 space) 기준이다
+(정규화 벡터에서 l2(제곱 거리) = 2 * (1 - cosine), cosine / ip = 1 - cosine). 그래서 Chroma 검색 결과와 섞어 정렬할 수 있다.
+VECTOR_STORE=quantized 이고 db/quantized/<컬렉션>이 있으면 search_multiple_collections가 이 저장소를 사용한다.
+저장소는 만든 시점의 스냅샷이므로 meta.json의 source_count와 원본 컬렉션 문서 수가 다르면 Chroma로 검색한다.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+
+STORE_DIR = Path(os.getenv("QUANTIZED_STORE_DIR", "db/quantized"))
+DTYPES = ("int8", "float16", "float32")
+RESCORE_FACTOR = 10
+BLOCK_ROWS = 2048  # 블록이 CPU 캐시에 들어가는 크기에서 변환 + 행렬곱이 가장 빠름
+DEFAULT_SPACE = "l2"  # space가 없는 이전 저장소는 Chroma 기본값(l2) 컬렉션에서 만든 것
+
+
+def store_path(collection_name, root=STORE_DIR):
+    return Path(root) / collection_name
+
+
+def available(collection_name, root=STORE_DIR):
+    return (store_path(collection_name, root) / "meta.json").exists()
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def truncate_dimensions(vectors, dimensions):
+    """text-embedding-3 계열의 dimensions 축소와 같은 결과: 앞쪽 dimensions개만 남기고 다시 정규화"""
+    return normalize(np.asarray(vectors, dtype=np.float32)[..., :dimensions])
+
+
+def quantize(vectors, dtype):
+    """정규화된 float32 벡터 -> (코드, 벡터별 scale 또는 None)"""
+    if dtype == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return vectors.astype(dtype), None
+
+
+def to_distance(scores, space=DEFAULT_SPACE):
+    """정규화 벡터의 cosine 점수 -> Chroma space의 distance"""
+    scores = np.asarray(scores, dtype=np.float32)
+    return 2.0 * (1.0 - scores) if space == "l2" else 1.0 - scores
+
+
+# -------------------------
+# 1) 만들기
+# -------------------------
+def build_store(collection_name, batches, dtype="int8", root=STORE_DIR, keep_float32=True, dimensions=None,
+                space=DEFAULT_SPACE, info=None):
+    """
+    batches: (ids, documents, metadatas, embeddings) 반복자 (snapshot.iter_snapshot 과 같은 형식)
+    keep_float32: 재채점용 float32 벡터를 디스크에 함께 저장
+    dimensions: 지정하면 차원 축소(truncate + 정규화) 후 저장
+    space: 원본 컬렉션의 HNSW space (검색 결과 distance 척도)
+    info: meta.json에 함께 기록 (source_count = 만들 때 원본 컬렉션 문서 수)
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}', expected one of {DTYPES}")
+    path = store_path(collection_name, root)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    codes, scales, full = [], [], []
+    offsets = []
+    position = 0
+    with open(tmp / "records.jsonl", "wb") as f:
+        for ids, documents, metadatas, embeddings in batches:
+            vectors = truncate_dimensions(embeddings, dimensions) if dimensions else normalize(embeddings)
+            batch_codes, batch_scales = quantize(vectors, dtype)
+            codes.append(batch_codes)
+            if batch_scales is not None:
+                scales.append(batch_scales)
+            if keep_float32 and dtype != "float32":
+                full.append(vectors)
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                line = (json.dumps({"id": doc_id, "document": document, "metadata": metadata},
+                                   ensure_ascii=False) + "\n").encode("utf-8")
+                offsets.append(position)
+                position += len(line)
+                f.write(line)
+
+    if not codes:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise ValueError(f"No vectors to store for {collection_name}")
+
+    np.save(tmp / "codes.npy", np.concatenate(codes))
+    np.save(tmp / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    if scales:
+        np.save(tmp / "scales.npy", np.concatenate(scales))
+    if full:
+        np.save(tmp / "vectors_f32.npy", np.concatenate(full))
+    meta = {
+        "collection": collection_name,
+        "dtype": dtype,
+        "count": len(offsets),
+        "dimensions": int(codes[0].shape[1]),
+        "rescore": bool(full),
+        "space": space,
+        **(info or {}),
+    }
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # 검색 중인 프로세스는 열어 둔 이전 파일을 계속 읽고, 다음 load부터 새 저장소를 사용
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    print(f"[QUANTIZED] Built {path} ({meta['count']} vectors, {meta['dimensions']} dims, {dtype})")
+    return meta
+
+
+def iter_collection_batches(collection, batch_size=1000):
+    """Chroma 컬렉션 전체를 build_store용 batch로 읽기"""
+    for offset in range(0, collection.count(), batch_size):
+        got = collection.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+        if not len(got["ids"]):
+            break
+        yield got["ids"], got["documents"], got["metadatas"], np.asarray(got["embeddings"], dtype=np.float32)
+
+
+# -------------------------
+# 2) 검색
+# -------------------------
+class QuantizedStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.dtype = self.meta["dtype"]
+        # 1차 검색용 코드는 메모리에, 재채점용 float32는 memory-map (후보 행만 읽음)
+        self.codes = np.load(self.path / "codes.npy")
+        self.scales = np.load(self.path / "scales.npy") if (self.path / "scales.npy").exists() else None
+        self.full = (np.load(self.path / "vectors_f32.npy", mmap_mode="r")
+                     if (self.path / "vectors_f32.npy").exists() else None)
+        self.offsets = np.load(self.path / "offsets.npy")
+        self.space = self.meta.get("space", DEFAULT_SPACE)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def is_fresh(self, source_count):
+        """만든 뒤 원본 컬렉션에 글이 추가 / 삭제되지 않았는지 (source_count가 없는 이전 저장소는 벡터 수로 비교)"""
+        return self.meta.get("source_count", self.meta["count"]) == source_count
+
+    @property
+    def memory_bytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0) + self.offsets.nbytes
+
+    @property
+    def disk_bytes(self):
+        return sum(f.stat().st_size for f in self.path.iterdir())
+
+    def approximate_scores(self, query):
+        # numpy는 int8 / float16 행렬곱에 BLAS를 쓰지 못하므로 블록 단위로 float32로 바꿔 계산
+        # (전체를 한 번에 바꾸면 float32 크기의 임시 배열이 생겨 메모리 절감이 사라진다)
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), BLOCK_ROWS):
+            block = self.codes[start:start + BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def search_ids(self, query, top_k=5, rescore=True, rescore_factor=RESCORE_FACTOR):
+        """(행 번호, cosine 점수) top_k개"""
+        query = normalize(query)
+        if query.shape[-1] > self.codes.shape[1]:
+            query = truncate_dimensions(query, self.codes.shape[1])
+        scores = self.approximate_scores(query)
+
+        candidates = min(len(scores), top_k * rescore_factor if rescore and self.full is not None else top_k)
+        rows = np.argpartition(-scores, candidates - 1)[:candidates]
+        if rescore and self.full is not None:
+            rows = np.sort(rows)  # memory-map을 순서대로 읽도록
+            exact = np.asarray(self.full[rows]) @ query
+            order = np.argsort(-exact)[:top_k]
+            return rows[order], exact[order]
+        order = np.argsort(-scores[rows])
+        return rows[order], scores[rows][order]
+
+    def records(self, rows):
+        results = []
+        with open(self.path / "records.jsonl", "rb") as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                results.append(json.loads(f.readline()))
+        return results
+
+    def vectors(self, rows):
+        """행들의 정규화 벡터 (float32 재채점 벡터가 없으면 코드를 역양자화)"""
+        if self.full is not None:
+            return np.asarray(self.full[rows])
+        vectors = self.codes[rows].astype(np.float32)
+        return vectors * self.scales[rows, None] if self.scales is not None else vectors
+
+    def query(self, query_embedding, top_k=5, rescore=True, include_embeddings=False):
+        rows, scores = self.search_ids(np.asarray(query_embedding, dtype=np.float32), top_k, rescore=rescore)
+        results = [
+            {**record, "distance": float(distance)}
+            for record, distance in zip(self.records(rows), to_distance(scores, self.space))
+        ]
+        if include_embeddings:
+            for result, vector in zip(results, self.vectors(rows)):
+                result["embedding"] = vector
+        return results
+
+
+_stores = {}
+
+
+def load_store(collection_name, root=STORE_DIR):
+    """프로세스 내 캐시 (meta.json이 바뀌면 다시 로드)"""
+    path = store_path(collection_name, root)
+    mtime = (path / "meta.json").stat().st_mtime_ns
+    cached = _stores.get(str(path))
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, QuantizedStore(path))
+        _stores[str(path)] = cached
+    return cached[1]
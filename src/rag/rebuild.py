@@ -0,0 +1,168 @@
+# rag/rebuild.py
+"""
+벡터 컬렉션 blue/green 재구축
+
+청크 포맷이나 임베딩 모델을 바꿀 때 사용 중인 컬렉션을 직접 고치지 않고
+1) 새 버전 컬렉션(<name>__v<시각>, 기간 분할이면 <name>__v<시각>__p<기간> 여러 개,
+   HNSW 설정은 index_config + hnsw 인자)을 크롤러 SQLite에서 batch 단위로 채운 뒤
+   (문서가 같고 임베딩 모델이 같으면 현재 컬렉션의 임베딩을 재사용, 나머지만 batch 임베딩)
+2) 재구축 도중 새로 저장된 행을 한 번 더 반영하고
+3) 별칭 파일을 원자적으로 교체(aliases.set_alias)하여 검색을 새 버전으로 전환한다.
+이전 버전은 previous로 남아 rollback_collection으로 즉시 되돌릴 수 있다.
+"""
+
+import importlib
+from datetime import datetime
+
+from src.rag.aliases import (
+    VERSION_SEP, base_of, load_aliases, resolve_collection, rollback_alias, set_alias, version_of,
+)
+from src.rag.build_index import initialize_collection, upsert_embeddings
+from src.rag.index_config import hnsw_config
+from src.rag.partitions import PARTITION_BY, SCHEMES, list_partitions, target_collection
+
+
+SOURCES = {
+    "moel_iqrs": "src.moel_iqrs_crawler",
+    "moel_fastcounsel": "src.moel_fastcounsel_crawler",
+}
+KEEP_VERSIONS = 2  # current / previous 외에 남겨둘 버전 수
+
+
+def version_name(name, version=None):
+    return f"{name}{VERSION_SEP}{version or datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+
+def _get_client(save_dir):
+    from chromadb import PersistentClient
+
+    return PersistentClient(path=str(save_dir))
+
+
+def _cached_embeddings(sources, ids, documents):
+    """현재 컬렉션(기간 분할이면 분할 전체)에서 id와 문서가 모두 같은 벡터의 임베딩 (없으면 None)"""
+    embeddings = [None] * len(ids)
+    for source in sources:
+        pending = [doc_id for doc_id, embedding in zip(ids, embeddings) if embedding is None]
+        if not pending:
+            break
+        found = source.get(ids=pending, include=["documents", "embeddings"])
+        cached = {doc_id: (document, embedding)
+                  for doc_id, document, embedding in zip(found["ids"], found["documents"], found["embeddings"])}
+        for k, (doc_id, document) in enumerate(zip(ids, documents)):
+            hit = cached.get(doc_id)
+            if embeddings[k] is None and hit is not None and hit[0] == document:
+                embeddings[k] = hit[1]
+    return embeddings
+
+
+def rebuild_collection(name, version=None, save_dir="db/chroma_index", batch_size=500,
+                       embed_batch_size=None, reuse_embeddings=True, activate=True, keep=KEEP_VERSIONS, hnsw=None,
+                       partition_by=PARTITION_BY):
+    """
+    name 컬렉션의 새 버전을 만들고 (activate=True면) 별칭을 전환한다. 통계 dict 반환.
+    reuse_embeddings: 임베딩 모델 / 차원이 같을 때 현재 컬렉션의 임베딩 재사용 (청크 포맷만 바뀐 문서는 다시 임베딩)
+    hnsw: 새 버전의 HNSW 설정 덮어쓰기 (space / max_neighbors / ef_construction / ef_search)
+    partition_by: 새 버전의 기간 분할 단위 (year | quarter | none, partitions.py)
+    """
+    from src.embeddings import EMBEDDING_BATCH_SIZE, EMBEDDING_DIMENSIONS, EMBEDDING_MODEL, get_embeddings
+
+    if partition_by not in SCHEMES:
+        raise ValueError(f"Unknown partition scheme '{partition_by}', expected one of {SCHEMES}")
+    crawler = importlib.import_module(SOURCES[name])
+    client = _get_client(save_dir)
+    existing = [c.name for c in client.list_collections()]
+
+    sources = []
+    current = resolve_collection(name)
+    if reuse_embeddings:
+        sources = [client.get_collection(physical) for physical in list_partitions(existing, current).values()]
+    if sources:
+        model = (sources[0].metadata or {}).get("embedding_model")
+        dimensions = (sources[0].metadata or {}).get("embedding_dimensions", 0)
+        if (model and model != EMBEDDING_MODEL) or dimensions != (EMBEDDING_DIMENSIONS or 0):
+            print(f"[REBUILD] {current} was embedded with {model or EMBEDDING_MODEL} ({dimensions or 'default'} dims); "
+                  f"re-embedding everything with {EMBEDDING_MODEL} ({EMBEDDING_DIMENSIONS or 'default'} dims)")
+            sources = []
+
+    target = version_name(name, version)
+    metadata = {
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_dimensions": EMBEDDING_DIMENSIONS or 0,
+        "source": name,
+        "partition_by": partition_by,  # 크롤러 증분 저장이 같은 단위로 분할하도록 (partitions.ingest_groups)
+    }
+    stats = {"collection": name, "version": target, "rows": 0, "reused": 0, "embedded": 0,
+             "partition_by": partition_by, "hnsw": hnsw_config(target, hnsw)}
+    print(f"[REBUILD] Building {target} from {crawler.DB_PATH} (partition by {partition_by}, hnsw {stats['hnsw']})")
+    created = set()
+
+    def build(after_rowid):
+        last_rowid = after_rowid
+        for batch in crawler.iter_vector_records(after_rowid, batch_size=batch_size):
+            ids = [crawler.vector_id(row["qnum"]) for row in batch]
+            documents = [crawler.document_text(row) for row in batch]
+            metadatas = [crawler.vector_metadata(row) for row in batch]
+
+            embeddings = _cached_embeddings(sources, ids, documents)
+            missing = [k for k, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                fresh = get_embeddings([documents[k] for k in missing], batch_size=embed_batch_size or EMBEDDING_BATCH_SIZE)
+                for k, embedding in zip(missing, fresh):
+                    embeddings[k] = embedding
+
+            groups = {}
+            for k, row in enumerate(batch):
+                groups.setdefault(target_collection((), target, row["date"], partition_by), []).append(k)
+            for collection_name, rows in groups.items():
+                if collection_name not in created:
+                    initialize_collection(save_dir, collection_name, metadata=metadata, hnsw=hnsw)
+                    created.add(collection_name)
+                upsert_embeddings([ids[k] for k in rows], [documents[k] for k in rows], [embeddings[k] for k in rows],
+                                  [metadatas[k] for k in rows], save_dir=save_dir,
+                                  collection_name=collection_name, batch_size=batch_size)
+            stats["rows"] += len(batch)
+            stats["reused"] += len(batch) - len(missing)
+            stats["embedded"] += len(missing)
+            last_rowid = batch[-1]["rid"]
+            print(f"[REBUILD] {target}: {stats['rows']} rows (reused {stats['reused']}, embedded {stats['embedded']})")
+        return last_rowid
+
+    last_rowid = build(-1)
+    build(last_rowid)  # 재구축 도중 크롤러가 저장한 행 반영
+
+    if not created:
+        initialize_collection(save_dir, target, metadata=metadata, hnsw=hnsw)  # 빈 컬렉션도 별칭 대상이 되도록
+    partitions = list_partitions([c.name for c in client.list_collections()], target)
+    stats["partitions"] = [key for key in partitions if key is not None]
+    count = sum(client.get_collection(physical).count() for physical in partitions.values())
+    if count < stats["rows"]:
+        raise RuntimeError(f"Rebuilt collection {target} has {count} vectors, expected {stats['rows']}")
+
+    if activate:
+        previous = set_alias(name, target)
+        print(f"[REBUILD] Alias {name}: {previous} -> {target}")
+        prune_versions(name, keep=keep, save_dir=save_dir)
+    return stats
+
+
+def rollback_collection(name):
+    target = rollback_alias(name)
+    print(f"[REBUILD] Alias {name} rolled back to {target}")
+    return target
+
+
+def prune_versions(name, keep=KEEP_VERSIONS, save_dir="db/chroma_index"):
+    """current / previous와 최신 keep개를 제외한 오래된 버전 컬렉션(기간 분할 포함) 삭제"""
+    client = _get_client(save_dir)
+    entry = load_aliases().get(name, {})
+    protected = {entry.get("current"), entry.get("previous")}
+    collections = [c.name for c in client.list_collections() if version_of(c.name) == name]
+    versions = sorted({base_of(collection) for collection in collections})
+    stale = [v for v in versions[:max(0, len(versions) - keep)] if v not in protected]
+    for version in stale:
+        for collection in collections:
+            if base_of(collection) == version:
+                client.delete_collection(collection)
+        print(f"[REBUILD] Deleted old version {version}")
+    return stale
@@ -0,0 +1,199 @@
+# rag/rerank.py
+"""
+검색 후보 재정렬 (로컬 CPU reranker)
+
+벡터 유사도만으로 고른 top-k는 한국어 법률 질의에서 순서가 자주 어긋나므로,
+search_multiple_collections가 후보를 RERANK_CANDIDATES개(기본 50)까지 더 가져온 뒤 이 모듈로 다시 점수를 매긴다.
+재정렬 점수로 postprocess(컷오프 + MMR)가 최종 top_k를 고른다.
+
+- lexical: cosine 유사도 + 가중치 * 특징
+  - title: 질의 글자 bigram 중 제목 + 질문에 들어 있는 비율
+  - body: 질의 글자 bigram 중 답변에 들어 있는 비율
+  - law: 질의에 나온 법령 중 문서에도 나온 비율 (「」 표기, 약칭 포함)
+  - article: 질의에 나온 조문(제60조, 근로기준법 제60조의2) 중 문서에도 나온 비율
+  특징 가중치 합이 작아 점수가 cosine 척도에 머무르므로 컷오프 기준을 그대로 쓸 수 있다
+- cross-encoder: RERANK_MODEL_PATH의 로컬 cross-encoder(sentence-transformers)로 (질의, 문서) 쌍을
+  CROSS_ENCODER_BATCH개씩 채점 (점수는 0~1 관련도). 모델을 불러오지 못하면 lexical로 대신한다
+  점수 척도가 cosine과 달라 컷오프는 별도 기준(CROSS_ENCODER_MIN_SCORE / CROSS_ENCODER_MARGIN)을 쓰며,
+  기본값은 컷오프 없이 MMR만 적용한다 (모델별로 보정한 값을 환경 변수로 지정)
+
+RETRIEVAL_RERANK=off | lexical | cross-encoder (기본 off). 소요 시간은 rerank stage와 [RERANK] 로그로 남는다.
+"""
+
+import os
+import re
+import time
+
+import numpy as np
+
+from src.rag.compact import char_bigrams, parse_document
+from src.rag import postprocess
+from src.rag.postprocess import similarities
+from src.utils.timing import stage
+
+
+RERANK = os.getenv("RETRIEVAL_RERANK", "off")
+METHODS = ("off", "lexical", "cross-encoder")
+RERANK_CANDIDATES = int(os.getenv("RETRIEVAL_RERANK_CANDIDATES", "50"))
+LEXICAL_WEIGHTS = {
+    "title": 0.15,
+    "body": 0.05,
+    "law": 0.05,
+    "article": 0.10,
+}
+RERANK_MODEL_PATH = os.getenv("RERANK_MODEL_PATH", "models/reranker")
+CROSS_ENCODER_BATCH = 16
+CROSS_ENCODER_CHARS = 1000  # 문서 앞부분만 채점 (모델 max_length를 넘는 부분은 어차피 잘림)
+CROSS_ENCODER_MIN_SCORE = float(os.getenv("RETRIEVAL_RERANK_MIN_SCORE", "0"))
+CROSS_ENCODER_MARGIN = float(os.getenv("RETRIEVAL_RERANK_MARGIN", "1"))  # 1이면 0~1 점수에서 상대 컷오프 없음
+
+# 법령 표기 -> 대표 이름 (공백 제거 후 비교, 긴 표기부터 찾는다)
+LAW_ALIASES = {
+    "근로기준법": ("근로기준법", "근기법"),
+    "최저임금법": ("최저임금법", "최임법"),
+    "근로자퇴직급여보장법": ("근로자퇴직급여보장법", "퇴직급여보장법", "퇴직급여법", "근퇴법"),
+    "남녀고용평등법": ("남녀고용평등과일·가정양립지원에관한법률", "남녀고용평등법", "고평법"),
+    "기간제법": ("기간제및단시간근로자보호등에관한법률", "기간제법"),
+    "파견법": ("파견근로자보호등에관한법률", "파견법"),
+    "노동조합법": ("노동조합및노동관계조정법", "노동조합법", "노조법"),
+    "근로자참여법": ("근로자참여및협력증진에관한법률", "근로자참여법", "근참법"),
+    "산업안전보건법": ("산업안전보건기준에관한규칙", "산업안전보건법", "산안법"),
+    "산업재해보상보험법": ("산업재해보상보험법", "산재보험법", "산재법"),
+    "고용보험법": ("고용보험법",),
+    "임금채권보장법": ("임금채권보장법",),
+    "중대재해처벌법": ("중대재해처벌등에관한법률", "중대재해처벌법", "중처법"),
+    "외국인고용법": ("외국인근로자의고용등에관한법률", "외국인고용법"),
+    "장애인고용법": ("장애인고용촉진및직업재활법", "장애인고용법"),
+}
+_ALIAS_TO_LAW = {alias: law for law, aliases in LAW_ALIASES.items() for alias in aliases}
+_LAW_RE = re.compile("|".join(sorted(map(re.escape, _ALIAS_TO_LAW), key=len, reverse=True)))
+_BRACKET_RE = re.compile(r"「([^」(]+)")
+_ARTICLE_RE = re.compile(r"제(\d+)조(?:의(\d+))?")
+_ARTICLE_LOOKBACK = 20  # 조문 앞 이 글자 수 안에 나온 법령을 그 조문의 법령으로 본다
+_SPACE_RE = re.compile(r"\s+")
+
+
+# -------------------------
+# 1) 법령 / 조문 인용
+# -------------------------
+def _normalize(text):
+    return _SPACE_RE.sub("", str(text or "")).replace("ㆍ", "·")
+
+
+def citations(text):
+    """text에 나온 (법령 집합, 조문 집합). 조문은 (법령 또는 None, "60" / "60의2")"""
+    text = _normalize(text)
+    laws = {_ALIAS_TO_LAW[m.group(0)] for m in _LAW_RE.finditer(text)}
+    laws.update(_ALIAS_TO_LAW.get(name, name) for name in _BRACKET_RE.findall(text))
+    articles = set()
+    for match in _ARTICLE_RE.finditer(text):
+        number = match.group(1) + (f"의{match.group(2)}" if match.group(2) else "")
+        window = text[max(0, match.start() - _ARTICLE_LOOKBACK):match.start()]
+        cited = [m.group(0) for m in _LAW_RE.finditer(window)]
+        articles.add((_ALIAS_TO_LAW[cited[-1]] if cited else None, number))
+    return laws, articles
+
+
+def _article_match(query_articles, doc_articles):
+    """질의 조문 중 문서에 있는 비율 (한쪽에 법령이 없으면 조문 번호만 비교)"""
+    if not query_articles:
+        return 0.0
+    hits = 0
+    for law, number in query_articles:
+        hits += any(number == doc_number and (law is None or doc_law is None or law == doc_law)
+                    for doc_law, doc_number in doc_articles)
+    return hits / len(query_articles)
+
+
+# -------------------------
+# 2) 채점
+# -------------------------
+def lexical_features(query, documents):
+    """문서별 특징 행렬 (n, len(LEXICAL_WEIGHTS)), 열 순서는 LEXICAL_WEIGHTS"""
+    query_grams = char_bigrams(query)
+    query_laws, query_articles = citations(query)
+    features = np.zeros((len(documents), len(LEXICAL_WEIGHTS)), dtype=np.float32)
+    for row, document in enumerate(documents):
+        parsed = parse_document(document)
+        if query_grams:
+            features[row, 0] = len(query_grams & char_bigrams(parsed["title"] + parsed["question"])) / len(query_grams)
+            features[row, 1] = len(query_grams & char_bigrams(parsed["answer"])) / len(query_grams)
+        if query_laws or query_articles:
+            doc_laws, doc_articles = citations(document)
+            features[row, 2] = len(query_laws & doc_laws) / len(query_laws) if query_laws else 0.0
+            features[row, 3] = _article_match(query_articles, doc_articles)
+    return features
+
+
+def lexical_scores(query, documents, vector_scores):
+    weights = np.asarray(list(LEXICAL_WEIGHTS.values()), dtype=np.float32)
+    return np.asarray(vector_scores, dtype=np.float32) + lexical_features(query, documents) @ weights
+
+
+_cross_encoders = {}
+
+
+def load_cross_encoder(path=RERANK_MODEL_PATH):
+    """로컬 cross-encoder (프로세스 내 캐시), 불러올 수 없으면 None"""
+    if path not in _cross_encoders:
+        try:
+            from sentence_transformers import CrossEncoder
+
+            _cross_encoders[path] = CrossEncoder(str(path), device="cpu")
+        except (ImportError, OSError, ValueError) as e:
+            print(f"[RERANK] cross-encoder unavailable ({path}): {e}; using lexical")
+            _cross_encoders[path] = None
+    return _cross_encoders[path]
+
+
+def cross_encoder_scores(model, query, documents):
+    pairs = []
+    for document in documents:
+        parsed = parse_document(document)
+        text = f"{parsed['title']}\n{parsed['question']}\n{parsed['answer']}"
+        pairs.append((query, text[:CROSS_ENCODER_CHARS]))
+    return np.asarray(model.predict(pairs, batch_size=CROSS_ENCODER_BATCH, show_progress_bar=False),
+                      dtype=np.float32).reshape(-1)
+
+
+def warmup(method=RERANK):
+    """앱 시작 시 cross-encoder를 미리 로드 (lexical / off는 할 일 없음)"""
+    if method == "cross-encoder":
+        load_cross_encoder()
+
+
+# -------------------------
+# 3) 재정렬
+# -------------------------
+def cutoff_thresholds(method):
+    """실제로 채점한 방법의 점수 척도에 맞는 postprocess 컷오프 기준 {min_similarity, margin}"""
+    if method == "cross-encoder":
+        return {"min_similarity": CROSS_ENCODER_MIN_SCORE, "margin": CROSS_ENCODER_MARGIN}
+    return {"min_similarity": postprocess.MIN_SIMILARITY, "margin": postprocess.RELATIVE_MARGIN}
+
+
+def rerank(query, query_emb, results, embeddings, method=RERANK, candidates=RERANK_CANDIDATES):
+    """
+    벡터 유사도 상위 candidates개를 method로 다시 채점해 점수 높은 순으로 반환
+    -> (results, embeddings, 재정렬 점수 배열, 실제로 쓴 방법)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown rerank method '{method}', expected one of {METHODS}")
+    _, vector_scores = similarities(query_emb, embeddings)
+    pool = np.argsort(-vector_scores)[:candidates]
+    documents = [results[i]["document"] for i in pool]
+
+    model = load_cross_encoder() if method == "cross-encoder" else None
+    used = "cross-encoder" if model is not None else "lexical"
+    start = time.perf_counter()
+    with stage("rerank", method=used, candidates=len(pool)) as sp:
+        if model is not None:
+            scores = cross_encoder_scores(model, query, documents)
+        else:
+            scores = lexical_scores(query, documents, vector_scores[pool])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        sp.set_attribute("latency_ms", round(elapsed_ms, 2))
+    print(f"[RERANK] {used}: {len(pool)} candidates in {elapsed_ms:.1f}ms")
+
+    order = np.argsort(-scores, kind="stable")
+    return [results[pool[i]] for i in order], [embeddings[pool[i]] for i in order], scores[order], used
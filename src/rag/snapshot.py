@@ -0,0 +1,203 @@
+# rag/snapshot.py
+"""
+벡터 컬렉션 스냅샷 (Parquet / Arrow IPC)
+
+컬렉션의 id / 문서 / 메타데이터 / float32 임베딩을 열 지향 파일 하나로 내보내고,
+그 파일로 Chroma 컬렉션이나 FAISS 인덱스를 임베딩 API 호출 없이 다시 적재한다.
+- parquet: zstd 압축, 보관 / 전송용 (기본)
+- arrow: 무압축 Arrow IPC, memory-map으로 읽어 임베딩 열을 복사 없이 numpy로 사용
+
+임베딩은 FixedSizeList<float32>[dim] 열로 저장되고, 스키마 메타데이터에 컬렉션 이름 / 차원 / 임베딩 모델 / 생성 시각을 기록한다.
+기간 분할 컬렉션(rag/partitions.py)은 모든 분할을 파일 하나로 내보내고, 적재할 때 date 메타데이터로 다시 분할한다.
+pyarrow가 필요하다 (pip install pyarrow).
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from src.rag.aliases import resolve_collection
+from src.rag.build_index import upsert_embeddings
+from src.rag.partitions import existing_collections, group_by_partition, list_partitions, stored_scheme
+
+
+SNAPSHOT_DIR = Path("data/snapshots")
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Corpus snapshots require pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def snapshot_path(collection_name, out_dir=SNAPSHOT_DIR, fmt="parquet"):
+    return Path(out_dir) / f"{collection_name}{FORMATS[fmt]}"
+
+
+def _record_batch(pa, ids, documents, metadatas, embeddings, dim):
+    import numpy as np
+
+    flat = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1)
+    return pa.record_batch(
+        [
+            pa.array(ids, type=pa.string()),
+            pa.array(documents, type=pa.string()),
+            pa.array([json.dumps(m or {}, ensure_ascii=False) for m in metadatas], type=pa.string()),
+            pa.FixedSizeListArray.from_arrays(pa.array(flat, type=pa.float32()), dim),
+        ],
+        names=["id", "document", "metadata", "embedding"],
+    )
+
+
+# -------------------------
+# 1) 내보내기
+# -------------------------
+def export_snapshot(collection_name, out_dir=SNAPSHOT_DIR, save_dir="db/chroma_index", fmt="parquet",
+                    batch_size=1000, embedding_model=None):
+    """Chroma 컬렉션(별칭이면 현재 버전) 전체를 batch_size 행씩 읽어 스냅샷 파일로 기록. 기록한 경로와 행 수를 반환"""
+    from chromadb import PersistentClient
+
+    pa = _pyarrow()
+    client = PersistentClient(path=str(save_dir))
+    existing = [c.name for c in client.list_collections()]
+    physical_names = list(list_partitions(existing, resolve_collection(collection_name)).values())
+    path = snapshot_path(collection_name, out_dir, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+
+    def batches():
+        for physical_name in physical_names:  # 기간 분할 컬렉션이면 모든 분할
+            collection = client.get_collection(physical_name)
+            for offset in range(0, collection.count(), batch_size):
+                got = collection.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+                if not len(got["ids"]):
+                    break
+                yield got
+
+    writer = None
+    rows = 0
+    try:
+        for got in batches():
+            dim = len(got["embeddings"][0])
+            batch = _record_batch(pa, got["ids"], got["documents"], got["metadatas"], got["embeddings"], dim)
+            if writer is None:
+                schema = batch.schema.with_metadata({
+                    "collection": collection_name,
+                    "dimensions": str(dim),
+                    "embedding_model": embedding_model or "",
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                })
+                if fmt == "parquet":
+                    writer = pa.parquet.ParquetWriter(tmp, schema, compression="zstd")
+                else:
+                    writer = pa.ipc.new_file(tmp, schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        print(f"[SNAPSHOT] {collection_name} is empty, nothing exported")
+        return None, 0
+    tmp.replace(path)
+    print(f"[SNAPSHOT] Exported {rows} rows of {collection_name} to {path}")
+    return path, rows
+
+
+# -------------------------
+# 2) 읽기
+# -------------------------
+def read_metadata(path):
+    pa = _pyarrow()
+    path = Path(path)
+    if path.suffix == ".parquet":
+        schema = pa.parquet.read_schema(path)
+    else:
+        with pa.memory_map(str(path), "r") as source:
+            schema = pa.ipc.open_file(source).schema
+    return {k.decode(): v.decode() for k, v in (schema.metadata or {}).items()}
+
+
+def iter_snapshot(path, batch_size=1000):
+    """
+    (ids, documents, metadatas, embeddings[n, dim] float32) 를 batch 단위로 yield.
+    Arrow IPC 파일은 memory-map으로 열어 임베딩 배열을 복사하지 않는다.
+    """
+    pa = _pyarrow()
+    path = Path(path)
+
+    def unpack(batch):
+        column = batch.column("embedding")
+        dim = column.type.list_size
+        embeddings = column.flatten().to_numpy(zero_copy_only=True).reshape(-1, dim)
+        return (
+            batch.column("id").to_pylist(),
+            batch.column("document").to_pylist(),
+            [json.loads(m) or None for m in batch.column("metadata").to_pylist()],
+            embeddings,
+        )
+
+    if path.suffix == ".parquet":
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield unpack(batch)
+        return
+
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, batch_size):
+                yield unpack(batch.slice(start, batch_size))
+
+
+# -------------------------
+# 3) 적재 (임베딩 API 호출 없음)
+# -------------------------
+def load_into_chroma(path, collection_name=None, save_dir="db/chroma_index", batch_size=1000):
+    """
+    컬렉션이 분할 없이 이미 있으면 그대로, 아니면 date 메타데이터 기준 기간 분할 컬렉션들로 적재
+    (분할 단위는 현재 버전에 기록된 partition_by)
+    """
+    collection_name = collection_name or read_metadata(path).get("collection")
+    base = resolve_collection(collection_name)
+    existing = existing_collections(save_dir)
+    scheme = stored_scheme(base, save_dir)
+    rows = 0
+    for ids, documents, metadatas, embeddings in iter_snapshot(path, batch_size):
+        items = [{"row": k, "date": (metadata or {}).get("date")} for k, metadata in enumerate(metadatas)]
+        for physical_name, group in group_by_partition(existing, base, items, scheme).items():
+            index = [item["row"] for item in group]
+            upsert_embeddings([ids[k] for k in index], [documents[k] for k in index], embeddings[index],
+                              [metadatas[k] for k in index], save_dir=save_dir,
+                              collection_name=physical_name, batch_size=batch_size)
+        rows += len(ids)
+    print(f"[SNAPSHOT] Loaded {rows} rows into Chroma collection {collection_name}")
+    return rows
+
+
+def load_into_faiss(path, index_path, metadata_path, batch_size=1000):
+    """FAISS 인덱스(IndexFlatL2)와 rag_store 형식 메타데이터 JSONL(vector_id / chunk)로 적재"""
+    from src.metadata_store import append_metadata
+    from src.vectorstore import load_or_create_index, save_index
+
+    dim = int(read_metadata(path)["dimensions"])
+    Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+    index = load_or_create_index(dim, index_path)
+    rows = 0
+    for ids, documents, metadatas, embeddings in iter_snapshot(path, batch_size):
+        start_id = index.ntotal
+        index.add(embeddings)
+        append_metadata(metadata_path, [
+            {"vector_id": start_id + i, "chunk": document, "id": doc_id, **(metadata or {})}
+            for i, (doc_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+        ])
+        rows += len(ids)
+    save_index(index, index_path)
+    print(f"[SNAPSHOT] Loaded {rows} rows into FAISS index {index_path}")
+    return rows
@@ -0,0 +1,354 @@
+"""
+크롤러 원문 아카이브 (세그먼트 JSONL)
+
+레코드마다 파일을 열고 닫는 대신 크롤링 동안 하나의 버퍼 핸들에 쓰고 배치 단위로 flush한다.
+- 쓰는 중인(active) 세그먼트는 무압축 JSONL: 커밋되지 않은 꼬리를 잘라낼 수 있도록
+- 크기(ARCHIVE_SEGMENT_MB) 또는 날짜(ARCHIVE_ROTATE: daily / monthly) 기준으로 봉인하여 zstd(없으면 gzip) 압축
+- index.json에 세그먼트별 시작 위치 / 레코드 수 / qnum 범위를 기록 (재생 시 범위 밖 세그먼트는 건너뜀)
+
+position()은 모든 세그먼트의 무압축 바이트를 이어 붙인 논리 오프셋이며, 크롤러는 이 값을
+체크포인트의 jsonl_size로 DB 트랜잭션과 함께 기록한다. 봉인은 커밋 이후에만 하므로
+커밋되지 않은 기록은 항상 active 세그먼트에만 있고, 재개 시 truncate_to(커밋 오프셋)로 제거된다.
+
+여러 writer(앱의 증분 크롤링과 CLI 백필 등)가 같은 아카이브에 쓸 수 있으므로
+쓰기 -> 체크포인트 기록(position) -> commit, 그리고 truncate_to는 locked() 안에서 한다.
+잠금을 잡을 때마다 index.json과 active 세그먼트의 실제 크기를 다시 읽고, position()은 실제 파일 크기를 쓴다.
+"""
+
+import gzip
+import io
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from src.utils.checkpoint import qnum_key
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성: 없으면 gzip 사용
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+SEGMENT_BYTES = int(float(os.getenv("ARCHIVE_SEGMENT_MB", "64")) * 1024 * 1024)
+ROTATE = os.getenv("ARCHIVE_ROTATE", "monthly")  # daily | monthly | size
+CODEC = os.getenv("ARCHIVE_CODEC", "zstd" if zstandard else "gzip")
+BUFFER_SIZE = 1024 * 1024
+EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+
+
+def _period(day, rotate):
+    if rotate == "daily":
+        return day.isoformat()
+    if rotate == "monthly":
+        return day.strftime("%Y-%m")
+    return None
+
+
+def _compress(src, dst, codec):
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(src, "rb") as fin, open(tmp, "wb") as fout:
+        if codec == "zstd":
+            zstandard.ZstdCompressor(level=10).copy_stream(fin, fout)
+        else:
+            with gzip.GzipFile(fileobj=fout, mode="wb", compresslevel=6) as gz:
+                while chunk := fin.read(BUFFER_SIZE):
+                    gz.write(chunk)
+    os.replace(tmp, dst)
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue  # LK_LOCK은 10초 동안 못 잡으면 실패하므로 계속 대기
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _open_segment(path):
+    if path.suffix == ".zst":
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                                encoding="utf-8")
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+class ArchiveWriter:
+    def __init__(self, root, name, segment_bytes=SEGMENT_BYTES, rotate=ROTATE, codec=CODEC):
+        if codec == "zstd" and zstandard is None:
+            codec = "gzip"
+        self.root = Path(root)
+        self.name = name
+        self.segment_bytes = segment_bytes
+        self.rotate = rotate
+        self.codec = codec
+        self.index_path = self.root / "index.json"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segments = []
+        self._handle = None
+        self._thread_lock = threading.RLock()
+        self._lock_handle = None
+        self._lock_depth = 0
+        with self.locked():
+            self._cleanup_sealed()
+            self._rescan_active()
+
+    # -------------------------
+    # 잠금 (다른 writer와 공유)
+    # -------------------------
+    @contextmanager
+    def locked(self):
+        """아카이브 배타 잠금 (재진입 가능). 잡을 때 다른 writer가 바꾼 index / active 세그먼트를 다시 읽는다"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._lock_handle = open(self.root / ".lock", "a+b")
+                _lock_file(self._lock_handle)
+                try:
+                    self._reload()
+                except BaseException:
+                    self._release()
+                    raise
+            self._lock_depth += 1
+            try:
+                yield self
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    self._release()
+
+    def _release(self):
+        # 다른 writer가 봉인 / 추가할 수 있으므로 핸들은 잠금 밖으로 들고 나가지 않는다
+        self.close()
+        _unlock_file(self._lock_handle)
+        self._lock_handle.close()
+        self._lock_handle = None
+
+    def _reload(self):
+        self.close()
+        self.segments = self._load_index() or self.segments
+        if not self.segments or self.segments[-1]["sealed"]:
+            self._new_segment()
+        path = self._active_path()
+        if (path.stat().st_size if path.exists() else 0) != self.active["bytes"]:
+            self._rescan_active()
+
+    # -------------------------
+    # index
+    # -------------------------
+    def _load_index(self):
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))["segments"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _save_index(self):
+        tmp = self.index_path.with_name("index.json.tmp")
+        tmp.write_text(json.dumps({"name": self.name, "segments": self.segments}, ensure_ascii=False, indent=1),
+                       encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    @property
+    def active(self):
+        return self.segments[-1]
+
+    def _active_path(self):
+        return self.root / self.active["file"]
+
+    def _new_segment(self):
+        seq = self.segments[-1]["seq"] + 1 if self.segments else 1
+        start = self.segments[-1]["start"] + self.segments[-1]["bytes"] if self.segments else 0
+        self.segments.append({
+            "seq": seq,
+            "file": f"{self.name}-{seq:05d}.jsonl",
+            "start": start,
+            "bytes": 0,
+            "records": 0,
+            "min_qnum": None,
+            "max_qnum": None,
+            "opened": date.today().isoformat(),
+            "sealed": False,
+        })
+        self._save_index()
+
+    def _cleanup_sealed(self):
+        # 압축 후 원본 삭제 전에 중단된 경우 남은 무압축 파일 정리
+        for segment in self.segments:
+            raw = self.root / f"{self.name}-{segment['seq']:05d}.jsonl"
+            if segment["sealed"] and raw.exists():
+                raw.unlink()
+
+    def _track(self, segment, qnum):
+        segment["records"] += 1
+        key = qnum_key(qnum)
+        if key is not None:
+            segment["min_qnum"] = key if segment["min_qnum"] is None else min(segment["min_qnum"], key)
+            segment["max_qnum"] = key if segment["max_qnum"] is None else max(segment["max_qnum"], key)
+
+    def _rescan_active(self):
+        """active 세그먼트 통계를 파일 내용으로 다시 계산 (잘라낸 뒤 / 비정상 종료 후)"""
+        self.close()
+        segment = self.active
+        segment.update(bytes=0, records=0, min_qnum=None, max_qnum=None)
+        path = self._active_path()
+        if path.exists():
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # 쓰다 만 마지막 줄 (truncate 대상)
+                    segment["bytes"] += len(line)
+                    try:
+                        self._track(segment, json.loads(line).get("qnum"))
+                    except ValueError:
+                        segment["records"] += 1
+            if path.stat().st_size > segment["bytes"]:
+                with open(path, "r+b") as f:
+                    f.truncate(segment["bytes"])
+        self._save_index()
+
+    # -------------------------
+    # 쓰기
+    # -------------------------
+    def _file(self):
+        if self._handle is None:
+            self._handle = open(self._active_path(), "ab", buffering=BUFFER_SIZE)
+        return self._handle
+
+    def write(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._file().write(line)
+        self.active["bytes"] += len(line)
+        self._track(self.active, record.get("qnum"))
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        self.flush()
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.flush()
+
+    def position(self):
+        """모든 세그먼트를 이어 붙인 논리 오프셋 (flush 후 active 세그먼트의 실제 파일 크기 기준)"""
+        self.flush()
+        path = self._active_path()
+        return self.active["start"] + (path.stat().st_size if path.exists() else 0)
+
+    def truncate_to(self, offset):
+        """커밋 오프셋 이후 기록 제거. 봉인된 세그먼트는 커밋된 기록만 담고 있으므로 active만 자른다."""
+        if offset is None:
+            return False
+        keep = max(0, offset - self.active["start"])
+        path = self._active_path()
+        if not path.exists() or path.stat().st_size <= keep:
+            return False
+        self.close()
+        with open(path, "r+b") as f:
+            f.truncate(keep)
+        self._rescan_active()
+        return True
+
+    def should_rotate(self, today=None):
+        segment = self.active
+        if not segment["bytes"]:
+            return False
+        if segment["bytes"] >= self.segment_bytes:
+            return True
+        period = _period(today or date.today(), self.rotate)
+        return period is not None and period != _period(date.fromisoformat(segment["opened"]), self.rotate)
+
+    def maybe_rotate(self):
+        """커밋 이후에 호출: 기준을 넘었으면 active 세그먼트를 봉인(압축)하고 새 세그먼트 시작"""
+        if not self.should_rotate():
+            return False
+        self.close()
+        segment = self.active
+        raw = self._active_path()
+        compressed_name = raw.name.replace(".jsonl", EXTENSIONS[self.codec])
+        _compress(raw, self.root / compressed_name, self.codec)
+        segment.update(file=compressed_name, sealed=True)
+        self._new_segment()  # index 저장 (봉인 기록)
+        raw.unlink()
+        print(f"[ARCHIVE] Sealed {compressed_name} ({segment['records']} records, "
+              f"qnum {segment['min_qnum']}~{segment['max_qnum']})")
+        return True
+
+    def commit(self):
+        """커밋 이후 index 통계 저장 + 필요 시 회전"""
+        if not self.maybe_rotate():
+            self._save_index()
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    # -------------------------
+    # 기존 단일 JSONL 이관
+    # -------------------------
+    def import_legacy(self, path):
+        """
+        단일 JSONL 파일(data/<name>.jsonl)을 첫 세그먼트로 복사 (아카이브가 비어 있을 때 한 번만).
+        기존 체크포인트의 jsonl_size는 이 파일의 바이트 오프셋이므로 논리 오프셋과 그대로 맞는다.
+        원본은 저장소에 포함된 스냅샷이라 지우지 않고, 이후로는 쓰지 않는다.
+        """
+        path = Path(path)
+        if not path.exists() or self.active["bytes"] or len(self.segments) > 1:
+            return False
+        self.close()
+        shutil.copyfile(path, self._active_path())
+        self._rescan_active()
+        self.active["opened"] = date.min.isoformat()  # 다음 커밋에서 바로 봉인
+        self._save_index()
+        return True
+
+
+def iter_records(root, min_qnum=None, max_qnum=None):
+    """세그먼트 순서대로 레코드를 스트리밍. qnum 범위가 주어지면 겹치지 않는 세그먼트는 열지 않는다."""
+    root = Path(root)
+    try:
+        segments = json.loads((root / "index.json").read_text(encoding="utf-8"))["segments"]
+    except (OSError, ValueError, KeyError):
+        return
+    for segment in segments:
+        if min_qnum is not None and segment["max_qnum"] is not None and segment["max_qnum"] < min_qnum:
+            continue
+        if max_qnum is not None and segment["min_qnum"] is not None and segment["min_qnum"] > max_qnum:
+            continue
+        path = root / segment["file"]
+        if not path.exists():
+            continue
+        with _open_segment(path) as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                record = json.loads(line)
+                key = qnum_key(record.get("qnum"))
+                if key is not None and (
+                    (min_qnum is not None and key < min_qnum) or (max_qnum is not None and key > max_qnum)
+                ):
+                    continue
+                yield record
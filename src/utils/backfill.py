@@ -0,0 +1,153 @@
+"""
+크롤러 전체 이력 백필(backfill) 엔진
+
+목록 페이지 전체를 처음부터 끝까지 훑으며 DB에 없는 qnum(중간에 비어 있는 구간 포함)만 상세 크롤링한다.
+- 목록 페이지는 workers 개수만큼 미리 요청(prefetch)하고, 페이지 안의 상세 페이지는 병렬로 요청
+- 호스트 단위 전역 token bucket(http.set_rate_limit)으로 초당 요청 수 제한 (캐시 hit은 제외)
+- 페이지 단위로 크롤러의 commit_batch(벡터 -> JSONL -> DB + 체크포인트)를 호출하므로 중단 후 재개 가능
+- 진행률 / 처리 속도 / ETA 출력 (목록 번호로 전체 페이지 수 추정)
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import http
+from src.utils.checkpoint import qnum_key
+from src.utils.tracing import propagate
+
+
+def _format_eta(seconds):
+    if seconds is None or seconds == float("inf"):
+        return "?"
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {sec:02d}s"
+
+
+class BackfillProgress:
+    def __init__(self, start_page, total_pages=None):
+        self.start_page = start_page
+        self.total_pages = total_pages
+        self.pages = 0
+        self.new = 0
+        self.skipped = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+
+    def update(self, new, skipped, failed):
+        self.pages += 1
+        self.new += new
+        self.skipped += skipped
+        self.failed += failed
+
+    def snapshot(self, page_index):
+        elapsed = time.monotonic() - self.started_at
+        pages_per_sec = self.pages / elapsed if elapsed else 0.0
+        remaining = None
+        if self.total_pages:
+            remaining = max(0, self.total_pages - page_index)
+        return {
+            "page": page_index,
+            "total_pages": self.total_pages,
+            "percent": round(100 * page_index / self.total_pages, 1) if self.total_pages else None,
+            "new": self.new,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed": round(elapsed, 1),
+            "pages_per_sec": round(pages_per_sec, 3),
+            "eta_seconds": remaining / pages_per_sec if remaining is not None and pages_per_sec else None,
+        }
+
+    def report(self, tag, page_index):
+        s = self.snapshot(page_index)
+        total = f"/{s['total_pages']} ({s['percent']}%)" if s["total_pages"] else ""
+        print(
+            f"[BACKFILL] {tag} page {page_index}{total} | new {s['new']}, known {s['skipped']}, "
+            f"failed {s['failed']} | {s['pages_per_sec']:.2f} pages/s | ETA {_format_eta(s['eta_seconds'])}"
+        )
+        return s
+
+
+def run_backfill(
+    tag,
+    list_url,
+    fetch_list_page,
+    parse_list_page,
+    build_record,
+    commit_batch,
+    existing_qnums,
+    accept=None,
+    start_page=1,
+    end_page=None,
+    workers=8,
+    rate=4.0,
+    on_progress=None,
+):
+    """
+    build_record(item): 상세 페이지를 받아 저장할 레코드를 반환 (실패 시 None)
+    commit_batch(records, page_index, last_qnum, status=...): 페이지 단위 커밋 + 체크포인트
+    accept(item): 크롤링 대상 여부 (예: 답변완료만)
+    """
+    http.set_rate_limit(list_url, rate, burst=workers)
+    progress = BackfillProgress(start_page)
+    crawled = set()
+    last_qnum = None
+    page_index = start_page
+    completed = False
+
+    def is_target(item):
+        qnum = item["qnum"]
+        return qnum not in existing_qnums and qnum not in crawled and (accept is None or accept(item))
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"backfill-{tag}")
+    try:
+        prefetch = {}
+
+        def schedule(page):
+            if end_page is None or page <= end_page:
+                prefetch.setdefault(page, pool.submit(propagate(fetch_list_page), page))
+
+        for page in range(start_page, start_page + workers):
+            schedule(page)
+
+        while end_page is None or page_index <= end_page:
+            page_items = parse_list_page(prefetch.pop(page_index).result())
+            schedule(page_index + workers)
+            if not page_items:
+                completed = True
+                break
+
+            if progress.total_pages is None:
+                # 목록 번호는 마지막 페이지에서 1로 끝나므로 현재 페이지 최상단 번호로 남은 페이지 수 추정
+                top = qnum_key(page_items[0]["qnum"])
+                if top:
+                    progress.total_pages = page_index - 1 + math.ceil(top / len(page_items))
+
+            targets = [item for item in page_items if is_target(item)]
+            records = list(pool.map(propagate(build_record), targets))
+            committed = [r for r in records if r is not None]
+            for record in committed:
+                crawled.add(record["qnum"])
+                last_qnum = record["qnum"]
+
+            commit_batch(committed, page_index, last_qnum, status="running")
+            progress.update(len(committed), len(page_items) - len(targets), len(targets) - len(committed))
+            snapshot = progress.report(tag, page_index)
+            if on_progress:
+                on_progress(snapshot)
+            page_index += 1
+        else:
+            completed = True
+
+        if completed:
+            commit_batch([], page_index, last_qnum, status="done")
+    finally:
+        for future in prefetch.values():
+            future.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        http.set_rate_limit(list_url, None)
+
+    print(f"[BACKFILL] {tag} {'completed' if completed else 'stopped'}: "
+          f"new {progress.new}, failed {progress.failed}, {progress.pages} pages")
+    return progress.snapshot(max(start_page, page_index - 1))
@@ -0,0 +1,73 @@
+"""
+크롤링 체크포인트 모듈
+
+체크포인트(마지막 페이지, 마지막 qnum, 아카이브 논리 오프셋 jsonl_size)는 크롤러 DB의 crawl_checkpoint 테이블에
+배치 레코드와 같은 트랜잭션으로 기록된다. 따라서 DB 커밋 여부가 곧 배치 커밋 여부이며,
+커밋 전에 미리 써둔 벡터(qnum id upsert)와 아카이브(재개 시 jsonl_size로 잘라냄, archive.py)는 재실행으로 맞춰진다.
+"""
+
+import sqlite3
+from datetime import datetime
+
+from src.utils import db
+
+
+def init_checkpoint_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_checkpoint (
+            name TEXT PRIMARY KEY,
+            status TEXT,
+            page INTEGER,
+            last_qnum TEXT,
+            jsonl_size INTEGER,
+            updated_at TEXT
+        )
+    """)
+
+
+def write_checkpoint(cur, name, status, page, last_qnum, jsonl_size):
+    """호출한 쪽의 트랜잭션 안에서 체크포인트 갱신 (commit은 호출한 쪽에서)"""
+    cur.execute("""
+        INSERT OR REPLACE INTO crawl_checkpoint (name, status, page, last_qnum, jsonl_size, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (name, status, page, last_qnum, jsonl_size, datetime.now().isoformat(timespec="seconds")))
+
+
+def load_checkpoint(db_path, name):
+    try:
+        return db.query_one(db_path, "SELECT * FROM crawl_checkpoint WHERE name = ?", (name,))
+    except sqlite3.OperationalError:
+        return None
+
+
+def committed_jsonl_size(db_path):
+    """
+    커밋된 아카이브 오프셋. 증분 크롤링과 백필이 같은 아카이브에 이어 쓰므로
+    모든 체크포인트 중 가장 큰 값(= 마지막 커밋 시점의 크기)을 사용한다.
+    """
+    try:
+        row = db.query_one(db_path, "SELECT MAX(jsonl_size) AS jsonl_size FROM crawl_checkpoint")
+    except sqlite3.OperationalError:
+        return None
+    return row["jsonl_size"] if row else None
+
+
+def max_qnum_below(db_path, table, qnum, where="", params=()):
+    """table에 저장된 글(where 조건) 중 qnum보다 작은 가장 큰 목록 번호 (없으면 None). 미수집 구간(gap)의 하한 계산용"""
+    key = qnum_key(qnum)
+    if key is None:
+        return None
+    row = db.query_one(db_path, f"""
+        SELECT MAX(CAST(REPLACE(qnum, ',', '') AS INTEGER)) AS qnum
+        FROM {table}
+        WHERE CAST(REPLACE(qnum, ',', '') AS INTEGER) < ? {f"AND ({where})" if where else ""}
+    """, (key, *params))
+    return row["qnum"] if row else None
+
+
+def qnum_key(qnum):
+    """목록 번호 비교용 정수 (숫자가 아니면 None)"""
+    try:
+        return int(str(qnum).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
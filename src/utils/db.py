@@ -0,0 +1,124 @@
+"""
+SQLite 공통 접근 모듈
+
+DB 파일마다 프로세스당 하나의 장수명 연결을 재사용하고(스레드 간 공유, RLock으로 직렬화),
+연결 시 WAL / 동기화 수준 / 캐시 크기 등 pragma를 설정한다.
+WAL 모드에서는 크롤러가 쓰는 동안에도 앱(다른 프로세스)이 읽기를 계속할 수 있다.
+
+- transaction(db_path): 쓰기 트랜잭션 (예외 시 rollback)
+- query / query_one: 결과 전체 / 한 행 조회 (dict)
+- iter_batches: rowid keyset 방식으로 큰 테이블을 batch_size 행씩 스트리밍
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",      # WAL에서는 NORMAL로도 커밋 내구성 유지 (체크포인트 시 fsync)
+    "PRAGMA busy_timeout = 5000",       # 다른 프로세스가 쓰는 중이면 최대 5초 대기
+    "PRAGMA cache_size = -32000",       # 약 32MB 페이지 캐시
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",     # 256MB memory-mapped I/O
+]
+
+_connections = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _key(db_path):
+    # fork된 자식 프로세스가 부모의 연결을 이어 쓰지 않도록 pid 포함
+    return os.getpid(), str(Path(db_path).resolve())
+
+
+def get_connection(db_path):
+    """db_path에 대한 프로세스 공용 연결과 잠금"""
+    key = _key(db_path)
+    with _registry_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            conn.row_factory = sqlite3.Row
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            _connections[key] = conn
+            _locks[key] = threading.RLock()
+        return conn, _locks[key]
+
+
+def close_all():
+    with _registry_lock:
+        for key, conn in list(_connections.items()):
+            if key[0] == os.getpid():
+                conn.close()
+            del _connections[key]
+            _locks.pop(key, None)
+
+
+@contextmanager
+def transaction(db_path):
+    """
+    with transaction(DB_PATH) as cur:
+        cur.execute(...)
+    블록이 끝나면 commit, 예외가 나면 rollback
+    """
+    conn, lock = get_connection(db_path)
+    with lock:
+        cur = conn.cursor()
+        try:
+            yield cur
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def query(db_path, sql, params=()):
+    conn, lock = get_connection(db_path)
+    with lock:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+
+def query_one(db_path, sql, params=()):
+    conn, lock = get_connection(db_path)
+    with lock:
+        row = conn.execute(sql, params).fetchone()
+    return dict(row) if row else None
+
+
+def iter_batches(db_path, table, columns="*", where="", params=(), batch_size=1000):
+    """
+    rowid 순서로 batch_size 행씩 dict 리스트를 yield.
+    배치마다 짧게 잠금을 잡으므로 스트리밍 도중에도 다른 스레드의 쓰기가 막히지 않는다.
+    """
+    condition = f"AND ({where})" if where else ""
+    last_rowid = -1
+    while True:
+        conn, lock = get_connection(db_path)
+        with lock:
+            rows = conn.execute(
+                f"SELECT rowid AS _rowid, {columns} FROM {table} "
+                f"WHERE rowid > ? {condition} ORDER BY rowid LIMIT ?",
+                (last_rowid, *params, batch_size),
+            ).fetchall()
+        if not rows:
+            return
+        last_rowid = rows[-1]["_rowid"]
+        batch = []
+        for row in rows:
+            record = dict(row)
+            del record["_rowid"]
+            batch.append(record)
+        yield batch
+
+
+def table_columns(cur, table):
+    return {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
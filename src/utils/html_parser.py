@@ -0,0 +1,132 @@
+"""
+크롤러 공통 HTML 파싱 계층
+
+백엔드별 파서를 같은 노드 인터페이스(select / select_one / text / attr)로 감싸,
+크롤러의 목록 테이블 / 상세(qBox, aBox, dl) 추출 코드가 백엔드와 무관하게 동작하도록 한다.
+
+백엔드 (빠른 순)
+- selectolax : lexbor 기반 C 파서 (pip install selectolax)
+- lxml       : BeautifulSoup + lxml 트리빌더 (pip install lxml)
+- html.parser: BeautifulSoup + 표준 라이브러리 파서
+- html5lib   : BeautifulSoup + html5lib (기존 기준 파서, 가장 느림)
+
+환경 변수 HTML_PARSER_BACKEND로 고정할 수 있으며, 지정하지 않으면 설치된 것 중 가장 빠른 백엔드를 사용한다.
+"""
+
+import importlib.util
+import os
+from contextlib import contextmanager
+
+
+BACKENDS = ["selectolax", "lxml", "html.parser", "html5lib"]
+_REQUIRED_MODULE = {
+    "selectolax": "selectolax",
+    "lxml": "lxml",
+    "html.parser": "bs4",
+    "html5lib": "html5lib",
+}
+_backend_override = None
+
+
+def is_available(backend):
+    module = _REQUIRED_MODULE[backend]
+    if importlib.util.find_spec(module) is None:
+        return False
+    return backend == "selectolax" or importlib.util.find_spec("bs4") is not None
+
+
+def available_backends():
+    return [b for b in BACKENDS if is_available(b)]
+
+
+def default_backend():
+    if _backend_override:
+        return _backend_override
+    configured = os.getenv("HTML_PARSER_BACKEND")
+    if configured:
+        if configured not in BACKENDS:
+            raise ValueError(f"Unknown HTML parser backend: {configured}")
+        return configured
+    for backend in BACKENDS:
+        if is_available(backend):
+            return backend
+    raise ImportError("No HTML parser backend available. Install selectolax, lxml or beautifulsoup4.")
+
+
+@contextmanager
+def use_backend(backend):
+    """블록 안에서 parse_html 기본 백엔드를 교체 (벤치마크 / 비교용)"""
+    global _backend_override
+    previous, _backend_override = _backend_override, backend
+    try:
+        yield
+    finally:
+        _backend_override = previous
+
+
+# -------------------------
+# 노드 어댑터
+# -------------------------
+class SoupNode:
+    def __init__(self, tag):
+        self._tag = tag
+
+    def select(self, css):
+        return [SoupNode(t) for t in self._tag.select(css)]
+
+    def select_one(self, css):
+        tag = self._tag.select_one(css)
+        return SoupNode(tag) if tag is not None else None
+
+    def text(self):
+        return self._tag.get_text(strip=True)
+
+    def attr(self, name, default=None):
+        return self._tag.get(name, default)
+
+
+class SelectolaxNode:
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [SelectolaxNode(n) for n in self._node.css(css)]
+
+    def select_one(self, css):
+        node = self._node.css_first(css)
+        return SelectolaxNode(node) if node is not None else None
+
+    def text(self):
+        return self._node.text(deep=True, separator="", strip=True)
+
+    def attr(self, name, default=None):
+        value = self._node.attributes.get(name)
+        return default if value is None else value
+
+
+def parse_html(html, backend=None):
+    backend = backend or default_backend()
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        return SelectolaxNode(LexborHTMLParser(html))
+
+    from bs4 import BeautifulSoup
+    return SoupNode(BeautifulSoup(html, backend))
+
+
+# -------------------------
+# 공통 추출 헬퍼
+# -------------------------
+def table_rows(root):
+    """
+    목록 테이블의 행. 원본에 tbody가 없으면 html5lib/selectolax만 tbody를 보정하므로
+    tbody가 보이지 않는 백엔드에서는 table 바로 아래 행으로 대체한다.
+    """
+    rows = root.select("table tbody tr")
+    if not rows:
+        rows = root.select("table tr")
+    return rows
+
+
+def joined_text(nodes, separator=" "):
+    return separator.join(node.text() for node in nodes)
@@ -0,0 +1,222 @@
+"""
+스크래퍼 공통 HTTP 모듈
+
+- 스레드별 requests.Session 재사용 (keep-alive 커넥션 풀)
+- 일시적 오류(429 / 5xx / 연결 실패)는 urllib3 Retry로 지수 backoff 재시도
+- 호스트별 token bucket 속도 제한 (set_rate_limit, 백필 등 대량 크롤링용)
+- 응답 본문을 zlib 압축하여 디스크 캐시(data/http_cache)에 저장하고,
+  ttl 이내면 네트워크 없이 재사용, 이후에는 ETag / Last-Modified로 조건부 재검증(304)
+
+환경 변수
+- HTTP_CACHE     : "0"이면 디스크 캐시 비활성화
+- HTTP_CACHE_DIR : 캐시 디렉토리 (기본 data/http_cache)
+- HTTP_CACHE_TTL : 기본 ttl 초 (기본 0 = 매번 재검증)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from src.utils.rate_limit import RateLimiter
+from src.utils.tracing import span
+
+
+# -------------------------
+# 0) 환경 설정
+# -------------------------
+try:
+    BASE_DIR = Path(__file__).resolve().parent.parent.parent
+except NameError:
+    BASE_DIR = Path.cwd()
+
+CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", BASE_DIR / "data" / "http_cache"))
+DEFAULT_TTL = float(os.getenv("HTTP_CACHE_TTL", "0"))
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5  # 0.5s, 1s, 2s ...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_MAXSIZE = 16
+
+_local = threading.local()
+_host_limiters = {}
+
+
+def set_rate_limit(url, rate, burst=None):
+    """
+    url의 호스트로 나가는 실제 네트워크 요청(캐시 hit 제외)을 프로세스 전역에서 초당 rate건으로 제한.
+    rate=None이면 제한 해제.
+    """
+    host = urlsplit(url).netloc or url
+    if rate is None:
+        _host_limiters.pop(host, None)
+    else:
+        _host_limiters[host] = RateLimiter(rate, burst)
+
+
+def get_session():
+    """현재 스레드의 커넥션 풀 Session (Session은 스레드 간 공유하지 않음)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET", "HEAD"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+class CachedResponse:
+    """requests.Response에서 스크래퍼가 쓰는 부분(status_code / headers / content / text)만 담은 응답"""
+
+    def __init__(self, url, status_code, headers, content, encoding, cache_status):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.cache_status = cache_status  # "hit" | "revalidated" | "miss" | "bypass"
+
+    @property
+    def from_cache(self):
+        return self.cache_status in ("hit", "revalidated")
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+# -------------------------
+# 1) 디스크 캐시
+# -------------------------
+def cache_key(url, params=None):
+    full_url = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+    return full_url, hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.z"
+
+
+def load_cached(key):
+    """캐시 파일: 메타데이터 JSON 한 줄 + zlib 압축 본문"""
+    path = _cache_path(key)
+    try:
+        raw = path.read_bytes()
+        header, body = raw.split(b"\n", 1)
+        meta = json.loads(header)
+        meta["content"] = zlib.decompress(body)
+        return meta
+    except (OSError, ValueError, zlib.error):
+        return None
+
+
+def store_cached(key, meta, content):
+    path = _cache_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(json.dumps(meta).encode("utf-8") + b"\n" + zlib.compress(content, 6))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[HTTP] Failed to write cache for {meta.get('url')}: {e}")
+
+
+def touch_cached(key, meta):
+    """304 응답: 본문은 그대로 두고 검증 시각 / validator만 갱신"""
+    content = meta.pop("content")
+    store_cached(key, meta, content)
+    meta["content"] = content
+
+
+def clear_cache():
+    import shutil
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+# -------------------------
+# 2) 요청
+# -------------------------
+def get(url, params=None, headers=None, timeout=30, verify=True, cache=True, ttl=None):
+    """
+    GET 요청. cache=True면 디스크 캐시를 사용하며,
+    ttl(초) 이내에 저장된 응답은 네트워크 요청 없이 반환한다.
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    use_cache = cache and CACHE_ENABLED
+    full_url, key = cache_key(url, params)
+
+    cached = load_cached(key) if use_cache else None
+    if cached and time.time() - cached["fetched_at"] < ttl:
+        with span("http.get", url=full_url, cache="hit", bytes=len(cached["content"])):
+            return CachedResponse(full_url, cached["status_code"], cached["headers"],
+                                  cached["content"], cached["encoding"], "hit")
+
+    request_headers = dict(headers or {})
+    if cached:
+        if cached["headers"].get("ETag"):
+            request_headers["If-None-Match"] = cached["headers"]["ETag"]
+        if cached["headers"].get("Last-Modified"):
+            request_headers["If-Modified-Since"] = cached["headers"]["Last-Modified"]
+
+    limiter = _host_limiters.get(urlsplit(url).netloc)
+    with span("http.get", url=full_url, revalidate=cached is not None) as sp:
+        if limiter:
+            sp.set_attribute("rate_limit_wait", round(limiter.acquire(), 3))
+        resp = get_session().get(url, params=params, headers=request_headers, timeout=timeout, verify=verify)
+        sp.set_attributes(status=resp.status_code, bytes=len(resp.content))
+
+        if resp.status_code == 304 and cached:
+            sp.set_attribute("cache", "revalidated")
+            for name in ("ETag", "Last-Modified"):
+                if resp.headers.get(name):
+                    cached["headers"][name] = resp.headers[name]
+            cached["fetched_at"] = time.time()
+            touch_cached(key, cached)
+            return CachedResponse(full_url, cached["status_code"], cached["headers"],
+                                  cached["content"], cached["encoding"], "revalidated")
+
+        encoding = resp.encoding or resp.apparent_encoding
+        response_headers = {
+            name: resp.headers[name]
+            for name in ("ETag", "Last-Modified", "Content-Type")
+            if resp.headers.get(name)
+        }
+        cache_status = "miss" if use_cache else "bypass"
+        sp.set_attribute("cache", cache_status)
+
+        if use_cache and resp.status_code == 200:
+            store_cached(key, {
+                "url": full_url,
+                "status_code": resp.status_code,
+                "headers": response_headers,
+                "encoding": encoding,
+                "fetched_at": time.time(),
+            }, resp.content)
+
+    return CachedResponse(full_url, resp.status_code, response_headers, resp.content, encoding, cache_status)
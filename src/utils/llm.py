@@ -0,0 +1,59 @@
+"""
+OpenAI 호출 공통 래퍼
+
+chat.completions.create 호출을 tracing span으로 감싸고 모델 / 토큰 사용량을 span 속성으로 남긴다.
+사용량과 지연시간은 metering 모듈(db/usage.db)에도 기록된다.
+"""
+
+import time
+
+from src.utils.metering import record_usage
+from src.utils.tracing import span
+
+
+# span 이름 접두어 → 사용량 집계용 에이전트 이름
+AGENT_NAMES = {
+    "router": "main",
+    "legal": "LegalAgent",
+    "newsletter": "NewsletterAgent",
+}
+
+
+def usage_attributes(response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+    }
+
+
+def chat_completion(client, name, **kwargs):
+    """
+    client.chat.completions.create(**kwargs) 호출 후 응답 반환
+    name: span / 계측 step 이름 (예: "router", "legal.create_ground")
+    """
+    model = kwargs.get("model")
+    with span(f"llm.{name}", model=model, messages=len(kwargs.get("messages", []))) as sp:
+        start = time.perf_counter()
+        response = client.chat.completions.create(**kwargs)
+        latency = time.perf_counter() - start
+
+        usage = usage_attributes(response)
+        sp.set_attributes(**usage)
+        choices = getattr(response, "choices", None)
+        if choices:
+            sp.set_attribute("finish_reason", str(choices[0].finish_reason))
+
+    record_usage(
+        "chat",
+        getattr(response, "model", None) or model,
+        name,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        latency=latency,
+        agent=AGENT_NAMES.get(name.split(".")[0], name.split(".")[0]),
+    )
+    return response
@@ -0,0 +1,172 @@
+"""
+크롤러 qnum 존재 여부(membership) 판정 모듈
+
+크롤링마다 테이블의 qnum 전체를 set으로 읽어오지 않고,
+1) qnum 최댓값 워터마크: 워터마크보다 큰 번호는 조회 없이 신규
+2) bloom filter: 음성(없음)이면 조회 없이 신규 (거짓 음성 없음)
+3) 양성이면 PRIMARY KEY 인덱스로 한 건 조회하여 확정 (bloom 거짓 양성 보정)
+순으로 O(1)에 판정한다.
+
+bloom filter는 db/<name>.bloom 파일에 저장되며, 로드 시 마지막으로 반영한 rowid 이후에 추가된 행만
+이어서 반영(catch-up)하므로 크롤러 / 백필 / 다른 프로세스가 쓴 행도 빠짐없이 들어간다.
+로드 이후 같은 실행에서 저장한 행은 refresh()를 호출해야 반영된다
+(크롤러는 이번 실행에서 수집한 qnum을 별도 set으로 관리하므로 실행 중에는 필요 없음).
+"""
+
+import copy
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+
+from src.utils import db
+from src.utils.checkpoint import qnum_key
+
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE, bits=None, num_hashes=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = bits or max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / capacity * math.log(2)))
+        self.array = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class QnumIndex:
+    """
+    set처럼 `qnum in index`로 사용하는 영속 membership 인덱스.
+    where: 인정할 행 조건 (예: 답변완료만). bloom에는 테이블의 모든 qnum이 들어가고, 조건은 확정 조회에서 적용된다.
+    """
+
+    def __init__(self, db_path, table, where="", params=(), bloom_path=None, capacity=DEFAULT_CAPACITY):
+        self.db_path = db_path
+        self.table = table
+        self.where = where
+        self.params = tuple(params)
+        self.bloom_path = Path(bloom_path or Path(db_path).with_suffix(".bloom"))
+        self.capacity = capacity
+        self.bloom = None
+        self.last_rowid = -1
+        self.watermark = None
+        self.lookups = 0
+        self._load()
+
+    # -------------------------
+    # 로드 / 저장
+    # -------------------------
+    def _load(self):
+        try:
+            with open(self.bloom_path, "rb") as f:
+                header = json.loads(f.readline())
+                bloom = BloomFilter(header["capacity"], header["error_rate"], header["bits"], header["num_hashes"])
+                bloom.array = bytearray(f.read())
+                bloom.count = header["count"]
+            if len(bloom.array) != (bloom.num_bits + 7) // 8:
+                raise ValueError("corrupt bloom file")
+            self.bloom = bloom
+            self.last_rowid = header["last_rowid"]
+            self.watermark = header["watermark"]
+        except (OSError, ValueError, KeyError):
+            self.bloom = BloomFilter(self.capacity)
+
+        if self._catch_up():
+            self.save()
+
+    def _catch_up(self):
+        """bloom에 아직 반영되지 않은 행(rowid > last_rowid) 반영. 용량을 넘으면 두 배로 재구성."""
+        max_rowid = db.query_one(self.db_path, f"SELECT MAX(rowid) AS max_rowid FROM {self.table}")["max_rowid"]
+        if max_rowid is None or max_rowid <= self.last_rowid:
+            return False
+
+        for batch in db.iter_batches(self.db_path, self.table, columns="rowid AS rid, qnum",
+                                     where="rowid > ?", params=(self.last_rowid,), batch_size=5000):
+            for row in batch:
+                if self.bloom.count >= self.bloom.capacity:
+                    return self.rebuild(capacity=self.bloom.capacity * 2)
+                self.bloom.add(row["qnum"])
+                key = qnum_key(row["qnum"])
+                if key is not None and (self.watermark is None or key > self.watermark):
+                    self.watermark = key
+                self.last_rowid = row["rid"]
+        return True
+
+    def refresh(self):
+        if self._catch_up():
+            self.save()
+
+    def restrict(self, where, params=()):
+        """같은 bloom filter를 공유하면서 확정 조회 조건만 다른 인덱스 (예: 전체 qnum -> 답변완료 qnum)"""
+        view = copy.copy(self)
+        view.where = where
+        view.params = tuple(params)
+        view.lookups = 0
+        return view
+
+    def rebuild(self, capacity=None):
+        self.bloom = BloomFilter(capacity or self.capacity)
+        self.last_rowid = -1
+        self.watermark = None
+        self._catch_up()
+        return True
+
+    def save(self):
+        header = {
+            "capacity": self.bloom.capacity,
+            "error_rate": self.bloom.error_rate,
+            "bits": self.bloom.num_bits,
+            "num_hashes": self.bloom.num_hashes,
+            "count": self.bloom.count,
+            "last_rowid": self.last_rowid,
+            "watermark": self.watermark,
+        }
+        tmp = self.bloom_path.with_suffix(".bloom.tmp")
+        try:
+            self.bloom_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(self.bloom.array)
+            os.replace(tmp, self.bloom_path)
+        except OSError as e:
+            print(f"[WARN] Failed to save bloom filter {self.bloom_path}: {e}")
+
+    # -------------------------
+    # 조회
+    # -------------------------
+    def __contains__(self, qnum):
+        key = qnum_key(qnum)
+        if key is not None and self.watermark is not None and key > self.watermark:
+            return False
+        if qnum not in self.bloom:
+            return False
+        self.lookups += 1
+        condition = f"AND ({self.where})" if self.where else ""
+        row = db.query_one(
+            self.db_path,
+            f"SELECT 1 AS found FROM {self.table} WHERE qnum = ? {condition}",
+            (qnum, *self.params),
+        )
+        return row is not None
+
+    def __len__(self):
+        condition = f"WHERE {self.where}" if self.where else ""
+        return db.query_one(self.db_path, f"SELECT COUNT(*) AS n FROM {self.table} {condition}", self.params)["n"]
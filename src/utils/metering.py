@@ -0,0 +1,214 @@
+"""
+OpenAI 토큰 사용량 / 비용 계측 모듈
+
+chat completion 및 embedding 호출마다 prompt/completion 토큰과 지연시간을
+SQLite(db/usage.db)의 llm_usage 테이블에 기록하고, 대화 턴 / 세션 / 일자 단위로 집계한다.
+"""
+
+import contextvars
+import functools
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+
+# -------------------------
+# 0) 환경 설정
+# -------------------------
+try:
+    BASE_DIR = Path(__file__).resolve().parent.parent.parent
+except NameError:
+    BASE_DIR = Path.cwd()
+
+OUTPUT_DB = "usage.db"
+DB_PATH = BASE_DIR / "db" / OUTPUT_DB
+
+# USD / 1M tokens (input, output)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+_context = contextvars.ContextVar("metering_context", default={})
+_init_lock = threading.Lock()
+_initialized = False
+
+
+# -------------------------
+# 0-1) DB 초기화
+# -------------------------
+def init_db():
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH)
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS llm_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                day TEXT,
+                session_id TEXT,
+                turn_id TEXT,
+                agent TEXT,
+                step TEXT,
+                kind TEXT,
+                model TEXT,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                latency REAL,
+                cost_usd REAL
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_session ON llm_usage (session_id, turn_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_day ON llm_usage (day)")
+        conn.commit()
+        conn.close()
+        _initialized = True
+
+
+# -------------------------
+# 1) 계측 컨텍스트 (세션 / 턴 / 에이전트)
+# -------------------------
+@contextmanager
+def metering_context(**values):
+    """
+    with metering_context(session_id=..., agent="LegalAgent"):
+        ... 이 블록 안에서 기록되는 사용량에 값이 붙는다
+    """
+    token = _context.set({**_context.get(), **values})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def metered_agent(agent):
+    """메서드 실행 동안 기록되는 사용량(embedding 포함)을 agent로 귀속시키는 decorator"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metering_context(agent=agent):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def turn(session_id=None):
+    """대화 한 턴 단위 컨텍스트. turn_id는 새로 발급한다."""
+    values = {"turn_id": uuid.uuid4().hex}
+    if session_id:
+        values["session_id"] = session_id
+    with metering_context(**values):
+        yield values["turn_id"]
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        # 날짜가 붙은 모델명(gpt-4o-2024-08-06 등)은 가장 긴 접두어로 매칭
+        matches = [name for name in MODEL_PRICES if model and model.startswith(name)]
+        if not matches:
+            return 0.0
+        price = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+# -------------------------
+# 2) 기록
+# -------------------------
+def record_usage(kind, model, step, prompt_tokens=0, completion_tokens=0, latency=0.0, agent=None):
+    ctx = _context.get()
+    try:
+        init_db()
+        now = datetime.now()
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("""
+            INSERT INTO llm_usage (created_at, day, session_id, turn_id, agent, step, kind, model,
+                                   prompt_tokens, completion_tokens, latency, cost_usd)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            now.isoformat(timespec="seconds"),
+            now.strftime("%Y-%m-%d"),
+            ctx.get("session_id"),
+            ctx.get("turn_id"),
+            agent or ctx.get("agent"),
+            step,
+            kind,
+            model,
+            prompt_tokens,
+            completion_tokens,
+            round(latency, 4),
+            estimate_cost(model, prompt_tokens, completion_tokens),
+        ))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        # 계측 실패가 사용자 요청을 막지 않도록 로그만 남김
+        print(f"[METER] Failed to record usage: {e}")
+
+
+# -------------------------
+# 3) 집계
+# -------------------------
+def _query(sql, params=()):
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+    conn.close()
+    return rows
+
+
+_TOTALS = """
+    COUNT(*) AS calls,
+    COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+    COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+    COALESCE(SUM(latency), 0) AS latency,
+    COALESCE(SUM(cost_usd), 0) AS cost_usd
+"""
+
+
+def session_totals(session_id):
+    return _query(f"SELECT {_TOTALS} FROM llm_usage WHERE session_id = ?", (session_id,))[0]
+
+
+def usage_by_turn(session_id):
+    return _query(f"""
+        SELECT turn_id, MIN(created_at) AS started_at, {_TOTALS}
+        FROM llm_usage WHERE session_id = ?
+        GROUP BY turn_id ORDER BY started_at
+    """, (session_id,))
+
+
+def usage_by_step(session_id=None, day=None):
+    where, params = [], []
+    if session_id:
+        where.append("session_id = ?")
+        params.append(session_id)
+    if day:
+        where.append("day = ?")
+        params.append(day)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    return _query(f"""
+        SELECT agent, step, model, {_TOTALS}
+        FROM llm_usage {clause}
+        GROUP BY agent, step, model ORDER BY cost_usd DESC
+    """, tuple(params))
+
+
+def usage_by_day(days=30):
+    return _query(f"""
+        SELECT day, {_TOTALS}
+        FROM llm_usage
+        GROUP BY day ORDER BY day DESC LIMIT ?
+    """, (days,))
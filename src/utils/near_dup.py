@@ -0,0 +1,207 @@
+"""
+근접 중복(near-duplicate) 글 묶기 모듈 (MinHash / LSH)
+
+빠른상담 등에는 문구만 조금 다른 같은 질문(연차 / 출산휴가 등)이 반복되어 벡터 검색 top-k를 중복 결과로 채운다.
+수집 단계에서 글마다 MinHash 서명을 만들고 LSH 버킷으로 후보를 찾아, 추정 Jaccard 유사도가 threshold 이상인
+기존 대표(canonical) 글이 있으면 그 묶음(cluster)에 넣는다. 벡터 컬렉션에는 대표 글만 넣고 duplicates(묶인 글 수)를 기록하며,
+묶인 글은 member_rows로 필요할 때 펼쳐 볼 수 있다.
+
+- 텍스트: 공백 / 문장부호를 지운 뒤 글자 SHINGLE_SIZE-gram 집합
+- 서명: NUM_PERM개 해시 함수의 최솟값, LSH는 BANDS개 band x ROWS행 (후보 기준 유사도 약 (1/BANDS)^(1/ROWS))
+- 저장: 크롤러 DB의 <table>_dups (qnum -> canonical, 서명), <table>_lsh (대표 글의 band 버킷)
+- 한 번 정해진 묶음은 바뀌지 않는다 (같은 qnum을 다시 assign하면 기존 대표를 반환)
+
+NEAR_DUP=0 이면 묶지 않고 모든 글을 대표로 취급한다.
+"""
+
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+from src.utils import db
+
+
+ENABLED = os.getenv("NEAR_DUP", "1") != "0"
+THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(20240501)  # 서명이 DB에 저장되므로 해시 함수는 고정
+_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+# -------------------------
+# 1) MinHash
+# -------------------------
+def shingles(text, size=SHINGLE_SIZE):
+    text = _NON_WORD.sub("", str(text or "").lower())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(text):
+    """MinHash 서명 (uint64[NUM_PERM]), 글자가 없으면 None"""
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    # ((a * x + b) mod p) & (2^32 - 1), a / b는 [0, p) 전체에서 뽑고 곱셈은 uint64에서 wrap-around
+    with np.errstate(over="ignore"):
+        return (((hashes[:, None] * _A + _B) % _PRIME) & _MAX_HASH).min(axis=0)
+
+
+def similarity(sig_a, sig_b):
+    """서명으로 추정한 Jaccard 유사도"""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def band_buckets(sig):
+    return [
+        (band, hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest())
+        for band in range(BANDS)
+    ]
+
+
+# -------------------------
+# 2) 저장 / SQL 조각
+# -------------------------
+def init_tables(cur, table):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table}_dups (
+            qnum TEXT PRIMARY KEY,
+            canonical TEXT NOT NULL,
+            similarity REAL,
+            signature BLOB
+        )
+    """)
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_dups_canonical ON {table}_dups (canonical)")
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table}_lsh (
+            band INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            qnum TEXT NOT NULL
+        )
+    """)
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_lsh_bucket ON {table}_lsh (band, bucket)")
+
+
+def canonical_sql(table):
+    """WHERE 조건: 다른 글에 묶이지 않은 글 (아직 묶음 판정 전인 글 포함)"""
+    return f"qnum NOT IN (SELECT qnum FROM {table}_dups WHERE canonical != qnum)"
+
+
+def duplicate_count_sql(table):
+    """SELECT 열: 이 글에 묶인 근접 중복 글 수 (duplicates)"""
+    return (f"(SELECT COUNT(*) FROM {table}_dups d "
+            f"WHERE d.canonical = {table}.qnum AND d.qnum != d.canonical) AS duplicates")
+
+
+# -------------------------
+# 3) 묶음 판정
+# -------------------------
+class NearDupIndex:
+    def __init__(self, db_path, table, threshold=THRESHOLD, enabled=ENABLED):
+        self.db_path = db_path
+        self.table = table
+        self.threshold = threshold
+        self.enabled = enabled
+
+    def _match(self, cur, sig):
+        """threshold 이상으로 가장 비슷한 대표 글 (qnum, 유사도) 또는 None"""
+        buckets = band_buckets(sig)
+        condition = " OR ".join(["(l.band = ? AND l.bucket = ?)"] * len(buckets))
+        candidates = cur.execute(
+            f"SELECT DISTINCT d.qnum, d.signature FROM {self.table}_lsh l "
+            f"JOIN {self.table}_dups d ON d.qnum = l.qnum WHERE {condition}",
+            [value for bucket in buckets for value in bucket],
+        ).fetchall()
+        best = None
+        for qnum, blob in candidates:
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint64))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (qnum, score)
+        return best
+
+    def assign(self, items, text_fn):
+        """
+        items를 순서대로 묶음에 배정하고 {qnum: 대표 qnum} 반환.
+        같은 배치 안의 앞선 글도 대표가 될 수 있다. 이미 배정된 qnum은 기존 대표를 그대로 반환
+        """
+        if not self.enabled:
+            return {str(item["qnum"]): str(item["qnum"]) for item in items}
+
+        canonical = {}
+        with db.transaction(self.db_path) as cur:
+            for item in items:
+                qnum = str(item["qnum"])
+                row = cur.execute(f"SELECT canonical FROM {self.table}_dups WHERE qnum = ?", (qnum,)).fetchone()
+                if row is not None:
+                    canonical[qnum] = row[0]
+                    continue
+
+                sig = signature(text_fn(item))
+                match = self._match(cur, sig) if sig is not None else None
+                target, score = match if match else (qnum, None)
+                cur.execute(
+                    f"INSERT INTO {self.table}_dups (qnum, canonical, similarity, signature) VALUES (?, ?, ?, ?)",
+                    (qnum, target, score, sig.tobytes() if sig is not None else None),
+                )
+                if target == qnum and sig is not None:
+                    cur.executemany(
+                        f"INSERT INTO {self.table}_lsh (band, bucket, qnum) VALUES (?, ?, ?)",
+                        [(band, bucket, qnum) for band, bucket in band_buckets(sig)],
+                    )
+                canonical[qnum] = target
+        return canonical
+
+    def split(self, items, text_fn):
+        """
+        (대표 글 items(duplicates 포함한 사본), 이번에 새 중복이 붙은 기존 대표 qnum 목록)
+        대표 글만 벡터 컬렉션에 넣고, 기존 대표는 duplicates 메타데이터만 갱신하면 된다
+        """
+        canonical = self.assign(items, text_fn)
+        own = {str(item["qnum"]) for item in items}
+        counts = self.counts(set(canonical.values()))
+        kept = [
+            {**item, "duplicates": counts.get(str(item["qnum"]), 0)}
+            for item in items if canonical[str(item["qnum"])] == str(item["qnum"])
+        ]
+        attached = sorted({target for qnum, target in canonical.items() if target != qnum and target not in own})
+        skipped = len(items) - len(kept)
+        if skipped:
+            clusters = {target for qnum, target in canonical.items() if target != qnum}
+            print(f"[DEDUP] {self.table}: {skipped} near-duplicates folded into {len(clusters)} clusters")
+        return kept, attached
+
+    def counts(self, qnums):
+        """{대표 qnum: 묶인 글 수} (묶인 글이 없는 qnum은 빠짐)"""
+        qnums = list(qnums)
+        if not qnums:
+            return {}
+        placeholders = ",".join("?" * len(qnums))
+        rows = db.query(
+            self.db_path,
+            f"SELECT canonical, COUNT(*) AS n FROM {self.table}_dups "
+            f"WHERE canonical IN ({placeholders}) AND qnum != canonical GROUP BY canonical",
+            qnums,
+        )
+        return {row["canonical"]: row["n"] for row in rows}
+
+    def member_rows(self, canonical, limit=None):
+        """canonical에 묶인 글의 원본 행 (유사도 높은 순)"""
+        return db.query(
+            self.db_path,
+            f"SELECT t.*, d.similarity FROM {self.table} t JOIN {self.table}_dups d ON d.qnum = t.qnum "
+            f"WHERE d.canonical = ? AND d.qnum != d.canonical ORDER BY d.similarity DESC LIMIT ?",
+            (str(canonical), -1 if limit is None else limit),
+        )
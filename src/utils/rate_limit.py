@@ -0,0 +1,35 @@
+"""
+Token bucket 요청 속도 제한
+
+여러 스레드가 공유하는 전역 제한기. 초당 rate개의 토큰이 burst개까지 쌓이며,
+acquire()는 토큰이 생길 때까지 대기한다.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        """토큰을 얻을 때까지 대기하고, 대기한 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
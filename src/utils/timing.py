@@ -0,0 +1,71 @@
+"""
+단계별 실행 시간 측정 모듈
+
+start_recording() 이후 stage() 블록의 wall time을 기록하고,
+stop_recording()으로 수집된 기록을 반환한다. 기록 중이 아닐 때 stage()는 tracing span만 남긴다.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from src.utils.tracing import span
+
+
+_lock = threading.Lock()
+_records = None
+
+
+def start_recording():
+    global _records
+    with _lock:
+        _records = []
+
+
+def stop_recording():
+    global _records
+    with _lock:
+        records, _records = (_records or []), None
+    return records
+
+
+def is_recording():
+    return _records is not None
+
+
+@contextmanager
+def stage(name, **attrs):
+    """
+    with stage("router.completion"): ... 형태로 감싼 구간의 소요 시간을 기록.
+    각 stage는 같은 이름의 tracing span으로도 기록된다.
+    """
+    with span(name, **attrs) as sp:
+        if _records is None:
+            yield sp
+            return
+
+        start = time.perf_counter()
+        try:
+            yield sp
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                if _records is not None:
+                    _records.append({"stage": name, "seconds": round(elapsed, 6), **attrs})
+
+
+def summarize(records):
+    """
+    stage 이름별 호출 횟수 / 합계 / 최대 시간 집계
+    """
+    summary = {}
+    for rec in records:
+        item = summary.setdefault(rec["stage"], {"count": 0, "total": 0.0, "max": 0.0})
+        item["count"] += 1
+        item["total"] += rec["seconds"]
+        item["max"] = max(item["max"], rec["seconds"])
+
+    for item in summary.values():
+        item["total"] = round(item["total"], 6)
+        item["max"] = round(item["max"], 6)
+    return summary
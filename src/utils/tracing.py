@@ -0,0 +1,289 @@
+"""
+요청 추적(tracing) 모듈
+
+OpenTelemetry 형식을 따르는 중첩 span을 기록한다.
+- span(name, **attributes): with 블록 단위로 span 생성 (부모 span은 contextvar로 자동 연결)
+- traced(name): 함수 전체를 span으로 감싸는 decorator
+- propagate(fn): 현재 span 컨텍스트를 들고 다른 스레드에서 실행할 callable
+  (ThreadPoolExecutor.submit / map, threading.Thread의 target은 contextvar를 물려받지 않으므로 감싸서 넘긴다)
+- root span이 끝나면 해당 trace의 span들을 JSONL 파일(기본 logs/traces.jsonl)에 기록하고,
+  LABORAGENT_OTLP_ENDPOINT가 설정되어 있으면 OTLP/HTTP(JSON)로 collector에 전송한다.
+  root가 끝난 뒤 끝나는 백그라운드 작업의 span(본문 prefetch 등)은 끝나는 즉시 따로 기록한다.
+- JSONL 파일이 LABORAGENT_TRACE_MAX_MB를 넘으면 traces.jsonl.1, .2 ...로 회전하고 LABORAGENT_TRACE_BACKUPS개만 남긴다.
+
+환경 변수
+- LABORAGENT_TRACING=0        : tracing 비활성화
+- LABORAGENT_TRACE_FILE=...   : JSONL 출력 경로
+- LABORAGENT_TRACE_MAX_MB=50  : JSONL 파일 최대 크기 (0 = 회전 안 함)
+- LABORAGENT_TRACE_BACKUPS=3  : 남길 회전 파일 수
+- LABORAGENT_OTLP_ENDPOINT=...: OTLP collector 주소 (예: http://localhost:4318)
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# -------------------------
+# 0) 환경 설정
+# -------------------------
+try:
+    BASE_DIR = Path(__file__).resolve().parent.parent.parent
+except NameError:
+    BASE_DIR = Path.cwd()
+
+SERVICE_NAME = "labor-agent"
+TRACING_ENABLED = os.getenv("LABORAGENT_TRACING", "1") != "0"
+TRACE_FILE = Path(os.getenv("LABORAGENT_TRACE_FILE", BASE_DIR / "logs" / "traces.jsonl"))
+TRACE_MAX_BYTES = int(float(os.getenv("LABORAGENT_TRACE_MAX_MB", "50")) * 1024 * 1024)
+TRACE_BACKUPS = int(os.getenv("LABORAGENT_TRACE_BACKUPS", "3"))
+OTLP_ENDPOINT = os.getenv("LABORAGENT_OTLP_ENDPOINT", "")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_pending = {}  # trace_id -> 종료된 span 목록 (root 종료 시 export)
+_exported = OrderedDict()  # root가 끝나 export된 trace_id (늦게 끝난 자식 span은 바로 export)
+_EXPORTED_LIMIT = 1000
+_lock = threading.Lock()
+
+
+# -------------------------
+# 1) Span
+# -------------------------
+class Span:
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e9
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_span():
+    return _current_span.get() or _NOOP_SPAN
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    with span("llm.create_ground", model="gpt-4o") as sp:
+        ...
+        sp.set_attribute("prompt_tokens", 1234)
+    """
+    if not TRACING_ENABLED:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    sp = Span(name, parent=parent, attributes=attributes)
+    token = _current_span.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status = "ERROR"
+        sp.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        sp.end_ns = time.time_ns()
+        _current_span.reset(token)
+        _finish(sp, is_root=parent is None)
+
+
+def traced(name=None, **attributes):
+    """함수 호출 전체를 span으로 기록하는 decorator"""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """
+    호출 시점의 span 컨텍스트에서 fn을 실행하는 callable (다른 스레드에서 호출해도 부모 span이 이어진다)
+        pool.submit(propagate(fetch_list_page), page)
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # 같은 Context는 여러 스레드에서 동시에 run할 수 없으므로 호출마다 복사 (pool.map 등)
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+# -------------------------
+# 2) Export
+# -------------------------
+def _finish(sp, is_root):
+    with _lock:
+        if sp.trace_id in _exported:
+            spans = [sp]  # root가 먼저 끝난 trace의 백그라운드 작업 span
+        else:
+            spans = _pending.setdefault(sp.trace_id, [])
+            spans.append(sp)
+            if not is_root:
+                return
+            spans = _pending.pop(sp.trace_id)
+            _exported[sp.trace_id] = None
+            while len(_exported) > _EXPORTED_LIMIT:
+                _exported.popitem(last=False)
+
+    export_spans(spans)
+
+
+def export_spans(spans):
+    try:
+        _write_jsonl(spans)
+    except OSError as e:
+        print(f"[TRACE] Failed to write trace file: {e}")
+
+    if OTLP_ENDPOINT:
+        threading.Thread(target=_send_otlp, args=(spans,), daemon=True).start()
+
+
+def _write_jsonl(spans):
+    TRACE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    lines = "".join(json.dumps(sp.to_dict(), ensure_ascii=False, default=str) + "\n" for sp in spans)
+    with _lock:
+        if TRACE_MAX_BYTES and TRACE_FILE.exists() and TRACE_FILE.stat().st_size + len(lines) > TRACE_MAX_BYTES:
+            _rotate(TRACE_FILE)
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def _backup_path(path, n):
+    return path.with_name(f"{path.name}.{n}")
+
+
+def _rotate(path):
+    """traces.jsonl -> .1 -> .2 ... (TRACE_BACKUPS개를 넘는 가장 오래된 파일은 삭제)"""
+    if TRACE_BACKUPS <= 0:
+        path.unlink()
+        return
+    _backup_path(path, TRACE_BACKUPS).unlink(missing_ok=True)
+    for n in range(TRACE_BACKUPS - 1, 0, -1):
+        if _backup_path(path, n).exists():
+            os.replace(_backup_path(path, n), _backup_path(path, n + 1))
+    os.replace(path, _backup_path(path, 1))
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _send_otlp(spans):
+    payload = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "src.utils.tracing"},
+                "spans": [
+                    {
+                        "traceId": sp.trace_id,
+                        "spanId": sp.span_id,
+                        "parentSpanId": sp.parent_id or "",
+                        "name": sp.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(sp.start_ns),
+                        "endTimeUnixNano": str(sp.end_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in sp.attributes.items()],
+                        "status": {"code": 2, "message": sp.error} if sp.status == "ERROR" else {"code": 1},
+                    }
+                    for sp in spans
+                ],
+            }],
+        }]
+    }
+    request = urllib.request.Request(
+        OTLP_ENDPOINT.rstrip("/") + "/v1/traces",
+        data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        urllib.request.urlopen(request, timeout=3).close()
+    except Exception as e:
+        print(f"[TRACE] Failed to export to collector: {e}")
+
+
+# -------------------------
+# 3) 조회
+# -------------------------
+def load_traces(path=None, min_duration=0.0):
+    """
+    JSONL(회전된 .N 파일 포함, 오래된 것부터)에 기록된 span을 trace 단위로 묶어 반환
+    (root span 소요시간 min_duration 이상만)
+    """
+    path = Path(path or TRACE_FILE)
+    traces = {}
+    for file in [_backup_path(path, n) for n in range(TRACE_BACKUPS, 0, -1)] + [path]:
+        if not file.exists():
+            continue
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    traces.setdefault(rec["trace_id"], []).append(rec)
+
+    return {
+        trace_id: sorted(spans, key=lambda s: s["start"])
+        for trace_id, spans in traces.items()
+        if any(s["parent_id"] is None and s["duration"] >= min_duration for s in spans)
+    }